@@ -0,0 +1,148 @@
+#
+# Copyright 2025 Amazon.com, Inc. and its affiliates. All Rights Reserved.
+#
+# Licensed under the Amazon Software License (the "License").
+# You may not use this file except in compliance with the License.
+# A copy of the License is located at
+#
+#   http://aws.amazon.com/asl/
+#
+# or in the "license" file accompanying this file. This file is distributed
+# on an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either
+# express or implied. See the License for the specific language governing
+# permissions and limitations under the License.
+#
+
+# admin.py
+# Diagnostics for memory growth, served under /admin/ on the metrics port and
+# only when ADMIN_TOKEN is set. Requests need "Authorization: Bearer <token>".
+#   GET  /admin/sessions        live sessions with their buffered bytes
+#   GET  /admin/heap            whether tracemalloc is tracing, and its totals
+#   POST /admin/heap/start      start tracing (?frames=N) and take a baseline snapshot
+#   POST /admin/heap/snapshot   top allocations, and what grew since the previous snapshot (?limit=N)
+#   POST /admin/heap/stop       stop tracing and drop the snapshots
+import asyncio
+import gc
+import hmac
+import json
+import logging
+import tracemalloc
+from urllib.parse import parse_qs
+
+logger = logging.getLogger(__name__)
+
+# Allocations made by tracemalloc and the import system are noise in a leak hunt
+_NOISE = (
+    tracemalloc.Filter(False, tracemalloc.__file__),
+    tracemalloc.Filter(False, "<frozen importlib._bootstrap>"),
+    tracemalloc.Filter(False, "<frozen importlib._bootstrap_external>"),
+    tracemalloc.Filter(False, "<unknown>"),
+)
+
+
+def _format_stat(stat, key):
+    frame = stat.traceback[0]
+    entry = {
+        "location": f"{frame.filename}:{frame.lineno}",
+        "sizeBytes": stat.size,
+        "count": stat.count,
+    }
+    if key == "diff":
+        entry["sizeDiffBytes"] = stat.size_diff
+        entry["countDiff"] = stat.count_diff
+    return entry
+
+
+class HeapProfiler:
+    """
+    tracemalloc on demand. Tracing slows allocations down, so it only runs
+    between start() and stop(); each snapshot is compared with the previous one.
+    """
+
+    def __init__(self):
+        self.previous = None
+
+    @property
+    def tracing(self):
+        return tracemalloc.is_tracing()
+
+    def start(self, frames=1):
+        if not self.tracing:
+            tracemalloc.start(frames)
+            logger.info(f"Heap tracing started with {frames} frames per allocation")
+        # Unreachable cycles would otherwise show up as growth until the collector runs
+        gc.collect()
+        self.previous = tracemalloc.take_snapshot().filter_traces(_NOISE)
+        return self.status()
+
+    def stop(self):
+        if self.tracing:
+            tracemalloc.stop()
+            logger.info("Heap tracing stopped")
+        self.previous = None
+        return self.status()
+
+    def status(self):
+        current, peak = tracemalloc.get_traced_memory()
+        return {
+            "tracing": self.tracing,
+            "tracedBytes": current,
+            "peakTracedBytes": peak,
+            "overheadBytes": tracemalloc.get_tracemalloc_memory(),
+        }
+
+    def snapshot(self, limit=25):
+        """Top allocations by source line, and the largest growths since the previous snapshot."""
+        if not self.tracing:
+            raise RuntimeError("Heap tracing is not running, start it first")
+        snapshot = tracemalloc.take_snapshot().filter_traces(_NOISE)
+        result = self.status()
+        result["top"] = [_format_stat(s, "lineno") for s in snapshot.statistics("lineno")[:limit]]
+        if self.previous is not None:
+            diff = snapshot.compare_to(self.previous, "lineno")
+            result["grown"] = [_format_stat(s, "diff") for s in diff if s.size_diff > 0][:limit]
+        self.previous = snapshot
+        return result
+
+
+class AdminApi:
+    """The /admin/ routes; disabled (404) without a token."""
+
+    def __init__(self, token, sessions):
+        self.token = token
+        self.sessions = sessions
+        self.heap = HeapProfiler()
+
+    async def handle(self, method, target, headers):
+        """Returns (status, JSON-serializable body)."""
+        if not self.token:
+            return "404 Not Found", {"error": "Not found"}
+        authorization = headers.get("authorization", "")
+        if not hmac.compare_digest(authorization.encode(), f"Bearer {self.token}".encode()):
+            return "401 Unauthorized", {"error": "Unauthorized"}
+
+        path, _, query = target.partition("?")
+        params = {name: values[-1] for name, values in parse_qs(query).items()}
+        try:
+            if method == "GET" and path == "/admin/sessions":
+                return "200 OK", {"sessions": self.sessions.snapshot()}
+            if method == "GET" and path == "/admin/heap":
+                return "200 OK", self.heap.status()
+            if method == "POST" and path == "/admin/heap/start":
+                return "200 OK", self.heap.start(int(params.get("frames", 1)))
+            if method == "POST" and path == "/admin/heap/snapshot":
+                limit = int(params.get("limit", 25))
+                # Collected here, as finalizers of asyncio objects expect the loop's thread;
+                # taking and comparing snapshots of a large heap takes a while
+                gc.collect()
+                return "200 OK", await asyncio.to_thread(self.heap.snapshot, limit)
+            if method == "POST" and path == "/admin/heap/stop":
+                return "200 OK", self.heap.stop()
+        except (RuntimeError, ValueError) as e:
+            return "400 Bad Request", {"error": str(e)}
+        return "404 Not Found", {"error": "Not found"}
+
+    async def respond(self, method, target, headers):
+        """Returns (status, content type, body bytes) for the metrics server."""
+        status, body = await self.handle(method, target, headers)
+        return status, "application/json", json.dumps(body, indent=2).encode("utf-8")
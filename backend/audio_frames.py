@@ -0,0 +1,75 @@
+#
+# Copyright 2025 Amazon.com, Inc. and its affiliates. All Rights Reserved.
+#
+# Licensed under the Amazon Software License (the "License").
+# You may not use this file except in compliance with the License.
+# A copy of the License is located at
+#
+#   http://aws.amazon.com/asl/
+#
+# or in the "license" file accompanying this file. This file is distributed
+# on an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either
+# express or implied. See the License for the specific language governing
+# permissions and limitations under the License.
+#
+
+# audio_frames.py
+"""
+Binary WebSocket audio frames.
+
+Clients that negotiate the AUDIO_SUBPROTOCOL WebSocket sub-protocol send user
+audio as binary frames instead of base64 audioInput JSON events:
+
+    version        uint8   (currently 1)
+    name length    uint8   length of the content name in bytes
+    sequence       uint32  big-endian, incremented for every frame
+    content name   utf-8   the audio contentName
+    payload        raw PCM in the format of the audio contentStart, 16-bit
+                   little-endian unless the client declared otherwise
+
+All other events are still sent as JSON text frames.
+"""
+import struct
+
+AUDIO_SUBPROTOCOL = "nova-s2s.audio.v1"
+AUDIO_FRAME_VERSION = 1
+
+_HEADER = struct.Struct("!BBI")
+
+
+class AudioFrameError(ValueError):
+    """Raised when a binary audio frame cannot be decoded"""
+
+
+def select_subprotocol(connection, subprotocols):
+    """Pick the binary audio sub-protocol when offered, otherwise continue without one."""
+    if AUDIO_SUBPROTOCOL in subprotocols:
+        return AUDIO_SUBPROTOCOL
+    return None
+
+
+def encode_audio_frame(content_name, sequence, pcm):
+    """Build a binary audio frame."""
+    name = content_name.encode("utf-8")
+    return (
+        _HEADER.pack(AUDIO_FRAME_VERSION, len(name), sequence & 0xFFFFFFFF)
+        + name
+        + bytes(pcm)
+    )
+
+
+def decode_audio_frame(frame):
+    """Split a binary audio frame into (content_name, sequence, pcm bytes)."""
+    if len(frame) < _HEADER.size:
+        raise AudioFrameError("Audio frame shorter than its header")
+
+    version, name_length, sequence = _HEADER.unpack_from(frame)
+    if version != AUDIO_FRAME_VERSION:
+        raise AudioFrameError(f"Unsupported audio frame version: {version}")
+
+    payload_start = _HEADER.size + name_length
+    if len(frame) < payload_start:
+        raise AudioFrameError("Audio frame truncated inside the content name")
+
+    content_name = bytes(frame[_HEADER.size:payload_start]).decode("utf-8")
+    return content_name, sequence, frame[payload_start:]
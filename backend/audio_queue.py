@@ -0,0 +1,253 @@
+#
+# Copyright 2025 Amazon.com, Inc. and its affiliates. All Rights Reserved.
+#
+# Licensed under the Amazon Software License (the "License").
+# You may not use this file except in compliance with the License.
+# A copy of the License is located at
+#
+#   http://aws.amazon.com/asl/
+#
+# or in the "license" file accompanying this file. This file is distributed
+# on an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either
+# express or implied. See the License for the specific language governing
+# permissions and limitations under the License.
+#
+
+# audio_queue.py
+import asyncio
+import collections
+import logging
+import time
+
+logger = logging.getLogger(__name__)
+
+POLICY_BLOCK = "block"
+POLICY_DROP_OLDEST = "drop_oldest"
+POLICY_COALESCE = "coalesce"
+POLICIES = (POLICY_BLOCK, POLICY_DROP_OLDEST, POLICY_COALESCE)
+
+
+class AudioChunk:
+    """A single queued piece of raw PCM user audio"""
+
+    __slots__ = ("prompt_name", "content_name", "audio_bytes", "enqueued_at")
+
+    def __init__(self, prompt_name, content_name, audio_bytes):
+        self.prompt_name = prompt_name
+        self.content_name = content_name
+        self.audio_bytes = audio_bytes
+        self.enqueued_at = time.monotonic()
+
+
+class AudioInputQueue(asyncio.Queue):
+    """
+    Bounded queue of user audio chunks waiting to be sent to Bedrock.
+
+    When the queue is full, in chunks or in max_bytes, the configured policy
+    decides what happens:
+    - block: the producer waits until there is room (backpressure on the WebSocket)
+    - drop_oldest: the oldest queued chunks are discarded
+    - coalesce: the new chunk is merged into the newest queued chunk of the same content,
+      while that stays within max_chunk_bytes
+
+    The on_high_water callback is called with True once the depth reaches the
+    high-water mark and with False once it falls back to the low-water mark.
+    """
+
+    def __init__(
+        self,
+        maxsize=256,
+        policy=POLICY_DROP_OLDEST,
+        high_water=0.75,
+        low_water=0.25,
+        max_bytes=None,
+        max_chunk_bytes=None,
+        on_high_water=None,
+    ):
+        if policy not in POLICIES:
+            raise ValueError(f"Unknown audio queue policy: {policy}")
+        super().__init__(maxsize=maxsize)
+        self.policy = policy
+        self.high_water_mark = max(1, int(maxsize * high_water))
+        self.low_water_mark = int(maxsize * low_water)
+        self.max_bytes = max_bytes
+        self.max_chunk_bytes = max_chunk_bytes
+        self.on_high_water = on_high_water
+        self.above_high_water = False
+
+        # Counters
+        self.queued_bytes = 0
+        self.dropped_chunks = 0
+        self.dropped_bytes = 0
+        self.coalesced_chunks = 0
+
+    # asyncio.Queue storage hooks
+    def _init(self, maxsize):
+        self._queue = collections.deque()
+        self._not_empty = asyncio.Event()
+        self._bytes_freed = asyncio.Event()
+
+    def _put(self, item):
+        self._queue.append(item)
+        self.queued_bytes += len(item.audio_bytes)
+        self._not_empty.set()
+
+    def _get(self):
+        item = self._queue.popleft()
+        self.queued_bytes -= len(item.audio_bytes)
+        self._bytes_freed.set()
+        if not self._queue:
+            self._not_empty.clear()
+        return item
+
+    async def put_chunk(self, prompt_name, content_name, audio_bytes):
+        """Queue an audio chunk, applying the overflow policy."""
+        chunk = AudioChunk(prompt_name, content_name, audio_bytes)
+
+        if self.policy == POLICY_BLOCK:
+            # Wait for room in bytes here and in chunks in put(); a chunk larger
+            # than max_bytes still goes into an empty queue
+            while self._queue and self._over_max_bytes(len(audio_bytes)):
+                self._bytes_freed.clear()
+                await self._bytes_freed.wait()
+            await self.put(chunk)
+        else:
+            if not (self.full() and self.policy == POLICY_COALESCE and self._coalesce(chunk)):
+                while self.full():
+                    self._drop_oldest()
+                self.put_nowait(chunk)
+            while self.qsize() > 1 and self._over_max_bytes(0):
+                self._drop_oldest()
+
+        self._check_water_marks()
+
+    def _over_max_bytes(self, incoming):
+        return bool(self.max_bytes) and self.queued_bytes + incoming > self.max_bytes
+
+    def _over_max_chunk_bytes(self, size):
+        return bool(self.max_chunk_bytes) and size > self.max_chunk_bytes
+
+    async def get(self):
+        item = await super().get()
+        self._check_water_marks()
+        return item
+
+    def get_nowait(self):
+        item = super().get_nowait()
+        self._check_water_marks()
+        return item
+
+    async def get_coalesced(self, target_bytes, max_delay):
+        """
+        Get the next chunk, merged with the chunks queued behind it for the same
+        content until target_bytes is reached, without going over max_chunk_bytes.
+
+        Waiting for more audio never goes beyond max_delay seconds after the
+        first chunk was queued, so a backlog is flushed immediately and live
+        audio is held back by at most max_delay.
+        """
+        chunk = await self.get()
+        if not target_bytes or len(chunk.audio_bytes) >= target_bytes:
+            return chunk
+
+        parts = [chunk.audio_bytes]
+        size = len(chunk.audio_bytes)
+        deadline = chunk.enqueued_at + max_delay
+
+        while size < target_bytes:
+            if self.empty():
+                timeout = deadline - time.monotonic()
+                if timeout <= 0:
+                    break
+                try:
+                    await asyncio.wait_for(self._not_empty.wait(), timeout)
+                except asyncio.TimeoutError:
+                    break
+
+            head = self._queue[0]
+            if (
+                head.content_name != chunk.content_name
+                or head.prompt_name != chunk.prompt_name
+                or self._over_max_chunk_bytes(size + len(head.audio_bytes))
+            ):
+                break
+            head = self.get_nowait()
+            parts.append(head.audio_bytes)
+            size += len(head.audio_bytes)
+
+        if len(parts) > 1:
+            chunk.audio_bytes = b"".join(parts)
+            self.coalesced_chunks += len(parts) - 1
+        return chunk
+
+    def _coalesce(self, chunk):
+        """
+        Merge the chunk into the newest queued chunk if it belongs to the same
+        content and the merged chunk stays within max_chunk_bytes.
+        """
+        tail = self._queue[-1]
+        if (
+            tail.content_name != chunk.content_name
+            or tail.prompt_name != chunk.prompt_name
+            or self._over_max_chunk_bytes(len(tail.audio_bytes) + len(chunk.audio_bytes))
+        ):
+            return False
+
+        # Appending to bytes copies the tail every time; a bytearray grows in place
+        if not isinstance(tail.audio_bytes, bytearray):
+            tail.audio_bytes = bytearray(tail.audio_bytes)
+        tail.audio_bytes += chunk.audio_bytes
+        self.queued_bytes += len(chunk.audio_bytes)
+        self.coalesced_chunks += 1
+        return True
+
+    def _drop_oldest(self):
+        dropped = self._get()
+        # A dropped chunk will never be processed, so mark it done for join()
+        if self._unfinished_tasks:
+            self.task_done()
+        self.dropped_chunks += 1
+        self.dropped_bytes += len(dropped.audio_bytes)
+        if self.dropped_chunks == 1 or self.dropped_chunks % 100 == 0:
+            logger.warning(
+                f"Audio input queue full, dropped {self.dropped_chunks} chunks so far"
+            )
+
+    def _check_water_marks(self):
+        depth = self.qsize()
+        if not self.above_high_water and depth >= self.high_water_mark:
+            self.above_high_water = True
+            logger.warning(f"Audio input queue above high-water mark: {depth}")
+            if self.on_high_water:
+                self.on_high_water(True)
+        elif self.above_high_water and depth <= self.low_water_mark:
+            self.above_high_water = False
+            logger.info(f"Audio input queue back below low-water mark: {depth}")
+            if self.on_high_water:
+                self.on_high_water(False)
+
+    def clear(self):
+        """Drop every queued chunk, e.g. when the session closes."""
+        while self._queue:
+            self._get()
+        self._unfinished_tasks = 0
+        self._finished.set()
+
+    def oldest_chunk_age(self):
+        """Age in seconds of the oldest queued chunk, 0 if the queue is empty."""
+        if not self._queue:
+            return 0.0
+        return time.monotonic() - self._queue[0].enqueued_at
+
+    def stats(self):
+        """Return a snapshot of the queue state."""
+        return {
+            "policy": self.policy,
+            "depth": self.qsize(),
+            "maxDepth": self.maxsize,
+            "queuedBytes": self.queued_bytes,
+            "droppedChunks": self.dropped_chunks,
+            "droppedBytes": self.dropped_bytes,
+            "coalescedChunks": self.coalesced_chunks,
+            "oldestChunkAgeMs": int(self.oldest_chunk_age() * 1000),
+        }
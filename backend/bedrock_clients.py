@@ -0,0 +1,157 @@
+#
+# Copyright 2025 Amazon.com, Inc. and its affiliates. All Rights Reserved.
+#
+# Licensed under the Amazon Software License (the "License").
+# You may not use this file except in compliance with the License.
+# A copy of the License is located at
+#
+#   http://aws.amazon.com/asl/
+#
+# or in the "license" file accompanying this file. This file is distributed
+# on an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either
+# express or implied. See the License for the specific language governing
+# permissions and limitations under the License.
+#
+
+# bedrock_clients.py
+import logging
+import os
+import time
+
+from aws_sdk_bedrock_runtime.client import BedrockRuntimeClient
+from aws_sdk_bedrock_runtime.config import (
+    Config,
+    HTTPAuthSchemeResolver,
+    SigV4AuthScheme,
+)
+from smithy_aws_core.credentials_resolvers.environment import (
+    EnvironmentCredentialsResolver,
+)
+
+logger = logging.getLogger(__name__)
+
+# Each client owns its HTTP/2 connection pool, so this caps the bidirectional
+# streams multiplexed over one client's connections
+BEDROCK_MAX_STREAMS_PER_CLIENT = int(os.environ.get("BEDROCK_MAX_STREAMS_PER_CLIENT", 64))
+# Consecutive stream failures after which a client is evicted
+BEDROCK_CLIENT_MAX_FAILURES = int(os.environ.get("BEDROCK_CLIENT_MAX_FAILURES", 3))
+
+
+def default_endpoint(region):
+    return f"https://bedrock-runtime.{region}.amazonaws.com"
+
+
+def create_client(region, endpoint):
+    """Build a Bedrock runtime client for a region and endpoint."""
+    config = Config(
+        endpoint_uri=endpoint,
+        region=region,
+        aws_credentials_identity_resolver=EnvironmentCredentialsResolver(),
+        http_auth_scheme_resolver=HTTPAuthSchemeResolver(),
+        http_auth_schemes={"aws.auth#sigv4": SigV4AuthScheme()},
+    )
+    return BedrockRuntimeClient(config=config)
+
+
+class ClientLease:
+    """A shared client and the streams currently opened through it"""
+
+    __slots__ = ("key", "client", "active_streams", "failures", "healthy", "created_at")
+
+    def __init__(self, key, client):
+        self.key = key
+        self.client = client
+        self.active_streams = 0
+        self.failures = 0
+        self.healthy = True
+        self.created_at = time.monotonic()
+
+
+class BedrockClientRegistry:
+    """
+    Process-wide Bedrock clients keyed by (region, endpoint).
+
+    Sessions share a client, and therefore its credential resolution and HTTP/2
+    connections, until it carries max_streams_per_client streams; then another
+    client is added for the key. A client whose streams fail max_failures times
+    in a row is evicted and no longer handed out.
+    """
+
+    def __init__(self, create_client=create_client, max_streams_per_client=64, max_failures=3):
+        self.create_client = create_client
+        self.max_streams_per_client = max_streams_per_client
+        self.max_failures = max_failures
+        self.clients = {}
+        self.created = 0
+        self.evicted = 0
+
+    def acquire(self, region, endpoint=None):
+        """Lease a client for one stream; pair with release()."""
+        key = (region, endpoint or default_endpoint(region))
+        leases = self.clients.setdefault(key, [])
+
+        candidates = [
+            lease
+            for lease in leases
+            if lease.healthy and lease.active_streams < self.max_streams_per_client
+        ]
+        if candidates:
+            # Fill the least loaded client first
+            lease = min(candidates, key=lambda l: l.active_streams)
+        else:
+            lease = ClientLease(key, self.create_client(*key))
+            leases.append(lease)
+            self.created += 1
+            logger.info(f"Created Bedrock client {len(leases)} for {key[0]}")
+
+        lease.active_streams += 1
+        return lease
+
+    def warm(self, region, endpoint=None):
+        """Build the first client for a key ahead of the first session."""
+        self.release(self.acquire(region, endpoint))
+
+    def release(self, lease, failed=False):
+        """Return a lease once its stream closed, or failed to open."""
+        lease.active_streams = max(lease.active_streams - 1, 0)
+        if failed:
+            self.report_failure(lease)
+        self._maybe_remove(lease)
+
+    def report_success(self, lease):
+        lease.failures = 0
+
+    def report_failure(self, lease):
+        lease.failures += 1
+        if lease.healthy and lease.failures >= self.max_failures:
+            lease.healthy = False
+            self.evicted += 1
+            logger.warning(
+                f"Evicting Bedrock client for {lease.key[0]} after {lease.failures} failures"
+            )
+        self._maybe_remove(lease)
+
+    def _maybe_remove(self, lease):
+        # Unhealthy clients are dropped once their last stream is gone
+        if not lease.healthy and lease.active_streams == 0:
+            leases = self.clients.get(lease.key, [])
+            if lease in leases:
+                leases.remove(lease)
+
+    def stats(self):
+        return {
+            "clients": sum(len(leases) for leases in self.clients.values()),
+            "activeStreams": sum(
+                lease.active_streams
+                for leases in self.clients.values()
+                for lease in leases
+            ),
+            "created": self.created,
+            "evicted": self.evicted,
+        }
+
+
+client_registry = BedrockClientRegistry(
+    max_streams_per_client=BEDROCK_MAX_STREAMS_PER_CLIENT,
+    max_failures=BEDROCK_CLIENT_MAX_FAILURES,
+)
@@ -0,0 +1,115 @@
+#
+# Copyright 2025 Amazon.com, Inc. and its affiliates. All Rights Reserved.
+#
+# Licensed under the Amazon Software License (the "License").
+# You may not use this file except in compliance with the License.
+# A copy of the License is located at
+#
+#   http://aws.amazon.com/asl/
+#
+# or in the "license" file accompanying this file. This file is distributed
+# on an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either
+# express or implied. See the License for the specific language governing
+# permissions and limitations under the License.
+#
+
+# bench_event_codec.py
+# Run from the backend folder: python -m benchmarks.bench_event_codec
+import base64
+import json
+import os
+import timeit
+import uuid
+
+import event_codec
+
+PROMPT_NAME = str(uuid.uuid4())
+CONTENT_NAME = str(uuid.uuid4())
+# One 1024-sample frame of 16-bit PCM
+AUDIO_BASE64 = base64.b64encode(os.urandom(2048)).decode("ascii")
+TOOL_RESULT = json.dumps({"status": "success", "profile": {"name": "Jane", "plan": "Gold"}})
+
+
+def audio_input_dict():
+    """Previous path: build a dict, json.dumps it, encode it."""
+    event = {
+        "event": {
+            "audioInput": {
+                "promptName": PROMPT_NAME,
+                "contentName": CONTENT_NAME,
+                "content": AUDIO_BASE64,
+                "role": "USER",
+            }
+        }
+    }
+    payload = json.dumps(event).encode("utf-8")
+    event_type = list(event.get("event", {}).keys())
+    return payload, event_type
+
+
+def audio_input_template():
+    encoded = event_codec.audio_input_event(PROMPT_NAME, CONTENT_NAME, AUDIO_BASE64)
+    return encoded.payload, encoded.event_type
+
+
+def tool_result_string():
+    """Previous path: dumps to a string, then loads it again to find the event type."""
+    event = {
+        "event": {
+            "toolResult": {
+                "promptName": PROMPT_NAME,
+                "contentName": CONTENT_NAME,
+                "content": TOOL_RESULT,
+                "status": "success",
+            }
+        }
+    }
+    event_json = json.dumps(event)
+    payload = event_json.encode("utf-8")
+    event_type = list(json.loads(event_json).get("event", {}).keys())
+    return payload, event_type
+
+
+def tool_result_template():
+    encoded = event_codec.tool_result_event(PROMPT_NAME, CONTENT_NAME, TOOL_RESULT)
+    return encoded.payload, encoded.event_type
+
+
+def content_end_dict():
+    event = {"event": {"contentEnd": {"promptName": PROMPT_NAME, "contentName": CONTENT_NAME}}}
+    event_json = json.dumps(event)
+    event_type = list(json.loads(event_json).get("event", {}).keys())
+    return event_json.encode("utf-8"), event_type
+
+
+def content_end_template():
+    encoded = event_codec.content_end_event(PROMPT_NAME, CONTENT_NAME)
+    return encoded.payload, encoded.event_type
+
+
+def bench(name, func, number):
+    seconds = min(timeit.repeat(func, number=number, repeat=5))
+    per_call_us = seconds / number * 1e6
+    print(f"{name:<28} {per_call_us:8.2f} us/event")
+    return per_call_us
+
+
+def main():
+    # Sanity check: the templates must produce the same JSON as the dict path
+    assert json.loads(audio_input_template()[0]) == json.loads(audio_input_dict()[0])
+    assert json.loads(tool_result_template()[0]) == json.loads(tool_result_string()[0])
+    assert json.loads(content_end_template()[0]) == json.loads(content_end_dict()[0])
+
+    number = 20000
+    for label, before, after in (
+        ("audioInput", audio_input_dict, audio_input_template),
+        ("toolResult", tool_result_string, tool_result_template),
+        ("contentEnd", content_end_dict, content_end_template),
+    ):
+        old = bench(f"{label} (json.dumps)", before, number)
+        new = bench(f"{label} (template)", after, number)
+        print(f"{label:<28} {old / new:8.2f}x faster\n")
+
+
+if __name__ == "__main__":
+    main()
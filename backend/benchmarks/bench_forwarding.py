@@ -0,0 +1,92 @@
+#
+# Copyright 2025 Amazon.com, Inc. and its affiliates. All Rights Reserved.
+#
+# Licensed under the Amazon Software License (the "License").
+# You may not use this file except in compliance with the License.
+# A copy of the License is located at
+#
+#   http://aws.amazon.com/asl/
+#
+# or in the "license" file accompanying this file. This file is distributed
+# on an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either
+# express or implied. See the License for the specific language governing
+# permissions and limitations under the License.
+#
+
+# bench_forwarding.py
+# CPU spent forwarding one minute of assistant audio from Bedrock to the
+# WebSocket: parse and re-serialize (previous path) versus raw passthrough.
+# Run from the backend folder: python -m benchmarks.bench_forwarding
+import argparse
+import base64
+import json
+import os
+import time
+import uuid
+
+import event_codec
+
+OUTPUT_SAMPLE_RATE = 24000
+
+
+def audio_output_events(seconds, chunk_ms):
+    """Bedrock audioOutput payloads covering the given duration."""
+    chunk_bytes = OUTPUT_SAMPLE_RATE * 2 * chunk_ms // 1000
+    content_id = str(uuid.uuid4())
+    payload = json.dumps(
+        {
+            "event": {
+                "audioOutput": {
+                    "content": base64.b64encode(os.urandom(chunk_bytes)).decode("ascii"),
+                    "contentId": content_id,
+                    "promptName": str(uuid.uuid4()),
+                    "role": "ASSISTANT",
+                    "sessionId": str(uuid.uuid4()),
+                }
+            }
+        }
+    ).encode("utf-8")
+    return [payload] * (seconds * 1000 // chunk_ms)
+
+
+def forward_parsed(payload):
+    """Previous path: decode, json.loads, queue the dict, json.dumps, encode for the socket."""
+    json_data = json.loads(payload.decode("utf-8"))
+    return json.dumps(json_data).encode("utf-8")
+
+
+def forward_passthrough(payload):
+    """Current path: peek the event name and send the original bytes."""
+    event_codec.peek_event_type(payload)
+    return payload
+
+
+def cpu_ms(func, events, repeat=5):
+    best = None
+    for _ in range(repeat):
+        started = time.process_time()
+        for payload in events:
+            func(payload)
+        elapsed = time.process_time() - started
+        best = elapsed if best is None else min(best, elapsed)
+    return best * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--chunk-ms", type=int, default=100, help="audio per audioOutput event")
+    args = parser.parse_args()
+
+    events = audio_output_events(60, args.chunk_ms)
+    megabytes = sum(len(e) for e in events) / 1e6
+    print(f"{len(events)} audioOutput events, {megabytes:.1f} MB per session-minute")
+
+    parsed = cpu_ms(forward_parsed, events)
+    passthrough = cpu_ms(forward_passthrough, events)
+    print(f"parse + re-serialize  {parsed:8.2f} ms CPU per session-minute")
+    print(f"raw passthrough       {passthrough:8.2f} ms CPU per session-minute")
+    print(f"saved                 {parsed - passthrough:8.2f} ms CPU per session-minute")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,178 @@
+#
+# Copyright 2025 Amazon.com, Inc. and its affiliates. All Rights Reserved.
+#
+# Licensed under the Amazon Software License (the "License").
+# You may not use this file except in compliance with the License.
+# A copy of the License is located at
+#
+#   http://aws.amazon.com/asl/
+#
+# or in the "license" file accompanying this file. This file is distributed
+# on an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either
+# express or implied. See the License for the specific language governing
+# permissions and limitations under the License.
+#
+
+# bench_json_codec.py
+# Compares the JSON backends of json_codec on the events of one session-minute,
+# and the event loops of event_loop on a queue and socket round-trip workload.
+# Backends that are not installed are skipped.
+# Run from the backend folder: python -m benchmarks.bench_json_codec
+import argparse
+import asyncio
+import base64
+import os
+import socket
+import time
+import uuid
+
+import event_codec
+import event_loop
+import json_codec
+
+PROMPT_NAME = str(uuid.uuid4())
+CONTENT_NAME = str(uuid.uuid4())
+
+
+def session_minute_events(chunk_ms):
+    """
+    The JSON work of one session-minute: client control events and audio
+    frames parsed in websocket_handler, Bedrock text events parsed in
+    _process_responses, and events serialized by send_raw_event and forward_responses.
+    """
+    audio = base64.b64encode(os.urandom(16000 * 2 * chunk_ms // 1000)).decode("ascii")
+    client_audio = json_codec.dumps(
+        {
+            "event": {
+                "audioInput": {
+                    "promptName": PROMPT_NAME,
+                    "contentName": CONTENT_NAME,
+                    "content": audio,
+                    "role": "USER",
+                }
+            }
+        }
+    )
+    text_output = json_codec.dumps_bytes(
+        {
+            "event": {
+                "textOutput": {
+                    "content": "Sure, your order shipped yesterday and should arrive on Friday.",
+                    "contentId": str(uuid.uuid4()),
+                    "promptName": PROMPT_NAME,
+                    "role": "ASSISTANT",
+                    "sessionId": str(uuid.uuid4()),
+                }
+            }
+        }
+    )
+    tool_result = {"status": "success", "order": {"id": "1234", "items": [{"sku": "A1", "qty": 2}] * 5}}
+    content_start = {
+        "event": {
+            "contentStart": {
+                "promptName": PROMPT_NAME,
+                "contentName": CONTENT_NAME,
+                "type": "TEXT",
+                "interactive": True,
+                "role": "SYSTEM",
+                "textInputConfiguration": {"mediaType": "text/plain"},
+            }
+        }
+    }
+    frames = 60 * 1000 // chunk_ms
+    return {
+        "loads": [client_audio] * frames + [text_output] * 60,
+        "dumps": [tool_result] * 10 + [content_start] * 60,
+        "dumps_bytes": [content_start] * 60 + [tool_result] * 10,
+    }
+
+
+def cpu_ms(events, repeat=5):
+    best = None
+    for _ in range(repeat):
+        started = time.process_time()
+        for name, values in events.items():
+            func = getattr(json_codec, name)
+            for value in values:
+                func(value)
+        # The hot-path templates go through the codec too
+        for _ in range(60):
+            event_codec.encode_event({"event": {"promptEnd": {"promptName": PROMPT_NAME}}})
+        elapsed = time.process_time() - started
+        best = elapsed if best is None else min(best, elapsed)
+    return best * 1000
+
+
+async def round_trips(count):
+    """Queue hand-offs and socket round-trips, like audio flowing through a session."""
+    queue = asyncio.Queue()
+    left, right = socket.socketpair()
+    reader, writer = await asyncio.open_connection(sock=left)
+    echo_reader, echo_writer = await asyncio.open_connection(sock=right)
+
+    async def echo():
+        while True:
+            data = await echo_reader.read(4096)
+            if not data:
+                break
+            echo_writer.write(data)
+            await echo_writer.drain()
+
+    async def consume():
+        for _ in range(count):
+            message = await queue.get()
+            writer.write(message)
+            await writer.drain()
+            await reader.readexactly(len(message))
+
+    echo_task = asyncio.create_task(echo())
+    consumer = asyncio.create_task(consume())
+    message = os.urandom(1024)
+    for _ in range(count):
+        queue.put_nowait(message)
+        await asyncio.sleep(0)
+    await consumer
+    writer.close()
+    await echo_task
+    echo_writer.close()
+
+
+def loop_ms(name, count):
+    loop_factory, selected = event_loop.select_loop_factory(name)
+    if selected != name:
+        return None
+    started = time.perf_counter()
+    with asyncio.Runner(loop_factory=loop_factory) as runner:
+        runner.run(round_trips(count))
+    return (time.perf_counter() - started) * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--chunk-ms", type=int, default=32, help="audio per client frame")
+    parser.add_argument("--round-trips", type=int, default=20000)
+    args = parser.parse_args()
+
+    events = session_minute_events(args.chunk_ms)
+    print(f"JSON work of one session-minute with {args.chunk_ms} ms client frames")
+    results = {}
+    for backend in ("json", "orjson"):
+        if json_codec.use_backend(backend) != backend:
+            print(f"{backend:<10} not installed")
+            continue
+        results[backend] = cpu_ms(events)
+        print(f"{backend:<10} {results[backend]:8.2f} ms CPU per session-minute")
+    if len(results) == 2:
+        print(f"{'saved':<10} {results['json'] - results['orjson']:8.2f} ms CPU per session-minute")
+
+    print(f"\n{args.round_trips} queue hand-offs and 1 KB socket round-trips")
+    for name in ("asyncio", "uvloop"):
+        elapsed = loop_ms(name, args.round_trips)
+        if elapsed is None:
+            print(f"{name:<10} not installed")
+        else:
+            print(f"{name:<10} {elapsed:8.1f} ms, {elapsed * 1000 / args.round_trips:6.1f} us per round-trip")
+
+
+if __name__ == "__main__":
+    main()
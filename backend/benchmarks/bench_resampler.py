@@ -0,0 +1,233 @@
+#
+# Copyright 2025 Amazon.com, Inc. and its affiliates. All Rights Reserved.
+#
+# Licensed under the Amazon Software License (the "License").
+# You may not use this file except in compliance with the License.
+# A copy of the License is located at
+#
+#   http://aws.amazon.com/asl/
+#
+# or in the "license" file accompanying this file. This file is distributed
+# on an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either
+# express or implied. See the License for the specific language governing
+# permissions and limitations under the License.
+#
+
+# bench_resampler.py
+# Throughput of the streaming polyphase resampler per CPU core, and its
+# quality. The quality checks measure the output independently of the filter
+# taps: the gain of tones across the passband, their purity (what is left once
+# the tone is fitted out: images, aliases, noise) and the attenuation of tones
+# above 8 kHz; with scipy installed, the passband gains are also compared with
+# scipy.signal.resample_poly. Separately, a self-consistency check compares the
+# streaming output with a direct convolution using the same taps.
+# Exits with status 1 when a quality check fails; --check runs only the
+# quality checks, e.g. in CI.
+# Run from the backend folder: python -m benchmarks.bench_resampler [--check]
+import argparse
+import sys
+import time
+
+import numpy as np
+
+from resampler import FORMAT_FLOAT32, FORMAT_INT16, PolyphaseResampler, design_filter
+
+try:
+    from scipy.signal import resample_poly
+except ImportError:
+    resample_poly = None
+
+OUTPUT_RATE = 16000
+FRAME_SAMPLES = 1024  # What the frontend sends per frame
+AMPLITUDE = 10000
+
+# Quality thresholds
+MAX_PASSBAND_RIPPLE_DB = 0.05  # Gain of passband tones, off 0 dB
+MIN_TONE_PURITY_DB = 70  # Passband tone versus everything else in the output
+MIN_STOPBAND_DB = 60  # Attenuation of tones above the output Nyquist frequency
+MAX_SCIPY_GAIN_DIFF_DB = 0.1  # Passband gains versus scipy.signal.resample_poly
+MIN_SELF_MATCH_DB = 80  # Streaming output versus the direct convolution with the same taps
+
+
+def tone(rate, frequency, seconds, amplitude=AMPLITUDE):
+    t = np.arange(int(rate * seconds)) / rate
+    return amplitude * np.sin(2 * np.pi * frequency * t)
+
+
+def stream(resampler, samples, input_format=FORMAT_INT16):
+    dtype = "<f4" if input_format == FORMAT_FLOAT32 else "<i2"
+    scale = 1 / 32768 if input_format == FORMAT_FLOAT32 else 1
+    pcm = (samples * scale).astype(dtype)
+    output = b"".join(
+        resampler.process(pcm[start : start + FRAME_SAMPLES].tobytes())
+        for start in range(0, len(pcm), FRAME_SAMPLES)
+    )
+    return np.frombuffer(output, dtype="<i2").astype(np.float64)
+
+
+def passband_tones(input_rate):
+    """Tones the resampler must pass unchanged: up to 3/4 of the lower Nyquist frequency."""
+    edge = 0.75 * min(input_rate, OUTPUT_RATE) / 2
+    return [f for f in (100, 1000, 2000, 3000, 4000, 5000, 6000) if f <= edge]
+
+
+def stopband_tones(input_rate):
+    """Tones between 1.1 times the output Nyquist frequency and the input's, which must be filtered out."""
+    low, high = 1.1 * OUTPUT_RATE / 2, 0.95 * input_rate / 2
+    return [f for f in (low, (low + high) / 2, high) if low <= high]
+
+
+def settled(output):
+    # Leave out the filter's start and end
+    return output[OUTPUT_RATE // 8 : len(output) - OUTPUT_RATE // 8]
+
+
+def fit_tone(output, frequency):
+    """Amplitude of the tone at frequency in output, and the RMS of the rest."""
+    t = np.arange(len(output)) / OUTPUT_RATE
+    basis = np.stack(
+        [np.sin(2 * np.pi * frequency * t), np.cos(2 * np.pi * frequency * t), np.ones(len(t))], axis=1
+    )
+    coefficients, *_ = np.linalg.lstsq(basis, output, rcond=None)
+    rest = output - basis @ coefficients
+    return np.hypot(coefficients[0], coefficients[1]), np.sqrt(np.mean(rest**2))
+
+
+def ratio_db(signal_rms, error_rms):
+    # Errors are floored at the rounding noise of 16-bit output
+    return 20 * np.log10(signal_rms / max(error_rms, np.sqrt(1 / 12)))
+
+
+def check_quality(input_rate, input_format=FORMAT_INT16):
+    """
+    Returns the worst passband gain error, tone purity and stopband attenuation
+    in dB, and the largest passband gain difference to scipy (None without scipy).
+    """
+    ripple, purity, stopband, scipy_diff = 0.0, None, None, None
+    for frequency in passband_tones(input_rate):
+        samples = np.round(tone(input_rate, frequency, 1))
+        output = stream(PolyphaseResampler(input_rate, OUTPUT_RATE, input_format), samples, input_format)
+        amplitude, rest = fit_tone(settled(output), frequency)
+        gain = 20 * np.log10(amplitude / AMPLITUDE)
+        ripple = max(ripple, abs(gain))
+        tone_purity = ratio_db(amplitude / np.sqrt(2), rest)
+        purity = tone_purity if purity is None else min(purity, tone_purity)
+
+        if resample_poly is not None:
+            resampler = PolyphaseResampler(input_rate, OUTPUT_RATE)
+            scipy_amplitude, _ = fit_tone(settled(resample_poly(samples, resampler.up, resampler.down)), frequency)
+            diff = abs(gain - 20 * np.log10(scipy_amplitude / AMPLITUDE))
+            scipy_diff = diff if scipy_diff is None else max(scipy_diff, diff)
+
+    for frequency in stopband_tones(input_rate):
+        output = stream(
+            PolyphaseResampler(input_rate, OUTPUT_RATE, input_format),
+            np.round(tone(input_rate, frequency, 1)),
+            input_format,
+        )
+        leaked = np.sqrt(np.mean(settled(output) ** 2))
+        attenuation = ratio_db(AMPLITUDE / np.sqrt(2), leaked)
+        stopband = attenuation if stopband is None else min(stopband, attenuation)
+    return ripple, purity, stopband, scipy_diff
+
+
+def direct_reference(samples, input_rate):
+    """
+    Upsample with zeros, convolve with the whole prototype filter, decimate.
+    The convolution is only evaluated at the samples decimation keeps, where
+    y[n] = sum over j of x[j] * taps[n * down - j * up].
+    """
+    resampler = PolyphaseResampler(input_rate, OUTPUT_RATE)
+    up, down = resampler.up, resampler.down
+    _, taps = design_filter(up, down)
+    samples = np.round(samples)
+
+    positions = np.arange(len(samples) * up // down) * down
+    # Every input sample the filter reaches from each output position
+    inputs = positions[:, None] // up - np.arange(-(-len(taps) // up))
+    offsets = positions[:, None] - inputs * up
+    valid = (inputs >= 0) & (offsets < len(taps))
+    weights = np.where(valid, taps[np.minimum(offsets, len(taps) - 1)], 0.0)
+    return np.einsum("nk,nk->n", weights, samples[np.maximum(inputs, 0)])
+
+
+def check_self_consistency(input_rate, input_format=FORMAT_INT16):
+    """
+    Streaming output versus the direct convolution with the same taps, in dB.
+    Shows that framing and filter state are right, not that the filter is.
+    """
+    samples = tone(input_rate, 1000, 2)
+    output = stream(PolyphaseResampler(input_rate, OUTPUT_RATE, input_format), np.round(samples), input_format)
+    reference = direct_reference(samples, input_rate)[: len(output)]
+    error = output - np.clip(np.rint(reference), -32768, 32767)
+    return ratio_db(np.sqrt(np.mean(reference**2)), np.sqrt(np.mean(error**2)))
+
+
+def throughput(input_rate, input_format, seconds=20):
+    """Seconds of audio resampled per CPU second, streamed frame by frame."""
+    samples = np.round(tone(input_rate, 440, seconds))
+    best = None
+    for _ in range(3):
+        resampler = PolyphaseResampler(input_rate, OUTPUT_RATE, input_format)
+        started = time.process_time()
+        stream(resampler, samples, input_format)
+        elapsed = time.process_time() - started
+        best = elapsed if best is None else min(best, elapsed)
+    return seconds / best
+
+
+def quality_failures(name, ripple, purity, stopband, scipy_diff, self_match):
+    failures = []
+    if ripple > MAX_PASSBAND_RIPPLE_DB:
+        failures.append(f"{name}: passband gain off by {ripple:.3f} dB, above {MAX_PASSBAND_RIPPLE_DB} dB")
+    if purity < MIN_TONE_PURITY_DB:
+        failures.append(f"{name}: tone purity {purity:.1f} dB below {MIN_TONE_PURITY_DB} dB")
+    if stopband is not None and stopband < MIN_STOPBAND_DB:
+        failures.append(f"{name}: stopband {stopband:.1f} dB below {MIN_STOPBAND_DB} dB")
+    if scipy_diff is not None and scipy_diff > MAX_SCIPY_GAIN_DIFF_DB:
+        failures.append(f"{name}: passband gain {scipy_diff:.3f} dB off scipy, above {MAX_SCIPY_GAIN_DIFF_DB} dB")
+    if self_match < MIN_SELF_MATCH_DB:
+        failures.append(f"{name}: self-consistency {self_match:.1f} dB below {MIN_SELF_MATCH_DB} dB")
+    return failures
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rates", type=int, nargs="+", default=[8000, 24000, 44100, 48000])
+    parser.add_argument(
+        "--check", action="store_true", help="Only run the quality checks, skipping the throughput"
+    )
+    args = parser.parse_args()
+
+    if resample_poly is None:
+        print("scipy is not installed, skipping the comparison with scipy.signal.resample_poly")
+    failures = []
+    print(
+        f"{'rate':>6} {'format':>7} {'x realtime/core':>16} {'passband':>9} {'purity':>7} "
+        f"{'stopband':>9} {'vs scipy':>9} {'self-consistency':>17}"
+    )
+    for rate in args.rates:
+        for input_format in (FORMAT_INT16, FORMAT_FLOAT32):
+            format_name = "int16" if input_format == FORMAT_INT16 else "float32"
+            ripple, purity, stopband, scipy_diff = check_quality(rate, input_format)
+            self_match = check_self_consistency(rate, input_format)
+            failures += quality_failures(
+                f"{rate} Hz {format_name}", ripple, purity, stopband, scipy_diff, self_match
+            )
+            speed = "-" if args.check else f"{throughput(rate, input_format):.0f}"
+            print(
+                f"{rate:>6} {format_name:>7} {speed:>16} {ripple:>7.3f}dB {purity:>5.1f}dB "
+                f"{('-' if stopband is None else f'{stopband:.1f}dB'):>9} "
+                f"{('-' if scipy_diff is None else f'{scipy_diff:.3f}dB'):>9} {self_match:>15.1f}dB"
+            )
+
+    if failures:
+        print("Quality checks failed:")
+        for failure in failures:
+            print(f"  {failure}")
+        sys.exit(1)
+    print("Quality checks passed")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,73 @@
+#
+# Copyright 2025 Amazon.com, Inc. and its affiliates. All Rights Reserved.
+#
+# Licensed under the Amazon Software License (the "License").
+# You may not use this file except in compliance with the License.
+# A copy of the License is located at
+#
+#   http://aws.amazon.com/asl/
+#
+# or in the "license" file accompanying this file. This file is distributed
+# on an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either
+# express or implied. See the License for the specific language governing
+# permissions and limitations under the License.
+#
+
+# bench_session_setup.py
+# Measures Bedrock session setup time at N concurrent sessions, with clients
+# shared through the registry versus one client per session.
+# Needs AWS credentials in the environment, like the backend itself.
+# Run from the backend folder: python -m benchmarks.bench_session_setup --sessions 1 10 50
+import argparse
+import asyncio
+import statistics
+import time
+
+import bedrock_clients
+from nova_s2s_backend import BEDROCK_REGION, MODEL_ID, BedrockStreamManager
+
+
+async def open_session():
+    manager = BedrockStreamManager(model_id=MODEL_ID, region=BEDROCK_REGION)
+    started = time.perf_counter()
+    await manager.initialize_stream()
+    return manager, time.perf_counter() - started
+
+
+async def run(sessions, shared):
+    # One stream per client reproduces the previous client-per-session setup
+    bedrock_clients.client_registry = bedrock_clients.BedrockClientRegistry(
+        max_streams_per_client=bedrock_clients.BEDROCK_MAX_STREAMS_PER_CLIENT if shared else 1
+    )
+    # nova_s2s_backend imported the registry by name
+    import nova_s2s_backend
+    nova_s2s_backend.client_registry = bedrock_clients.client_registry
+
+    started = time.perf_counter()
+    results = await asyncio.gather(*(open_session() for _ in range(sessions)))
+    wall = time.perf_counter() - started
+
+    setup_times = sorted(duration for _, duration in results)
+    await asyncio.gather(*(manager.close() for manager, _ in results))
+
+    p95 = setup_times[max(int(len(setup_times) * 0.95) - 1, 0)]
+    print(
+        f"{'shared' if shared else 'per-session':<12} sessions={sessions:<5} "
+        f"p50={statistics.median(setup_times) * 1000:7.1f} ms "
+        f"p95={p95 * 1000:7.1f} ms wall={wall * 1000:7.1f} ms "
+        f"clients={bedrock_clients.client_registry.created}"
+    )
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--sessions", type=int, nargs="+", default=[1, 10, 50])
+    args = parser.parse_args()
+
+    for sessions in args.sessions:
+        for shared in (False, True):
+            await run(sessions, shared)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,80 @@
+#
+# Copyright 2025 Amazon.com, Inc. and its affiliates. All Rights Reserved.
+#
+# Licensed under the Amazon Software License (the "License").
+# You may not use this file except in compliance with the License.
+# A copy of the License is located at
+#
+#   http://aws.amazon.com/asl/
+#
+# or in the "license" file accompanying this file. This file is distributed
+# on an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either
+# express or implied. See the License for the specific language governing
+# permissions and limitations under the License.
+#
+
+# bench_vad.py
+# CPU cost of the voice activity gate per session-minute and the share of user
+# audio it keeps from Bedrock, on a synthetic call: the caller speaks for
+# --speech-ms, then listens in background noise for --silence-ms, repeatedly.
+# Run from the backend folder: python -m benchmarks.bench_vad
+import argparse
+import time
+
+import numpy as np
+
+from vad import VadConfig, VoiceActivityGate
+
+SAMPLE_RATE = 16000
+FRAME_SAMPLES = 1024  # What the frontend sends per frame
+
+
+def synthetic_call(seconds, speech_ms, silence_ms, noise_db, seed=0):
+    """Frames of a call alternating between voiced speech and background noise."""
+    rng = np.random.default_rng(seed)
+    total = int(seconds * SAMPLE_RATE)
+    t = np.arange(total) / SAMPLE_RATE
+    # Voiced speech: harmonics of a wandering pitch, amplitude modulated by syllables
+    pitch = 140 + 30 * np.sin(2 * np.pi * 0.7 * t)
+    phase = 2 * np.pi * np.cumsum(pitch) / SAMPLE_RATE
+    voiced = sum(np.sin(k * phase) / k for k in range(1, 6))
+    syllables = 0.5 + 0.5 * np.abs(np.sin(2 * np.pi * 3 * t))
+    speech = 8000 * voiced * syllables
+
+    period = (speech_ms + silence_ms) * SAMPLE_RATE // 1000
+    speaking = (np.arange(total) % period) < speech_ms * SAMPLE_RATE // 1000
+    noise = rng.normal(0, 32768 * 10 ** (noise_db / 20), total)
+    pcm = np.clip(np.where(speaking, speech, 0) + noise, -32768, 32767).astype("<i2")
+    return [
+        pcm[start : start + FRAME_SAMPLES].tobytes()
+        for start in range(0, total - FRAME_SAMPLES + 1, FRAME_SAMPLES)
+    ]
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--speech-ms", type=int, default=4000)
+    parser.add_argument("--silence-ms", type=int, default=8000)
+    parser.add_argument("--noise-db", type=float, default=-60, help="background noise level in dBFS")
+    args = parser.parse_args()
+
+    frames = synthetic_call(60, args.speech_ms, args.silence_ms, args.noise_db)
+    best = None
+    for _ in range(5):
+        gate = VoiceActivityGate(VadConfig())
+        started = time.process_time()
+        for frame in frames:
+            gate.process(frame, SAMPLE_RATE)
+        elapsed = time.process_time() - started
+        best = elapsed if best is None else min(best, elapsed)
+
+    stats = gate.stats()
+    print(f"{len(frames)} frames of {FRAME_SAMPLES} samples, noise at {args.noise_db:g} dBFS")
+    print(f"gate CPU           {best * 1000:8.2f} ms per session-minute")
+    print(f"forwarded          {stats['forwardedBytes'] / 1024:8.0f} KB")
+    print(f"suppressed         {stats['suppressedBytes'] / 1024:8.0f} KB ({stats['suppressedRatio']:.0%})")
+    print(f"keep-alive frames  {stats['keepaliveFrames']:8d}")
+
+
+if __name__ == "__main__":
+    main()
@@ -62,11 +62,11 @@ def extract_token_from_url(path):
     - /?token={token}
     """
     try:
-        logger.info(f"Extracting token from path: {path}")
+        logger.debug(f"Extracting token from path: {path}")
 
         # Split path by '/' and look for a JWT-like token
         parts = path.strip("/").split("/")
-        logger.info(f"Path parts: {parts}")
+        logger.debug(f"Path parts: {parts}")
 
         # Check all parts of the path for a JWT-like token
         for part in parts:
@@ -74,7 +74,7 @@ def extract_token_from_url(path):
             if (
                 "." in part and len(part) > 50
             ):  # JWTs typically contain dots and are long
-                logger.info(
+                logger.debug(
                     f"Found token in path part (first 10 chars): {part[:10]}..."
                 )
                 return part
@@ -93,16 +93,16 @@ def extract_token_from_url(path):
                 # Handle if it's already a full URL
                 parsed_url = urlparse(path)
 
-            logger.info(
+            logger.debug(
                 f"Parsed components: path={parsed_url.path}, query={parsed_url.query}"
             )
 
             query_params = parse_qs(parsed_url.query)
-            logger.info(f"Query parameters: {query_params}")
+            logger.debug(f"Query parameters: {query_params}")
 
             if "token" in query_params:
                 token = query_params["token"][0]
-                logger.info(
+                logger.debug(
                     f"Found token in query params (first 10 chars): {token[:10]}..."
                 )
                 return token
@@ -111,7 +111,7 @@ def extract_token_from_url(path):
             token_match = re.search(r"token=([^&]+)", path)
             if token_match:
                 token = token_match.group(1)
-                logger.info(f"Found token via regex (first 10 chars): {token[:10]}...")
+                logger.debug(f"Found token via regex (first 10 chars): {token[:10]}...")
                 return token
 
         logger.warning(f"No token found in path: {path}")
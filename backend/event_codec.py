@@ -0,0 +1,137 @@
+#
+# Copyright 2025 Amazon.com, Inc. and its affiliates. All Rights Reserved.
+#
+# Licensed under the Amazon Software License (the "License").
+# You may not use this file except in compliance with the License.
+# A copy of the License is located at
+#
+#   http://aws.amazon.com/asl/
+#
+# or in the "license" file accompanying this file. This file is distributed
+# on an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either
+# express or implied. See the License for the specific language governing
+# permissions and limitations under the License.
+#
+
+# event_codec.py
+import re
+from functools import lru_cache
+
+import json_codec
+
+
+class EncodedEvent:
+    """A serialized Bedrock input event together with its event type"""
+
+    __slots__ = ("event_type", "payload")
+
+    def __init__(self, event_type, payload):
+        self.event_type = event_type
+        self.payload = payload
+
+    def __len__(self):
+        return len(self.payload)
+
+
+def _quote(value):
+    """JSON encode a string value as bytes."""
+    return json_codec.dumps_bytes(value)
+
+
+def encode_event(event_data):
+    """Serialize an event dict once, keeping its type alongside the bytes."""
+    event_type = next(iter(event_data.get("event", {})), None)
+    return EncodedEvent(event_type, json_codec.dumps_bytes(event_data))
+
+
+def encode_raw_event(event_type, event_json):
+    """Wrap an already serialized event (str or bytes) without parsing it again."""
+    if isinstance(event_json, str):
+        event_json = event_json.encode("utf-8")
+    return EncodedEvent(event_type, event_json)
+
+
+# Precompiled templates for the events sent on the hot path
+_AUDIO_INPUT_PREFIX = b'{"event":{"audioInput":{"promptName":%s,"contentName":%s,"role":"USER","content":"'
+_AUDIO_INPUT_SUFFIX = b'"}}}'
+_TOOL_CONTENT_START = (
+    b'{"event":{"contentStart":{"interactive":true,"promptName":%s,"contentName":%s,'
+    b'"type":"TOOL","role":"TOOL","toolResultInputConfiguration":{"toolUseId":%s,'
+    b'"type":"TEXT","textInputConfiguration":{"mediaType":"text/plain"}}}}}'
+)
+_TOOL_RESULT = (
+    b'{"event":{"toolResult":{"promptName":%s,"contentName":%s,"content":%s,"status":%s}}}'
+)
+_CONTENT_END = b'{"event":{"contentEnd":{"promptName":%s,"contentName":%s}}}'
+
+
+@lru_cache(maxsize=256)
+def _audio_input_prefix(prompt_name, content_name):
+    # The names only change once per audio content, so the prefix is reused
+    return _AUDIO_INPUT_PREFIX % (_quote(prompt_name), _quote(content_name))
+
+
+def audio_input_event(prompt_name, content_name, audio_base64):
+    """Build an audioInput event around base64 audio (bytes or ASCII str)."""
+    if isinstance(audio_base64, str):
+        audio_base64 = audio_base64.encode("ascii")
+    return EncodedEvent(
+        "audioInput",
+        b"".join(
+            (_audio_input_prefix(prompt_name, content_name), audio_base64, _AUDIO_INPUT_SUFFIX)
+        ),
+    )
+
+
+def tool_content_start_event(prompt_name, content_name, tool_use_id):
+    """Build the contentStart event that opens a tool result."""
+    return EncodedEvent(
+        "contentStart",
+        _TOOL_CONTENT_START
+        % (_quote(prompt_name), _quote(content_name), _quote(tool_use_id)),
+    )
+
+
+def tool_result_event(prompt_name, content_name, content, status="success"):
+    """Build a toolResult event; content is the result already rendered as a string."""
+    return EncodedEvent(
+        "toolResult",
+        _TOOL_RESULT
+        % (_quote(prompt_name), _quote(content_name), _quote(content), _quote(status)),
+    )
+
+
+def content_end_event(prompt_name, content_name):
+    """Build a contentEnd event."""
+    return EncodedEvent(
+        "contentEnd", _CONTENT_END % (_quote(prompt_name), _quote(content_name))
+    )
+
+
+# Matches the start of a Bedrock event, e.g. {"event":{"audioOutput":
+_EVENT_TYPE_PATTERN = re.compile(rb'\s*\{\s*"event"\s*:\s*\{\s*"([A-Za-z]+)"')
+
+
+def peek_event_type(payload):
+    """Return the top-level event name of a serialized event without parsing it, or None."""
+    match = _EVENT_TYPE_PATTERN.match(payload)
+    return match.group(1).decode("ascii") if match else None
+
+
+_STRING_VALUE_PATTERN = re.compile(rb'\s*:\s*"([^"\\]*)"')
+
+
+def peek_string_field(payload, name):
+    """
+    Return the value of a plain string field of a serialized event without parsing it.
+
+    The field is searched from the end of the payload, where the identifiers
+    follow the large content value in Bedrock output events. Returns None if
+    the field is missing or not a simple string.
+    """
+    key = b'"' + name.encode("ascii") + b'"'
+    index = payload.rfind(key)
+    if index < 0:
+        return None
+    match = _STRING_VALUE_PATTERN.match(payload, index + len(key))
+    return match.group(1).decode("utf-8") if match else None
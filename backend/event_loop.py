@@ -0,0 +1,52 @@
+#
+# Copyright 2025 Amazon.com, Inc. and its affiliates. All Rights Reserved.
+#
+# Licensed under the Amazon Software License (the "License").
+# You may not use this file except in compliance with the License.
+# A copy of the License is located at
+#
+#   http://aws.amazon.com/asl/
+#
+# or in the "license" file accompanying this file. This file is distributed
+# on an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either
+# express or implied. See the License for the specific language governing
+# permissions and limitations under the License.
+#
+
+# event_loop.py
+# Runs the backend on uvloop when it is installed, on the default asyncio
+# event loop otherwise.
+import asyncio
+import logging
+
+try:
+    import uvloop
+except ImportError:
+    uvloop = None
+
+logger = logging.getLogger(__name__)
+
+
+def select_loop_factory(name="auto"):
+    """
+    Return (loop factory, name) for "uvloop", "asyncio", or "auto" for uvloop
+    when it is installed. Falls back to asyncio when uvloop is requested but missing.
+    """
+    name = (name or "auto").lower()
+    if name not in ("auto", "uvloop", "asyncio"):
+        logger.warning(f"Unknown event loop {name}, using auto")
+        name = "auto"
+    if name == "uvloop" and uvloop is None:
+        logger.warning("Event loop uvloop requested but not installed, using asyncio")
+
+    if name != "asyncio" and uvloop is not None:
+        return uvloop.new_event_loop, "uvloop"
+    return asyncio.new_event_loop, "asyncio"
+
+
+def run(coro, name="auto"):
+    """asyncio.run() on the selected event loop."""
+    loop_factory, selected = select_loop_factory(name)
+    logger.info(f"Using the {selected} event loop")
+    with asyncio.Runner(loop_factory=loop_factory) as runner:
+        return runner.run(coro)
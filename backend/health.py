@@ -0,0 +1,171 @@
+#
+# Copyright 2025 Amazon.com, Inc. and its affiliates. All Rights Reserved.
+#
+# Licensed under the Amazon Software License (the "License").
+# You may not use this file except in compliance with the License.
+# A copy of the License is located at
+#
+#   http://aws.amazon.com/asl/
+#
+# or in the "license" file accompanying this file. This file is distributed
+# on an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either
+# express or implied. See the License for the specific language governing
+# permissions and limitations under the License.
+#
+
+# health.py
+# Liveness (/healthz) and readiness (/readyz) endpoints for the load balancer,
+# served by their own event loop in a background thread so health checks never
+# wait behind, or add work to, the session event loop. That loop beats a
+# heartbeat, and /healthz fails once it stops, e.g. when the loop is stuck.
+import asyncio
+import logging
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+
+class HealthState:
+    """
+    What liveness and readiness depend on. Written by the main event loop, read
+    by the health thread; plain attribute reads and len() need no lock.
+    """
+
+    def __init__(self, session_count, max_sessions=0, is_draining=lambda: False, heartbeat_timeout=0):
+        self.mcp_ready = False
+        self.bedrock_ready = False
+        self.session_count = session_count
+        self.max_sessions = max_sessions
+        self.is_draining = is_draining
+        self.heartbeat_timeout = heartbeat_timeout
+        self.last_heartbeat = time.monotonic()
+
+    async def heartbeat(self):
+        """Run on the main event loop; liveness fails once it misses heartbeat_timeout."""
+        while True:
+            self.last_heartbeat = time.monotonic()
+            await asyncio.sleep(self.heartbeat_timeout / 4)
+
+    def heartbeat_age(self):
+        """Seconds since the main event loop last beat, or None while it is not stale."""
+        age = time.monotonic() - self.last_heartbeat
+        if self.heartbeat_timeout and age > self.heartbeat_timeout:
+            return age
+        return None
+
+    def not_ready_reasons(self):
+        reasons = []
+        if not self.mcp_ready:
+            reasons.append("MCP tools not loaded")
+        if not self.bedrock_ready:
+            reasons.append("Bedrock client not built")
+        if self.max_sessions and self.session_count() >= self.max_sessions:
+            reasons.append("at session limit")
+        if self.is_draining():
+            reasons.append("draining")
+        return reasons
+
+
+def _response(status, body):
+    body = body.encode("utf-8")
+    return (
+        f"HTTP/1.1 {status}\r\n"
+        "Content-Type: text/plain; charset=utf-8\r\n"
+        f"Content-Length: {len(body)}\r\n"
+        "Connection: close\r\n\r\n"
+    ).encode("latin-1") + body
+
+
+_OK = _response("200 OK", "ok\n")
+_NOT_FOUND = _response("404 Not Found", "Not found\n")
+
+
+class HealthServer:
+    """HTTP server for /healthz and /readyz on a daemon thread"""
+
+    def __init__(self, host, port, state, reuse_port=False):
+        self.host = host
+        self.port = port
+        self.state = state
+        self.reuse_port = reuse_port
+        self.loop = None
+        self.thread = None
+        self.heartbeat_task = None
+        self._started = threading.Event()
+        self._error = None
+
+    def start(self):
+        """
+        Start listening; raises if the port cannot be bound. Call it from the
+        main event loop, which then beats the heartbeat until stop().
+        """
+        self.thread = threading.Thread(target=self._run, name="health-server", daemon=True)
+        self.thread.start()
+        self._started.wait()
+        if self._error:
+            raise self._error
+        if self.state.heartbeat_timeout > 0:
+            self.heartbeat_task = asyncio.get_running_loop().create_task(self.state.heartbeat())
+        logger.info(f"Health endpoints listening on {self.host}:{self.port}/healthz and /readyz")
+
+    def stop(self):
+        if self.heartbeat_task:
+            self.heartbeat_task.cancel()
+        if self.loop and self.loop.is_running():
+            self.loop.call_soon_threadsafe(self.loop.stop)
+            self.thread.join(timeout=5)
+
+    def _run(self):
+        self.loop = asyncio.new_event_loop()
+        try:
+            server = self.loop.run_until_complete(
+                asyncio.start_server(
+                    self._handle, self.host, self.port, reuse_port=self.reuse_port
+                )
+            )
+        except OSError as e:
+            self._error = e
+            self._started.set()
+            self.loop.close()
+            return
+
+        self._started.set()
+        try:
+            self.loop.run_forever()
+        finally:
+            server.close()
+            self.loop.close()
+
+    def _respond(self, path):
+        if path == "/healthz":
+            # This thread answers even when the main event loop is stuck, so its heartbeat decides
+            age = self.state.heartbeat_age()
+            if age is None:
+                return _OK
+            return _response("503 Service Unavailable", f"event loop unresponsive for {age:.0f}s\n")
+        if path == "/readyz":
+            reasons = self.state.not_ready_reasons()
+            if not reasons:
+                return _OK
+            return _response("503 Service Unavailable", "; ".join(reasons) + "\n")
+        return _NOT_FOUND
+
+    async def _handle(self, reader, writer):
+        try:
+            request_line = await asyncio.wait_for(reader.readline(), timeout=5)
+            # Skip the request headers
+            while (await asyncio.wait_for(reader.readline(), timeout=5)).strip():
+                pass
+            parts = request_line.decode("latin-1").split()
+            path = parts[1].split("?")[0] if len(parts) >= 2 and parts[0] in ("GET", "HEAD") else None
+            response = self._respond(path)
+            if parts and parts[0] == "HEAD":
+                # Headers only, Content-Length still giving the size of the body
+                response = response[: response.index(b"\r\n\r\n") + 4]
+            writer.write(response)
+            await writer.drain()
+        except (asyncio.TimeoutError, ConnectionError):
+            pass
+        finally:
+            writer.close()
@@ -0,0 +1,83 @@
+#
+# Copyright 2025 Amazon.com, Inc. and its affiliates. All Rights Reserved.
+#
+# Licensed under the Amazon Software License (the "License").
+# You may not use this file except in compliance with the License.
+# A copy of the License is located at
+#
+#   http://aws.amazon.com/asl/
+#
+# or in the "license" file accompanying this file. This file is distributed
+# on an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either
+# express or implied. See the License for the specific language governing
+# permissions and limitations under the License.
+#
+
+# json_codec.py
+# JSON encoding and decoding used on the event path. orjson is used when it
+# is installed, the standard library json module otherwise; call use_backend()
+# at startup to choose. Callers go through the module attributes, e.g.
+# json_codec.loads(payload), so they pick up the selected backend.
+import json
+import logging
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+logger = logging.getLogger(__name__)
+
+# orjson.JSONDecodeError is a subclass, so this catches errors of both backends
+JSONDecodeError = json.JSONDecodeError
+
+BACKEND = "json"
+
+
+def _json_dumps_bytes(obj):
+    return json.dumps(obj).encode("utf-8")
+
+
+def _orjson_dumps_bytes(obj):
+    try:
+        return orjson.dumps(obj, option=orjson.OPT_NON_STR_KEYS)
+    except TypeError:
+        # Types orjson does not serialize, e.g. integers above 64 bits
+        return _json_dumps_bytes(obj)
+
+
+def _orjson_dumps(obj):
+    return _orjson_dumps_bytes(obj).decode("utf-8")
+
+
+loads = json.loads
+dumps = json.dumps
+dumps_bytes = _json_dumps_bytes
+
+
+def use_backend(name="auto"):
+    """
+    Select the JSON backend: "orjson", "json", or "auto" for orjson when it is
+    installed. Falls back to json when orjson is requested but missing.
+    Returns the name of the backend in use.
+    """
+    global BACKEND, loads, dumps, dumps_bytes
+
+    name = (name or "auto").lower()
+    if name not in ("auto", "orjson", "json"):
+        logger.warning(f"Unknown JSON codec {name}, using auto")
+        name = "auto"
+    if name == "orjson" and orjson is None:
+        logger.warning("JSON codec orjson requested but not installed, using json")
+
+    if name != "json" and orjson is not None:
+        BACKEND = "orjson"
+        loads = orjson.loads
+        dumps = _orjson_dumps
+        dumps_bytes = _orjson_dumps_bytes
+    else:
+        BACKEND = "json"
+        loads = json.loads
+        dumps = json.dumps
+        dumps_bytes = _json_dumps_bytes
+    return BACKEND
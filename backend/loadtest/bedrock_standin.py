@@ -0,0 +1,267 @@
+#
+# Copyright 2025 Amazon.com, Inc. and its affiliates. All Rights Reserved.
+#
+# Licensed under the Amazon Software License (the "License").
+# You may not use this file except in compliance with the License.
+# A copy of the License is located at
+#
+#   http://aws.amazon.com/asl/
+#
+# or in the "license" file accompanying this file. This file is distributed
+# on an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either
+# express or implied. See the License for the specific language governing
+# permissions and limitations under the License.
+#
+
+# bedrock_standin.py
+# In-process stand-in for the Bedrock runtime client, speaking the same event
+# protocol as Nova Sonic with synthetic transcripts, audio and tool use.
+# Enabled in the backend with BEDROCK_STANDIN=true, for load tests without Bedrock.
+import asyncio
+import base64
+import json
+import logging
+import os
+import random
+import uuid
+
+import event_codec
+
+logger = logging.getLogger(__name__)
+
+STANDIN_TOOL_NAME = "standinTool"
+OUTPUT_SAMPLE_RATE = 24000
+
+
+class StandinConfig:
+    """Shape of the synthetic conversation, read from STANDIN_* environment variables"""
+
+    def __init__(
+        self,
+        turn_seconds=3.0,
+        response_seconds=4.0,
+        first_audio_ms=300,
+        audio_chunk_ms=80,
+        tool_probability=0.2,
+        tool_latency_ms=200,
+        seed=None,
+    ):
+        # Seconds of user audio that make up one user turn
+        self.turn_seconds = turn_seconds
+        # Duration of each assistant audio response
+        self.response_seconds = response_seconds
+        # Delay between the end of a user turn and the first assistant audio
+        self.first_audio_ms = first_audio_ms
+        self.audio_chunk_ms = audio_chunk_ms
+        # Fraction of turns in which the model calls the stand-in tool first
+        self.tool_probability = tool_probability
+        self.tool_latency_ms = tool_latency_ms
+        self.seed = seed
+
+    @classmethod
+    def from_env(cls):
+        seed = os.environ.get("STANDIN_SEED")
+        return cls(
+            turn_seconds=float(os.environ.get("STANDIN_TURN_SECONDS", 3.0)),
+            response_seconds=float(os.environ.get("STANDIN_RESPONSE_SECONDS", 4.0)),
+            first_audio_ms=float(os.environ.get("STANDIN_FIRST_AUDIO_MS", 300)),
+            audio_chunk_ms=int(os.environ.get("STANDIN_AUDIO_CHUNK_MS", 80)),
+            tool_probability=float(os.environ.get("STANDIN_TOOL_PROBABILITY", 0.2)),
+            tool_latency_ms=float(os.environ.get("STANDIN_TOOL_LATENCY_MS", 200)),
+            seed=int(seed) if seed is not None else None,
+        )
+
+
+class _Payload:
+    __slots__ = ("bytes_",)
+
+    def __init__(self, payload):
+        self.bytes_ = payload
+
+
+class _Result:
+    __slots__ = ("value",)
+
+    def __init__(self, payload):
+        self.value = _Payload(payload)
+
+
+class ReceivedEvent:
+    """What await_output() returns the second element of: one received event"""
+
+    def __init__(self, payload):
+        self.payload = payload
+
+    async def receive(self):
+        if self.payload is None:
+            raise StopAsyncIteration
+        return _Result(self.payload)
+
+
+class _InputStream:
+    def __init__(self, stream):
+        self.stream = stream
+
+    async def send(self, chunk):
+        self.stream.handle_input(chunk.value.bytes_)
+
+    async def close(self):
+        self.stream.finish()
+
+
+class StandinStream:
+    """
+    One bidirectional stream.
+
+    Counts the user audio it receives and, after config.turn_seconds of it,
+    answers like Nova Sonic: the user transcript, optionally a toolUse it waits
+    the toolResult for, speculative assistant text, real-time paced assistant
+    audio and the final assistant text.
+    """
+
+    def __init__(self, config):
+        self.config = config
+        self.random = random.Random(config.seed)
+        self.input_stream = _InputStream(self)
+        self.outputs = asyncio.Queue()
+        self.input_sample_rate = 16000
+        self.user_audio_bytes = 0
+        self.turns = 0
+        self.response_task = None
+        self.tool_result = asyncio.Event()
+        self.closed = False
+
+        chunk_bytes = OUTPUT_SAMPLE_RATE * 2 * config.audio_chunk_ms // 1000
+        self.audio_chunk = base64.b64encode(bytes(chunk_bytes)).decode("ascii")
+
+    async def await_output(self):
+        return None, ReceivedEvent(await self.outputs.get())
+
+    def handle_input(self, payload):
+        if self.closed:
+            raise RuntimeError("Stream is closed")
+        event_type = event_codec.peek_event_type(payload)
+
+        if event_type == "audioInput":
+            # Only the size matters; the base64 content is most of the payload
+            self.user_audio_bytes += len(payload) * 3 // 4
+            turn_bytes = self.config.turn_seconds * self.input_sample_rate * 2
+            if self.user_audio_bytes >= turn_bytes and not self.responding:
+                self.user_audio_bytes = 0
+                self.response_task = asyncio.create_task(self._respond())
+        elif event_type == "contentStart":
+            content_start = json.loads(payload)["event"]["contentStart"]
+            if content_start.get("type") == "AUDIO":
+                self.input_sample_rate = content_start.get(
+                    "audioInputConfiguration", {}
+                ).get("sampleRateHertz", 16000)
+        elif event_type == "toolResult":
+            self.tool_result.set()
+        elif event_type == "sessionEnd":
+            self.finish()
+
+    @property
+    def responding(self):
+        return self.response_task is not None and not self.response_task.done()
+
+    def finish(self):
+        if self.closed:
+            return
+        self.closed = True
+        if self.response_task:
+            self.response_task.cancel()
+        self.outputs.put_nowait(None)
+
+    def _emit(self, event_type, body):
+        self.outputs.put_nowait(json.dumps({"event": {event_type: body}}).encode("utf-8"))
+
+    def _emit_text(self, role, text, stage=None, stop_reason="END_TURN"):
+        content_id = str(uuid.uuid4())
+        content_start = {"contentId": content_id, "type": "TEXT", "role": role}
+        if stage:
+            content_start["additionalModelFields"] = json.dumps({"generationStage": stage})
+        self._emit("contentStart", content_start)
+        self._emit("textOutput", {"contentId": content_id, "role": role, "content": text})
+        self._emit(
+            "contentEnd",
+            {"contentId": content_id, "type": "TEXT", "stopReason": stop_reason},
+        )
+
+    async def _respond(self):
+        self.turns += 1
+        self._emit_text("USER", f"Synthetic user turn {self.turns}")
+
+        if self.random.random() < self.config.tool_probability:
+            content_id = str(uuid.uuid4())
+            self.tool_result.clear()
+            self._emit(
+                "toolUse",
+                {
+                    "contentId": content_id,
+                    "toolUseId": str(uuid.uuid4()),
+                    "toolName": STANDIN_TOOL_NAME,
+                    "content": json.dumps({"query": f"turn {self.turns}"}),
+                },
+            )
+            self._emit(
+                "contentEnd",
+                {"contentId": content_id, "type": "TOOL", "stopReason": "TOOL_USE"},
+            )
+            try:
+                await asyncio.wait_for(self.tool_result.wait(), timeout=30)
+            except asyncio.TimeoutError:
+                logger.warning("Stand-in stream got no toolResult")
+
+        text = f"Synthetic assistant response {self.turns}"
+        self._emit_text("ASSISTANT", text, stage="SPECULATIVE", stop_reason="PARTIAL_TURN")
+        await asyncio.sleep(self.config.first_audio_ms / 1000)
+
+        content_id = str(uuid.uuid4())
+        self._emit("contentStart", {"contentId": content_id, "type": "AUDIO", "role": "ASSISTANT"})
+        audio_event = (
+            '{"event":{"audioOutput":{"content":"%s","contentId":"%s","role":"ASSISTANT"}}}'
+            % (self.audio_chunk, content_id)
+        ).encode("utf-8")
+
+        # Pace the audio like a real-time speech generator
+        loop = asyncio.get_running_loop()
+        interval = self.config.audio_chunk_ms / 1000
+        chunks = max(int(self.config.response_seconds / interval), 1)
+        started = loop.time()
+        for index in range(chunks):
+            self.outputs.put_nowait(audio_event)
+            await asyncio.sleep(max(started + (index + 1) * interval - loop.time(), 0))
+
+        self._emit(
+            "contentEnd",
+            {"contentId": content_id, "type": "AUDIO", "stopReason": "END_TURN"},
+        )
+        self._emit_text("ASSISTANT", text, stage="FINAL")
+
+
+class StandinClient:
+    """Drop-in for BedrockRuntimeClient as far as BedrockStreamManager uses it"""
+
+    def __init__(self, config=None):
+        self.config = config or StandinConfig.from_env()
+
+    async def invoke_model_with_bidirectional_stream(self, operation_input):
+        return StandinStream(self.config)
+
+
+def create_client(region, endpoint):
+    """Client factory with the signature of bedrock_clients.create_client."""
+    return StandinClient()
+
+
+def register_tool(server, config=None):
+    """Register the tool the stand-in calls, answering after the configured latency."""
+    config = config or StandinConfig.from_env()
+
+    @server.tool(
+        name=STANDIN_TOOL_NAME,
+        description="Synthetic tool called by the Bedrock stand-in during load tests.",
+    )
+    async def standin_tool(query: str = "") -> dict:
+        await asyncio.sleep(config.tool_latency_ms / 1000)
+        return {"status": "success", "result": f"Synthetic result for {query}"}
@@ -0,0 +1,305 @@
+#
+# Copyright 2025 Amazon.com, Inc. and its affiliates. All Rights Reserved.
+#
+# Licensed under the Amazon Software License (the "License").
+# You may not use this file except in compliance with the License.
+# A copy of the License is located at
+#
+#   http://aws.amazon.com/asl/
+#
+# or in the "license" file accompanying this file. This file is distributed
+# on an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either
+# express or implied. See the License for the specific language governing
+# permissions and limitations under the License.
+#
+
+# load_generator.py
+# Opens N concurrent sessions against a running backend, each streaming PCM
+# like the frontend does, and reports the backend's CPU, memory, event-loop lag
+# and latency percentiles (scraped from its /metrics endpoint) per level.
+# Run from the backend folder, e.g.:
+#   python -m loadtest.load_generator --url ws://localhost:80 --sessions 10 50 100
+import argparse
+import asyncio
+import json
+import math
+import os
+import time
+import urllib.request
+import uuid
+
+import websockets
+
+from audio_frames import AUDIO_SUBPROTOCOL, encode_audio_frame
+
+INPUT_SAMPLE_RATE = 16000
+
+
+def synthetic_speech(seconds, sample_rate=INPUT_SAMPLE_RATE, frequency=220.0, amplitude=6000):
+    """16-bit mono PCM of a tone, loud enough to count as speech."""
+    samples = int(seconds * sample_rate)
+    return b"".join(
+        int(amplitude * math.sin(2 * math.pi * frequency * i / sample_rate)).to_bytes(
+            2, "little", signed=True
+        )
+        for i in range(samples)
+    )
+
+
+def setup_events(prompt_name, audio_content_name, sample_rate=INPUT_SAMPLE_RATE):
+    """The events the frontend sends to start a session, in order."""
+    system_content_name = str(uuid.uuid4())
+    return [
+        {"event": {"sessionStart": {"inferenceConfiguration": {"maxTokens": 1024, "topP": 0.95, "temperature": 0.7}}}},
+        {
+            "event": {
+                "promptStart": {
+                    "promptName": prompt_name,
+                    "textOutputConfiguration": {"mediaType": "text/plain"},
+                    "audioOutputConfiguration": {
+                        "mediaType": "audio/lpcm",
+                        "sampleRateHertz": 24000,
+                        "sampleSizeBits": 16,
+                        "channelCount": 1,
+                        "voiceId": "tiffany",
+                        "encoding": "base64",
+                        "audioType": "SPEECH",
+                    },
+                    "toolUseOutputConfiguration": {"mediaType": "application/json"},
+                }
+            }
+        },
+        {
+            "event": {
+                "contentStart": {
+                    "promptName": prompt_name,
+                    "contentName": system_content_name,
+                    "type": "TEXT",
+                    "interactive": True,
+                    "role": "SYSTEM",
+                    "textInputConfiguration": {"mediaType": "text/plain"},
+                }
+            }
+        },
+        {
+            "event": {
+                "textInput": {
+                    "promptName": prompt_name,
+                    "contentName": system_content_name,
+                    "content": "You are a helpful assistant. Keep answers short.",
+                }
+            }
+        },
+        {"event": {"contentEnd": {"promptName": prompt_name, "contentName": system_content_name}}},
+        {
+            "event": {
+                "contentStart": {
+                    "promptName": prompt_name,
+                    "contentName": audio_content_name,
+                    "type": "AUDIO",
+                    "role": "USER",
+                    "interactive": True,
+                    "audioInputConfiguration": {
+                        "mediaType": "audio/lpcm",
+                        "sampleRateHertz": sample_rate,
+                        "sampleSizeBits": 16,
+                        "channelCount": 1,
+                        "audioType": "SPEECH",
+                        "encoding": "base64",
+                    },
+                }
+            }
+        },
+    ]
+
+
+class SessionStats:
+    def __init__(self):
+        self.connected = 0
+        self.failed = 0
+        self.frames_sent = 0
+        self.events_received = 0
+        self.audio_events_received = 0
+
+
+async def run_session(url, duration, chunk_ms, sample_rate, speech, stats):
+    """One simulated caller: set up the session, then stream audio in real time."""
+    try:
+        websocket = await websockets.connect(
+            url, subprotocols=[AUDIO_SUBPROTOCOL], max_size=None, open_timeout=30
+        )
+    except Exception:
+        stats.failed += 1
+        return
+    stats.connected += 1
+
+    async def receive():
+        async for message in websocket:
+            stats.events_received += 1
+            if '"audioOutput"' in message[:40]:
+                stats.audio_events_received += 1
+
+    receiver = asyncio.create_task(receive())
+    prompt_name = str(uuid.uuid4())
+    audio_content_name = str(uuid.uuid4())
+    try:
+        for event in setup_events(prompt_name, audio_content_name, sample_rate):
+            await websocket.send(json.dumps(event))
+
+        chunk_bytes = sample_rate * 2 * chunk_ms // 1000
+        interval = chunk_ms / 1000
+        loop = asyncio.get_running_loop()
+        started = loop.time()
+        sequence = 0
+        while loop.time() - started < duration:
+            offset = (sequence * chunk_bytes) % (len(speech) - chunk_bytes)
+            await websocket.send(
+                encode_audio_frame(
+                    audio_content_name, sequence, speech[offset : offset + chunk_bytes]
+                )
+            )
+            stats.frames_sent += 1
+            sequence += 1
+            await asyncio.sleep(max(started + sequence * interval - loop.time(), 0))
+
+        for event in (
+            {"event": {"contentEnd": {"promptName": prompt_name, "contentName": audio_content_name}}},
+            {"event": {"promptEnd": {"promptName": prompt_name}}},
+            {"event": {"sessionEnd": {}}},
+        ):
+            await websocket.send(json.dumps(event))
+    except websockets.exceptions.ConnectionClosed:
+        pass
+    finally:
+        receiver.cancel()
+        await websocket.close()
+
+
+def parse_metrics(text):
+    """Parse Prometheus text into {(name, labels): value}."""
+    samples = {}
+    for line in text.splitlines():
+        if not line or line.startswith("#"):
+            continue
+        series, _, value = line.rpartition(" ")
+        name, _, labels = series.partition("{")
+        samples[(name, labels.rstrip("}"))] = float(value)
+    return samples
+
+
+def total(samples, name):
+    """Sum of a metric's series, e.g. the per-worker gauges of a backend running WORKERS."""
+    return sum(value for (sample_name, _), value in samples.items() if sample_name == name)
+
+
+def scrape(metrics_url):
+    with urllib.request.urlopen(metrics_url, timeout=10) as response:
+        return parse_metrics(response.read().decode("utf-8"))
+
+
+def histogram_quantile(before, after, name, quantile):
+    """Quantile of a histogram's observations between two scrapes, in milliseconds."""
+    buckets = []
+    for (sample_name, labels), value in after.items():
+        if sample_name != f"{name}_bucket":
+            continue
+        bound = labels.rsplit('le="', 1)[1].rstrip('"')
+        delta = value - before.get((sample_name, labels), 0)
+        buckets.append((float("inf") if bound == "+Inf" else float(bound), delta))
+    # Sum the series of labelled histograms, bucket by bucket
+    merged = {}
+    for bound, delta in buckets:
+        merged[bound] = merged.get(bound, 0) + delta
+    bounds = sorted(merged)
+    if not bounds or merged[bounds[-1]] == 0:
+        return None
+
+    rank = quantile * merged[bounds[-1]]
+    lower, lower_count = 0.0, 0.0
+    for bound in bounds:
+        count = merged[bound]
+        if count >= rank:
+            if math.isinf(bound):
+                return lower * 1000
+            # Linear interpolation inside the bucket, like PromQL histogram_quantile
+            fraction = (rank - lower_count) / (count - lower_count) if count > lower_count else 1
+            return (lower + (bound - lower) * fraction) * 1000
+        lower, lower_count = bound, count
+    return None
+
+
+def format_ms(value):
+    return "     -" if value is None else f"{value:6.0f}" if value >= 10 else f"{value:6.1f}"
+
+
+async def run_level(args, sessions, speech):
+    before = await asyncio.to_thread(scrape, args.metrics_url)
+    started = time.monotonic()
+
+    stats = SessionStats()
+    tasks = []
+    for index in range(sessions):
+        tasks.append(
+            asyncio.create_task(run_session(args.url, args.duration, args.chunk_ms, args.sample_rate, speech, stats))
+        )
+        # Spread the connections over the ramp-up time
+        await asyncio.sleep(args.ramp_up / sessions)
+    await asyncio.gather(*tasks)
+
+    wall = time.monotonic() - started
+    after = await asyncio.to_thread(scrape, args.metrics_url)
+
+    cpu_seconds = "nova_s2s_process_cpu_seconds_total"
+    cpu = total(after, cpu_seconds) - total(before, cpu_seconds)
+    rss = total(after, "nova_s2s_process_resident_memory_bytes") / (1024 * 1024)
+
+    def quantiles(name, *qs):
+        return " ".join(format_ms(histogram_quantile(before, after, name, q)) for q in qs)
+
+    print(
+        f"{sessions:>8} {stats.connected:>6} {stats.failed:>6} "
+        f"{cpu / wall * 100:6.1f} {rss:7.0f} "
+        f"{quantiles('nova_s2s_event_loop_lag_seconds', 0.5, 0.99)} "
+        f"{quantiles('nova_s2s_time_to_first_audio_seconds', 0.5, 0.95)} "
+        f"{quantiles('nova_s2s_response_latency_seconds', 0.5, 0.95, 0.99)} "
+        f"{quantiles('nova_s2s_websocket_send_seconds', 0.99)} "
+        f"{quantiles('nova_s2s_tool_duration_seconds', 0.95)} "
+        f"{stats.audio_events_received / wall:8.0f}"
+    )
+
+
+async def main():
+    parser = argparse.ArgumentParser(description="Concurrent session load generator")
+    parser.add_argument("--url", default="ws://localhost:80", help="Backend WebSocket URL")
+    parser.add_argument(
+        "--token",
+        default=os.environ.get("LOADTEST_TOKEN"),
+        help="Cognito access token; not needed when the backend runs with DEV_MODE=true",
+    )
+    parser.add_argument("--metrics-url", default="http://localhost:9090/metrics")
+    parser.add_argument("--sessions", type=int, nargs="+", default=[1, 10, 50, 100])
+    parser.add_argument("--duration", type=float, default=60, help="Seconds each session streams audio")
+    parser.add_argument("--ramp-up", type=float, default=10, help="Seconds over which sessions connect")
+    parser.add_argument("--chunk-ms", type=int, default=32, help="Audio per WebSocket frame")
+    parser.add_argument(
+        "--sample-rate",
+        type=int,
+        default=INPUT_SAMPLE_RATE,
+        help="Capture rate declared to the backend, which resamples other rates to 16 kHz",
+    )
+    args = parser.parse_args()
+
+    args.url = f"{args.url.rstrip('/')}/api/{args.token or 'dev'}"
+    speech = synthetic_speech(5, args.sample_rate)
+
+    print(
+        f"{'sessions':>8} {'conn':>6} {'failed':>6} {'cpu%':>6} {'rss MB':>7} "
+        f"{'lag50':>6} {'lag99':>6} {'ttfa50':>6} {'ttfa95':>6} "
+        f"{'resp50':>6} {'resp95':>6} {'resp99':>6} {'send99':>6} {'tool95':>6} {'audio/s':>8}"
+    )
+    for sessions in args.sessions:
+        await run_level(args, sessions, speech)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,214 @@
+#
+# Copyright 2025 Amazon.com, Inc. and its affiliates. All Rights Reserved.
+#
+# Licensed under the Amazon Software License (the "License").
+# You may not use this file except in compliance with the License.
+# A copy of the License is located at
+#
+#   http://aws.amazon.com/asl/
+#
+# or in the "license" file accompanying this file. This file is distributed
+# on an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either
+# express or implied. See the License for the specific language governing
+# permissions and limitations under the License.
+#
+
+# replay.py
+# Drives websocket_handler from recorded session traces (see session_trace.py),
+# with Bedrock and the tools answering from the recorded data, and reports CPU
+# per session-minute and the backend latency metrics. Runs without AWS access.
+# Run from the backend folder, e.g.:
+#   python -m loadtest.replay traces/*.s2strace --sessions 20 --speed 4
+import argparse
+import asyncio
+import contextvars
+import json
+import time
+
+import nova_s2s_backend
+from audio_frames import AUDIO_SUBPROTOCOL
+from loadtest.bedrock_standin import ReceivedEvent
+from session_trace import (
+    TRACE_BEDROCK_OUTPUT,
+    TRACE_CLIENT_BINARY,
+    TRACE_CLIENT_TEXT,
+    TRACE_TOOL_RESULT,
+    read_trace,
+)
+
+# The replay session the current task belongs to
+current_session = contextvars.ContextVar("current_session")
+
+
+class SessionTrace:
+    """The records of one trace file, split by direction"""
+
+    def __init__(self, path):
+        self.path = path
+        self.client_messages = []
+        self.bedrock_outputs = []
+        self.tool_results = {}
+        self.duration = 0.0
+
+        for kind, offset, payload in read_trace(path):
+            if kind == TRACE_CLIENT_TEXT:
+                self.client_messages.append((offset, payload.decode("utf-8")))
+            elif kind == TRACE_CLIENT_BINARY:
+                self.client_messages.append((offset, payload))
+            elif kind == TRACE_BEDROCK_OUTPUT:
+                self.bedrock_outputs.append((offset, payload))
+            elif kind == TRACE_TOOL_RESULT:
+                result = json.loads(payload)
+                self.tool_results[result["toolUseId"]] = result
+            self.duration = max(self.duration, offset)
+
+
+class ReplaySession:
+    def __init__(self, trace, speed):
+        self.trace = trace
+        self.speed = speed
+        self.started = None
+        self.manager = None
+        self.sent_events = 0
+
+    def delay_until(self, offset):
+        """Seconds until a record at the given trace offset is due."""
+        loop = asyncio.get_running_loop()
+        return self.started + offset / self.speed - loop.time()
+
+
+class ReplayWebSocket:
+    """Plays the recorded client messages into websocket_handler in real time (scaled)"""
+
+    subprotocol = AUDIO_SUBPROTOCOL
+
+    def __init__(self, session):
+        self.session = session
+
+    async def __aiter__(self):
+        for offset, message in self.session.trace.client_messages:
+            delay = self.session.delay_until(offset)
+            if delay > 0:
+                await asyncio.sleep(delay)
+            yield message
+        # Let the rest of the recorded Bedrock output play out
+        await asyncio.sleep(max(self.session.delay_until(self.session.trace.duration), 0))
+
+    async def send(self, message, text=None):
+        self.session.sent_events += 1
+
+    async def close(self, code=1000, reason=""):
+        pass
+
+
+class ReplayStream:
+    """Bedrock stream emitting the recorded output events at their recorded times"""
+
+    def __init__(self, session):
+        self.session = session
+        self.input_stream = self
+        self.outputs = asyncio.Queue()
+        self.player = asyncio.create_task(self._play())
+
+    async def _play(self):
+        for offset, payload in self.session.trace.bedrock_outputs:
+            delay = self.session.delay_until(offset)
+            if delay > 0:
+                await asyncio.sleep(delay)
+            self.outputs.put_nowait(payload)
+
+    async def await_output(self):
+        return None, ReceivedEvent(await self.outputs.get())
+
+    async def send(self, chunk):
+        pass
+
+    async def close(self):
+        self.player.cancel()
+        self.outputs.put_nowait(None)
+
+
+class ReplayClient:
+    async def invoke_model_with_bidirectional_stream(self, operation_input):
+        return ReplayStream(current_session.get())
+
+
+class ReplayStreamManager(nova_s2s_backend.BedrockStreamManager):
+    """Answers tool calls with the recorded results after the recorded duration"""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        current_session.get().manager = self
+
+    async def processToolUse(self, toolName, toolUseContent):
+        session = current_session.get()
+        recorded = session.trace.tool_results.get(toolUseContent.get("toolUseId"))
+        if recorded is None:
+            return {"status": "error", "error": "No recorded result for this tool use"}
+        await asyncio.sleep(recorded["durationMs"] / 1000 / session.speed)
+        return json.loads(recorded["content"]) if recorded["json"] else recorded["content"]
+
+
+async def replay_session(session):
+    current_session.set(session)
+    session.started = asyncio.get_running_loop().time()
+    await nova_s2s_backend.websocket_handler(ReplayWebSocket(session), "/api/replay")
+    if session.manager:
+        await session.manager.close()
+
+
+def format_ms(value):
+    return "-" if value is None else f"{value * 1000:.1f} ms"
+
+
+async def main():
+    parser = argparse.ArgumentParser(description="Replay recorded sessions against the backend")
+    parser.add_argument("traces", nargs="+", help="Session trace files")
+    parser.add_argument("--sessions", type=int, default=None, help="Concurrent sessions, cycling through the traces (default: one per trace)")
+    parser.add_argument("--speed", type=float, default=1.0, help="Replay speed, 1 is real time")
+    args = parser.parse_args()
+
+    # Replay at the websocket_handler boundary, with Bedrock and tools stubbed
+    nova_s2s_backend.RUNNING_IN_DEV_MODE = True
+    nova_s2s_backend.BedrockStreamManager = ReplayStreamManager
+    nova_s2s_backend.client_registry.create_client = lambda region, endpoint: ReplayClient()
+
+    traces = [SessionTrace(path) for path in args.traces]
+    sessions = [
+        ReplaySession(traces[index % len(traces)], args.speed)
+        for index in range(args.sessions or len(traces))
+    ]
+
+    cpu_started = time.process_time()
+    wall_started = time.perf_counter()
+    # Each session runs in its own context, so the stubs can find it
+    await asyncio.gather(
+        *(
+            asyncio.create_task(replay_session(session), context=contextvars.Context())
+            for session in sessions
+        )
+    )
+    cpu = time.process_time() - cpu_started
+    wall = time.perf_counter() - wall_started
+
+    session_minutes = max(sum(session.trace.duration for session in sessions) / 60, 1e-9)
+    print(f"sessions:                {len(sessions)} at {args.speed:g}x")
+    print(f"session-minutes:         {session_minutes:.2f}")
+    print(f"wall time:               {wall:.1f} s")
+    print(f"cpu time:                {cpu:.2f} s")
+    print(f"cpu per session-minute:  {cpu / session_minutes * 1000:.1f} ms")
+    print(f"events forwarded:        {sum(session.sent_events for session in sessions)}")
+    # Latencies are measured in replay time: above 1x the recorded delays shrink with the speed
+    for label, histogram in (
+        ("time to first audio", nova_s2s_backend.TIME_TO_FIRST_AUDIO),
+        ("response latency", nova_s2s_backend.RESPONSE_LATENCY),
+        ("websocket send", nova_s2s_backend.WEBSOCKET_SEND_LATENCY),
+    ):
+        print(
+            f"{label + ':':<24} p50 {format_ms(histogram.quantile(0.5))}  "
+            f"p95 {format_ms(histogram.quantile(0.95))}"
+        )
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,178 @@
+#
+# Copyright 2025 Amazon.com, Inc. and its affiliates. All Rights Reserved.
+#
+# Licensed under the Amazon Software License (the "License").
+# You may not use this file except in compliance with the License.
+# A copy of the License is located at
+#
+#   http://aws.amazon.com/asl/
+#
+# or in the "license" file accompanying this file. This file is distributed
+# on an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either
+# express or implied. See the License for the specific language governing
+# permissions and limitations under the License.
+#
+
+# soak_test.py
+# Runs thousands of short synthetic sessions against a running backend and
+# checks that its resident memory returns to the baseline taken after a
+# warm-up, that every session was released and that no session task leaked.
+# With --admin-token, heap tracing runs during the soak and the allocations
+# that grew are printed. Exits with status 1 when a check fails.
+# Run from the backend folder, e.g.:
+#   python -m loadtest.soak_test --url ws://localhost:80 --sessions 2000 --concurrency 50
+import argparse
+import asyncio
+import json
+import os
+import sys
+import time
+import urllib.request
+
+from loadtest.load_generator import (
+    INPUT_SAMPLE_RATE,
+    SessionStats,
+    run_session,
+    scrape,
+    synthetic_speech,
+    total,
+)
+
+MB = 1024 * 1024
+
+
+async def run_sessions(args, count, speech, stats, progress=False):
+    """Run count sessions, at most args.concurrency at a time."""
+    semaphore = asyncio.Semaphore(args.concurrency)
+    done = 0
+    started = time.monotonic()
+
+    async def one():
+        nonlocal done
+        async with semaphore:
+            await run_session(args.url, args.duration, args.chunk_ms, args.sample_rate, speech, stats)
+        done += 1
+        if progress and done % max(count // 10, 1) == 0:
+            samples = await asyncio.to_thread(scrape, args.metrics_url)
+            print(
+                f"{done:>8} {stats.failed:>7} {time.monotonic() - started:8.0f} "
+                f"{total(samples, 'nova_s2s_process_resident_memory_bytes') / MB:8.1f} "
+                f"{total(samples, 'nova_s2s_live_sessions'):6.0f}"
+            )
+
+    await asyncio.gather(*(one() for _ in range(count)))
+
+
+async def wait_released(args):
+    """Wait until the backend has released every session; returns the last scrape."""
+    deadline = time.monotonic() + args.settle
+    while True:
+        samples = await asyncio.to_thread(scrape, args.metrics_url)
+        if total(samples, "nova_s2s_live_sessions") == 0 or time.monotonic() > deadline:
+            return samples
+        await asyncio.sleep(1)
+
+
+async def settled_rss(args):
+    """Lowest resident memory over the settle time, as the allocator hands memory back."""
+    lowest = None
+    deadline = time.monotonic() + args.settle
+    while True:
+        samples = await asyncio.to_thread(scrape, args.metrics_url)
+        rss = total(samples, "nova_s2s_process_resident_memory_bytes")
+        lowest = rss if lowest is None else min(lowest, rss)
+        if time.monotonic() > deadline:
+            return lowest
+        await asyncio.sleep(2)
+
+
+def admin_request(args, path):
+    base = args.metrics_url.rsplit("/metrics", 1)[0]
+    request = urllib.request.Request(
+        f"{base}{path}", method="POST", headers={"Authorization": f"Bearer {args.admin_token}"}
+    )
+    with urllib.request.urlopen(request, timeout=120) as response:
+        return json.loads(response.read())
+
+
+async def main():
+    parser = argparse.ArgumentParser(description="Memory soak test with many short sessions")
+    parser.add_argument("--url", default="ws://localhost:80", help="Backend WebSocket URL")
+    parser.add_argument(
+        "--token",
+        default=os.environ.get("LOADTEST_TOKEN"),
+        help="Cognito access token; not needed when the backend runs with DEV_MODE=true",
+    )
+    parser.add_argument("--metrics-url", default="http://localhost:9090/metrics")
+    parser.add_argument(
+        "--admin-token",
+        default=os.environ.get("ADMIN_TOKEN"),
+        help="The backend's ADMIN_TOKEN, to trace the heap during the soak",
+    )
+    parser.add_argument("--sessions", type=int, default=2000, help="Sessions in the soak")
+    parser.add_argument(
+        "--warmup", type=int, default=500, help="Sessions run before the baseline, to reach steady state"
+    )
+    parser.add_argument("--concurrency", type=int, default=50, help="Sessions open at a time")
+    parser.add_argument("--duration", type=float, default=4, help="Seconds each session streams audio")
+    parser.add_argument("--chunk-ms", type=int, default=32, help="Audio per WebSocket frame")
+    parser.add_argument("--sample-rate", type=int, default=INPUT_SAMPLE_RATE)
+    parser.add_argument("--settle", type=float, default=20, help="Seconds to wait for memory to settle")
+    parser.add_argument(
+        "--max-growth-mb", type=float, default=20, help="Allowed resident memory growth over the baseline"
+    )
+    args = parser.parse_args()
+
+    args.url = f"{args.url.rstrip('/')}/api/{args.token or 'dev'}"
+    speech = synthetic_speech(5, args.sample_rate)
+
+    # Caches, pools and allocator arenas fill up during the warm-up
+    await run_sessions(args, args.warmup, speech, SessionStats())
+    await wait_released(args)
+    baseline = await settled_rss(args)
+    print(f"Baseline resident memory {baseline / MB:.1f} MB after {args.warmup} warm-up sessions")
+
+    if args.admin_token:
+        await asyncio.to_thread(admin_request, args, "/admin/heap/start")
+
+    stats = SessionStats()
+    print(f"{'sessions':>8} {'failed':>7} {'seconds':>8} {'rss MB':>8} {'live':>6}")
+    await run_sessions(args, args.sessions, speech, stats, progress=True)
+
+    samples = await wait_released(args)
+    rss = await settled_rss(args)
+    tracing_overhead = 0
+    if args.admin_token:
+        heap = await asyncio.to_thread(admin_request, args, "/admin/heap/snapshot?limit=15")
+        await asyncio.to_thread(admin_request, args, "/admin/heap/stop")
+        # tracemalloc's own bookkeeping is not part of the backend's growth
+        tracing_overhead = heap["overheadBytes"]
+        print(f"Traced heap {heap['tracedBytes'] / MB:.1f} MB; grown since the baseline:")
+        for entry in heap.get("grown", []):
+            print(f"  {entry['sizeDiffBytes'] / 1024:10.1f} KB {entry['countDiff']:>8} {entry['location']}")
+
+    growth = rss - tracing_overhead - baseline
+    live = total(samples, "nova_s2s_live_sessions")
+    leaked = total(samples, "nova_s2s_leaked_session_tasks")
+    print(
+        f"Resident memory {rss / MB:.1f} MB after {args.sessions} sessions, "
+        f"{growth / MB:+.1f} MB over the baseline; {live:.0f} sessions not released, {leaked:.0f} leaked tasks"
+    )
+
+    failures = []
+    if growth > args.max_growth_mb * MB:
+        failures.append(f"resident memory grew by more than {args.max_growth_mb:g} MB")
+    if live:
+        failures.append("sessions were not released")
+    if leaked:
+        failures.append("session tasks leaked")
+    if stats.failed:
+        failures.append(f"{stats.failed} sessions failed to connect")
+    if failures:
+        print(f"Soak test failed: {'; '.join(failures)}")
+        sys.exit(1)
+    print("Soak test passed")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,131 @@
+#
+# Copyright 2025 Amazon.com, Inc. and its affiliates. All Rights Reserved.
+#
+# Licensed under the Amazon Software License (the "License").
+# You may not use this file except in compliance with the License.
+# A copy of the License is located at
+#
+#   http://aws.amazon.com/asl/
+#
+# or in the "license" file accompanying this file. This file is distributed
+# on an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either
+# express or implied. See the License for the specific language governing
+# permissions and limitations under the License.
+#
+
+# log_config.py
+import atexit
+import json
+import logging
+import logging.handlers
+import queue
+import warnings
+
+TEXT_FORMAT = "%(asctime)s %(message)s"
+
+
+class JsonFormatter(logging.Formatter):
+    """One JSON object per line, with the event type and session of a record if set"""
+
+    def format(self, record):
+        entry = {
+            "time": self.formatTime(record),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+        }
+        for field in ("event_type", "session_id"):
+            value = getattr(record, field, None)
+            if value is not None:
+                entry[field] = value
+        if record.exc_info:
+            entry["exception"] = self.formatException(record.exc_info)
+        return json.dumps(entry)
+
+
+class EventTypeSampler(logging.Filter):
+    """
+    Keeps a fraction of the records logged with extra={"event_type": ...}.
+
+    rates maps an event type to the fraction of its records to keep (0 drops
+    them all). Sampling is deterministic, every n-th record of a type is kept,
+    and warnings and errors are never dropped.
+    """
+
+    def __init__(self, rates):
+        super().__init__()
+        self.intervals = {
+            event_type: (round(1 / rate) if rate > 0 else 0)
+            for event_type, rate in rates.items()
+        }
+        self.counts = {}
+
+    def filter(self, record):
+        event_type = getattr(record, "event_type", None)
+        if event_type is None or record.levelno >= logging.WARNING:
+            return True
+        interval = self.intervals.get(event_type, 1)
+        if interval <= 1:
+            return interval == 1
+        count = self.counts.get(event_type, 0)
+        self.counts[event_type] = count + 1
+        return count % interval == 0
+
+
+def parse_sample_rates(value):
+    """Parse "contentStart=0.1,textInput=0" into {"contentStart": 0.1, "textInput": 0.0}."""
+    rates = {}
+    for item in filter(None, (part.strip() for part in value.split(","))):
+        event_type, _, rate = item.partition("=")
+        try:
+            rates[event_type.strip()] = min(max(float(rate), 0.0), 1.0)
+        except ValueError:
+            # Parsed while logging is being configured, so the logger is not set up yet
+            warnings.warn(f"Ignoring invalid log sample rate: {item}", stacklevel=2)
+    return rates
+
+
+# QueueListener threads started by configure_logging
+_listeners = []
+
+
+def flush_logging():
+    """
+    Stop the listener threads once the queued records are written. Runs at
+    exit; processes ending without atexit, like multiprocessing workers, call it.
+    """
+    while _listeners:
+        _listeners.pop().stop()
+
+
+atexit.register(flush_logging)
+
+
+def configure_logging(level="INFO", log_format="text", use_queue=True, sample_rates=None):
+    """
+    Configure the root logger.
+
+    With use_queue, records are handed to a QueueHandler and written by a
+    QueueListener thread, so log I/O never blocks the event loop.
+    """
+    handler = logging.StreamHandler()
+    handler.setFormatter(JsonFormatter() if log_format == "json" else logging.Formatter(TEXT_FORMAT))
+
+    root = logging.getLogger()
+    root.setLevel(level)
+    for existing in list(root.handlers):
+        root.removeHandler(existing)
+
+    if use_queue:
+        log_queue = queue.SimpleQueue()
+        listener = logging.handlers.QueueListener(log_queue, handler, respect_handler_level=True)
+        listener.start()
+        _listeners.append(listener)
+        front = logging.handlers.QueueHandler(log_queue)
+    else:
+        front = handler
+
+    # Sample before queueing, so dropped records cost nothing further
+    if sample_rates:
+        front.addFilter(EventTypeSampler(sample_rates))
+    root.addHandler(front)
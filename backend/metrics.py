@@ -0,0 +1,316 @@
+#
+# Copyright 2025 Amazon.com, Inc. and its affiliates. All Rights Reserved.
+#
+# Licensed under the Amazon Software License (the "License").
+# You may not use this file except in compliance with the License.
+# A copy of the License is located at
+#
+#   http://aws.amazon.com/asl/
+#
+# or in the "license" file accompanying this file. This file is distributed
+# on an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either
+# express or implied. See the License for the specific language governing
+# permissions and limitations under the License.
+#
+
+# metrics.py
+import asyncio
+import bisect
+import json
+import logging
+import os
+import resource
+import sys
+import time
+
+logger = logging.getLogger(__name__)
+
+# Bucket upper bounds in seconds, from sub-millisecond sends to slow tool calls
+LATENCY_BUCKETS = (
+    0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5,
+    1.0, 2.5, 5.0, 10.0, 30.0,
+)
+
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _format_labels(names, values, extra=()):
+    pairs = list(zip(names, values)) + list(extra)
+    if not pairs:
+        return ""
+    return "{" + ",".join(f'{name}="{_escape(value)}"' for name, value in pairs) + "}"
+
+
+def _format_value(value):
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class Counter:
+    """A monotonically increasing count, optionally split by labels, or read from a callback at scrape time"""
+
+    kind = "counter"
+
+    def __init__(self, name, help_text, labelnames=(), callback=None):
+        self.name = name
+        self.help = help_text
+        self.labelnames = tuple(labelnames)
+        self.callback = callback
+        self.values = {}
+
+    def inc(self, *labelvalues, amount=1):
+        self.values[labelvalues] = self.values.get(labelvalues, 0) + amount
+
+    def render(self):
+        if self.callback:
+            yield f"{self.name} {_format_value(self.callback())}"
+            return
+        for labelvalues, value in self.values.items():
+            yield f"{self.name}{_format_labels(self.labelnames, labelvalues)} {_format_value(value)}"
+
+
+class Gauge:
+    """A value that can go up and down, or is read from a callback at scrape time"""
+
+    kind = "gauge"
+
+    def __init__(self, name, help_text, callback=None):
+        self.name = name
+        self.help = help_text
+        self.callback = callback
+        self.value = 0
+
+    def set(self, value):
+        self.value = value
+
+    def render(self):
+        value = self.callback() if self.callback else self.value
+        yield f"{self.name} {_format_value(value)}"
+
+
+class Histogram:
+    """
+    Distribution of observed values in fixed buckets, optionally split by labels.
+
+    observe() only bisects the bucket bounds and bumps one counter; cumulative
+    bucket counts are computed when the metrics are rendered.
+    """
+
+    kind = "histogram"
+
+    def __init__(self, name, help_text, buckets=LATENCY_BUCKETS, labelnames=()):
+        self.name = name
+        self.help = help_text
+        self.buckets = tuple(sorted(buckets))
+        self.labelnames = tuple(labelnames)
+        # label values -> [bucket counts (last one is +Inf), sum, count]
+        self.series = {}
+
+    def observe(self, value, *labelvalues):
+        series = self.series.get(labelvalues)
+        if series is None:
+            series = self.series[labelvalues] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+        series[0][bisect.bisect_left(self.buckets, value)] += 1
+        series[1] += value
+        series[2] += 1
+
+    def quantile(self, q):
+        """
+        Estimate the q quantile over all label values, interpolating linearly
+        within a bucket. Returns None without observations.
+        """
+        merged = [0] * (len(self.buckets) + 1)
+        for counts, _, _ in self.series.values():
+            merged = [a + b for a, b in zip(merged, counts)]
+        total = sum(merged)
+        if not total:
+            return None
+
+        rank = q * total
+        cumulative = 0
+        lower = 0.0
+        for index, count in enumerate(merged):
+            if index == len(self.buckets):
+                # Beyond the last bound, report the last bound
+                return lower
+            upper = self.buckets[index]
+            if count and cumulative + count >= rank:
+                return lower + (upper - lower) * (rank - cumulative) / count
+            cumulative += count
+            lower = upper
+        return lower
+
+    def render(self):
+        for labelvalues, (counts, total, count) in self.series.items():
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets + (float("inf"),), counts):
+                cumulative += bucket_count
+                labels = _format_labels(
+                    self.labelnames, labelvalues, (("le", _format_value(bound)),)
+                )
+                yield f"{self.name}_bucket{labels} {cumulative}"
+            labels = _format_labels(self.labelnames, labelvalues)
+            yield f"{self.name}_sum{labels} {_format_value(total)}"
+            yield f"{self.name}_count{labels} {count}"
+
+
+class MetricsRegistry:
+    """Metrics of this process, rendered in the Prometheus text format"""
+
+    def __init__(self):
+        self.metrics = {}
+
+    def _register(self, metric):
+        if metric.name in self.metrics:
+            raise ValueError(f"Metric {metric.name} is already registered")
+        self.metrics[metric.name] = metric
+        return metric
+
+    def counter(self, name, help_text, labelnames=(), callback=None):
+        return self._register(Counter(name, help_text, labelnames, callback))
+
+    def gauge(self, name, help_text, callback=None):
+        return self._register(Gauge(name, help_text, callback))
+
+    def histogram(self, name, help_text, buckets=LATENCY_BUCKETS, labelnames=()):
+        return self._register(Histogram(name, help_text, buckets, labelnames))
+
+    def render(self):
+        lines = []
+        for metric in self.metrics.values():
+            lines.append(f"# HELP {metric.name} {metric.help}")
+            lines.append(f"# TYPE {metric.name} {metric.kind}")
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+
+registry = MetricsRegistry()
+
+
+def _resident_memory_bytes():
+    try:
+        with open("/proc/self/statm") as statm:
+            return int(statm.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except OSError:
+        # Peak rather than current usage, in KiB on Linux
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+
+
+def register_process_metrics(registry):
+    """CPU time and memory of this process, read when scraped."""
+    registry.counter(
+        "nova_s2s_process_cpu_seconds_total",
+        "User and system CPU time used by the process, all threads",
+        callback=time.process_time,
+    )
+    registry.gauge(
+        "nova_s2s_process_resident_memory_bytes",
+        "Resident memory of the process",
+        callback=_resident_memory_bytes,
+    )
+
+
+async def monitor_event_loop_lag(histogram, interval=0.5):
+    """Observe how late the event loop wakes up from a sleep of interval seconds."""
+    loop = asyncio.get_running_loop()
+    while True:
+        expected = loop.time() + interval
+        await asyncio.sleep(interval)
+        histogram.observe(max(loop.time() - expected, 0.0))
+
+
+def format_emf(namespace, values, timestamp=None):
+    """
+    One CloudWatch embedded metric format record for values, a dict of
+    name -> (value, unit). CloudWatch Logs turns it into metrics without API calls.
+    """
+    record = {
+        "_aws": {
+            "Timestamp": int((timestamp if timestamp is not None else time.time()) * 1000),
+            "CloudWatchMetrics": [
+                {
+                    "Namespace": namespace,
+                    "Dimensions": [[]],
+                    "Metrics": [{"Name": name, "Unit": unit} for name, (_, unit) in values.items()],
+                }
+            ],
+        }
+    }
+    record.update({name: value for name, (value, _) in values.items()})
+    return json.dumps(record)
+
+
+def session_load_values(active, limit):
+    """Load report values for format_emf: open sessions, and their percentage of limit (0 without one)."""
+    return {
+        "ActiveSessions": (int(active), "Count"),
+        "SessionLoad": (round(active / limit * 100, 1) if limit else 0.0, "Percent"),
+    }
+
+
+async def report_emf(namespace, collect, interval):
+    """
+    Write collect()'s values to stdout as an EMF record every interval seconds;
+    the awslogs driver ships them to CloudWatch, where autoscaling can use them.
+    Written directly rather than logged, as the record must be the whole line.
+    collect may be a coroutine function.
+    """
+    while True:
+        await asyncio.sleep(interval)
+        values = collect()
+        if asyncio.iscoroutine(values):
+            values = await values
+        sys.stdout.write(format_emf(namespace, values) + "\n")
+        sys.stdout.flush()
+
+
+async def _handle_request(reader, writer, render=None, admin=None):
+    try:
+        request_line = await asyncio.wait_for(reader.readline(), timeout=5)
+        headers = {}
+        while True:
+            line = (await asyncio.wait_for(reader.readline(), timeout=5)).strip()
+            if not line:
+                break
+            name, _, value = line.decode("latin-1").partition(":")
+            headers[name.strip().lower()] = value.strip()
+
+        parts = request_line.decode("latin-1").split()
+        content_type = "text/plain; version=0.0.4; charset=utf-8"
+        if len(parts) >= 2 and parts[0] == "GET" and parts[1].split("?")[0] == "/metrics":
+            status = "200 OK"
+            body = (await render() if render else registry.render()).encode("utf-8")
+        elif len(parts) >= 2 and admin and parts[1].startswith("/admin/"):
+            status, content_type, body = await admin(parts[0], parts[1], headers)
+        else:
+            status = "404 Not Found"
+            body = b"Not found\n"
+
+        headers = (
+            f"HTTP/1.1 {status}\r\n"
+            f"Content-Type: {content_type}\r\n"
+            f"Content-Length: {len(body)}\r\n"
+            "Connection: close\r\n\r\n"
+        )
+        writer.write(headers.encode("latin-1") + body)
+        await writer.drain()
+    except (asyncio.TimeoutError, ConnectionError):
+        pass
+    finally:
+        writer.close()
+
+
+async def start_metrics_server(host, port, render=None, admin=None):
+    """
+    Serve GET /metrics on its own port; metrics are only rendered when scraped.
+    render, if given, is a coroutine function producing the text instead of the registry.
+    admin, if given, is a coroutine function answering /admin/ requests, see admin.py.
+    """
+    server = await asyncio.start_server(
+        lambda reader, writer: _handle_request(reader, writer, render, admin), host, port
+    )
+    logger.info(f"Metrics endpoint listening on {host}:{port}/metrics")
+    return server
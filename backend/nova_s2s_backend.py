@@ -14,47 +14,259 @@
 #
 
 #nova_s2s_backend.py
-import json
+import base64
 import logging
 import os
+import signal
+import time
 import uuid
 import warnings
 import asyncio
+from http import HTTPStatus
 import websockets
+from websockets.frames import CloseCode
+
+from log_config import configure_logging, flush_logging, parse_sample_rates
+from health import HealthServer, HealthState
 
 # Import the Cognito validation module
 import cognito
+from audio_queue import AudioInputQueue
+from audio_frames import AudioFrameError, decode_audio_frame, select_subprotocol
+import event_codec
+import event_loop
+import json_codec
+from event_codec import EncodedEvent, encode_event, encode_raw_event
+from tool_calls import STATUS_CANCELLED, STATUS_ERROR, STATUS_SUCCESS, ToolCallTable
+from stream_pool import BedrockStreamPool
+from output_queue import OutputQueue
+from vad import VadConfig, VoiceActivityGate
+from resampler import PolyphaseResampler
+import metrics
+import workers
+from session_trace import TRACE_CLIENT_BINARY, TRACE_CLIENT_TEXT, TraceWriter
+from session_continuation import ConversationHistory, SessionContinuation
+from session_lifecycle import END_CLIENT_DISCONNECTED, END_STREAM_ENDED, SessionRegistry
+from admin import AdminApi
 
 from aws_sdk_bedrock_runtime.client import (
-    BedrockRuntimeClient,  # Use BedrockRuntimeClient instead of BedrockRuntime
     InvokeModelWithBidirectionalStreamOperationInput,
 )
 from aws_sdk_bedrock_runtime.models import (
     InvokeModelWithBidirectionalStreamInputChunk,
     BidirectionalInputPayloadPart,
 )
-from aws_sdk_bedrock_runtime.config import (
-    Config,
-    HTTPAuthSchemeResolver,
-    SigV4AuthScheme,
-)
-from smithy_aws_core.credentials_resolvers.environment import (
-    EnvironmentCredentialsResolver,
-)
+from bedrock_clients import client_registry
 
 from mcp_server import get_bedrock_tool_specs, handle_bedrock_tool_call, start_mcp_server, mcp_server
 import tools.mcp_tool_registry
 
 # Configure logging
 LOGLEVEL = os.environ.get("LOGLEVEL", "INFO").upper()
-logging.basicConfig(level=LOGLEVEL, format="%(asctime)s %(message)s")
+configure_logging(
+    level=LOGLEVEL,
+    log_format=os.environ.get("LOG_FORMAT", "text").lower(),
+    use_queue=os.environ.get("LOG_ASYNC", "true").lower() == "true",
+    sample_rates=parse_sample_rates(os.environ.get("LOG_SAMPLE_RATES", "")),
+)
 logger = logging.getLogger(__name__)
 RUNNING_IN_DEV_MODE = os.environ.get("DEV_MODE", "False").lower() == "true"
 
+# JSON backend (auto, orjson, json) and event loop (auto, uvloop, asyncio); auto
+# picks orjson and uvloop when they are installed, see json_codec.py and event_loop.py
+JSON_CODEC = json_codec.use_backend(os.environ.get("JSON_CODEC", "auto"))
+EVENT_LOOP = os.environ.get("EVENT_LOOP", "auto")
+logger.info(f"Using the {JSON_CODEC} JSON codec")
+
+# Audio input queue limits (per session)
+AUDIO_QUEUE_MAX_CHUNKS = int(os.environ.get("AUDIO_QUEUE_MAX_CHUNKS", 256))
+AUDIO_QUEUE_MAX_BYTES = int(os.environ.get("AUDIO_QUEUE_MAX_BYTES", 2 * 1024 * 1024))
+AUDIO_QUEUE_POLICY = os.environ.get("AUDIO_QUEUE_POLICY", "drop_oldest").lower()
+AUDIO_QUEUE_HIGH_WATER = float(os.environ.get("AUDIO_QUEUE_HIGH_WATER", 0.75))
+
+# Merge queued audio into larger Bedrock audioInput chunks (0 disables coalescing)
+AUDIO_COALESCE_TARGET_MS = int(os.environ.get("AUDIO_COALESCE_TARGET_MS", 0))
+AUDIO_COALESCE_MAX_DELAY_MS = int(os.environ.get("AUDIO_COALESCE_MAX_DELAY_MS", 40))
+MAX_AUDIO_COALESCE_MS = 1000
+
+# Voice activity gate replacing long user silences with sparse keep-alive frames
+# (see vad.py); the hangover must cover the model's end-of-turn silence
+AUDIO_VAD = os.environ.get("AUDIO_VAD", "false").lower() == "true"
+VAD_CONFIG = VadConfig(
+    energy_threshold_db=float(os.environ.get("AUDIO_VAD_ENERGY_DB", -45)),
+    zcr_threshold=float(os.environ.get("AUDIO_VAD_ZCR", 0.25)),
+    pre_roll_ms=float(os.environ.get("AUDIO_VAD_PRE_ROLL_MS", 300)),
+    hangover_ms=float(os.environ.get("AUDIO_VAD_HANGOVER_MS", 1500)),
+    keepalive_interval_ms=float(os.environ.get("AUDIO_VAD_KEEPALIVE_MS", 1000)),
+)
+
+# Bedrock model used for every session
+MODEL_ID = "amazon.nova-sonic-v1:0"
+BEDROCK_REGION = "us-east-1"
+# User audio sent to the model; audio captured at other rates or formats is resampled
+MODEL_INPUT_SAMPLE_RATE = 16000
+
+# Pre-warmed Bedrock streams (0 disables the pool)
+STREAM_POOL_SIZE = int(os.environ.get("STREAM_POOL_SIZE", 0))
+STREAM_POOL_MAX_IDLE_SECONDS = float(os.environ.get("STREAM_POOL_MAX_IDLE_SECONDS", 20))
+stream_pool = None
+
+# Move long sessions to a new Bedrock stream before the stream lifetime limit
+# (0 disables rollover). Rollover waits for a quiet moment for up to the grace period.
+STREAM_ROLLOVER_SECONDS = float(os.environ.get("STREAM_ROLLOVER_SECONDS", 420))
+STREAM_ROLLOVER_GRACE_SECONDS = float(os.environ.get("STREAM_ROLLOVER_GRACE_SECONDS", 45))
+CONTINUATION_HISTORY_MESSAGES = int(os.environ.get("CONTINUATION_HISTORY_MESSAGES", 20))
+CONTINUATION_HISTORY_CHARS = int(os.environ.get("CONTINUATION_HISTORY_CHARS", 8000))
+
+# On SIGTERM, how long active sessions may continue before they are closed
+DRAIN_TIMEOUT_SECONDS = float(os.environ.get("DRAIN_TIMEOUT_SECONDS", 90))
+# Open WebSocket connections and their stream managers
+active_sessions = {}
+server_draining = False
+# Sessions until everything they hold is released (see session_lifecycle.py)
+live_sessions = SessionRegistry()
+
+# Sessions whose client sent nothing for this long are closed (0 disables it)
+SESSION_IDLE_TIMEOUT_SECONDS = float(os.environ.get("SESSION_IDLE_TIMEOUT_SECONDS", 120))
+# WebSocket keepalive pings; connections whose pong is late are closed (0 disables pings)
+WEBSOCKET_PING_INTERVAL_SECONDS = float(os.environ.get("WEBSOCKET_PING_INTERVAL_SECONDS", 20))
+WEBSOCKET_PING_TIMEOUT_SECONDS = float(os.environ.get("WEBSOCKET_PING_TIMEOUT_SECONDS", 20))
+
+# Concurrent sessions per process; beyond it new connections are refused with
+# HTTP 503 and Retry-After before any Bedrock stream is opened (0 disables the limit)
+MAX_SESSIONS = int(os.environ.get("MAX_SESSIONS", 0))
+ADMISSION_RETRY_AFTER_SECONDS = int(os.environ.get("ADMISSION_RETRY_AFTER_SECONDS", 5))
+# Session load reported to CloudWatch as embedded metric format logs, for
+# autoscaling (0 disables the report)
+LOAD_REPORT_INTERVAL_SECONDS = float(os.environ.get("LOAD_REPORT_INTERVAL_SECONDS", 0))
+LOAD_METRICS_NAMESPACE = os.environ.get("LOAD_METRICS_NAMESPACE", "NovaS2S")
+
+# Liveness (/healthz) and readiness (/readyz) for the load balancer, see health.py
+# (0 disables the endpoints); /healthz fails once the event loop has not run its
+# heartbeat for HEALTH_HEARTBEAT_TIMEOUT_SECONDS (0 disables the check)
+HEALTH_PORT = int(os.environ.get("HEALTH_PORT", 8081))
+HEALTH_HEARTBEAT_TIMEOUT_SECONDS = float(os.environ.get("HEALTH_HEARTBEAT_TIMEOUT_SECONDS", 10))
+health_state = HealthState(
+    session_count=lambda: len(active_sessions),
+    max_sessions=MAX_SESSIONS,
+    is_draining=lambda: server_draining,
+    heartbeat_timeout=HEALTH_HEARTBEAT_TIMEOUT_SECONDS,
+)
+
+# Worker processes sharing the WebSocket port through SO_REUSEPORT (see workers.py);
+# 1 runs the server in this process
+WORKERS = int(os.environ.get("WORKERS", 1))
+
+# Prometheus metrics, served on METRICS_PORT (0 disables the endpoint)
+METRICS_PORT = int(os.environ.get("METRICS_PORT", 9090))
+TIME_TO_FIRST_AUDIO = metrics.registry.histogram(
+    "nova_s2s_time_to_first_audio_seconds",
+    "Time from the first user audio sent to Bedrock to the first assistant audio of a session",
+)
+RESPONSE_LATENCY = metrics.registry.histogram(
+    "nova_s2s_response_latency_seconds",
+    "Time from the end of a user turn to the first assistant audio of the response",
+)
+TOOL_DURATION = metrics.registry.histogram(
+    "nova_s2s_tool_duration_seconds",
+    "Tool execution time",
+    labelnames=("tool", "status"),
+)
+WEBSOCKET_SEND_LATENCY = metrics.registry.histogram(
+    "nova_s2s_websocket_send_seconds",
+    "Time to send one event to the frontend WebSocket",
+)
+metrics.registry.gauge(
+    "nova_s2s_active_sessions",
+    "Open WebSocket sessions",
+    callback=lambda: len(active_sessions),
+)
+metrics.registry.gauge(
+    "nova_s2s_max_sessions",
+    "Session limit of the process (MAX_SESSIONS), 0 if unlimited",
+    callback=lambda: MAX_SESSIONS,
+)
+metrics.registry.gauge(
+    "nova_s2s_session_load",
+    "Open sessions as a fraction of MAX_SESSIONS, 0 if unlimited",
+    callback=lambda: session_load(),
+)
+metrics.registry.gauge(
+    "nova_s2s_live_sessions",
+    "Sessions not fully released yet, including those closing",
+    callback=lambda: len(live_sessions),
+)
+metrics.registry.gauge(
+    "nova_s2s_leaked_session_tasks",
+    "Stream manager tasks still running after their session was released",
+    callback=lambda: live_sessions.leaked_task_count(),
+)
+metrics.registry.gauge(
+    "nova_s2s_max_session_idle_seconds",
+    "Longest time a live session has gone without a message from its client",
+    callback=lambda: live_sessions.max_idle_seconds(),
+)
+metrics.registry.gauge(
+    "nova_s2s_session_audio_queue_bytes",
+    "User audio queued for Bedrock, all live sessions",
+    callback=lambda: live_sessions.memory_total("audioQueueBytes"),
+)
+metrics.registry.gauge(
+    "nova_s2s_session_output_queue_bytes",
+    "Bedrock output queued for the frontend, all live sessions",
+    callback=lambda: live_sessions.memory_total("outputQueueBytes"),
+)
+metrics.registry.gauge(
+    "nova_s2s_session_history_bytes",
+    "Setup events and conversation history kept for stream rollover, all live sessions",
+    callback=lambda: live_sessions.memory_total("historyBytes"),
+)
+metrics.registry.gauge(
+    "nova_s2s_session_max_buffered_bytes",
+    "Largest total of queued and buffered bytes held by one live session",
+    callback=lambda: live_sessions.max_buffered_bytes(),
+)
+SESSIONS_ENDED = metrics.registry.counter(
+    "nova_s2s_sessions_ended_total",
+    "Sessions released, by what ended them",
+    labelnames=("reason",),
+)
+SESSIONS_REJECTED = metrics.registry.counter(
+    "nova_s2s_sessions_rejected_total",
+    "Connections refused before the WebSocket handshake",
+    labelnames=("reason",),
+)
+EVENT_LOOP_LAG = metrics.registry.histogram(
+    "nova_s2s_event_loop_lag_seconds",
+    "How late the event loop wakes up from a timer",
+)
+VAD_AUDIO_BYTES = metrics.registry.counter(
+    "nova_s2s_vad_audio_bytes_total",
+    "User audio bytes forwarded to or suppressed by the voice activity gate",
+    labelnames=("decision",),
+)
+metrics.register_process_metrics(metrics.registry)
+
+# Token for the diagnostics under /admin/ on METRICS_PORT, see admin.py
+# (unset disables them)
+ADMIN_TOKEN = os.environ.get("ADMIN_TOKEN", "")
+admin_api = AdminApi(ADMIN_TOKEN, live_sessions)
+
+# Directory to record a replayable trace of every session to (see session_trace.py);
+# traces contain the full conversation audio, only enable it for test traffic
+SESSION_TRACE_DIR = os.environ.get("SESSION_TRACE_DIR", "")
+
+# Local stand-in for Bedrock with synthetic conversations, for load tests
+# (see "Load testing" in the README); never enable it in a deployment
+BEDROCK_STANDIN = os.environ.get("BEDROCK_STANDIN", "false").lower() == "true"
+if BEDROCK_STANDIN:
+    from loadtest import bedrock_standin
+
+    client_registry.create_client = bedrock_standin.create_client
+    bedrock_standin.register_tool(mcp_server)
+
 # Suppress warnings
 warnings.filterwarnings("ignore")
-# Suppress websockets server non-critical logs that are triggered by NLB health checks (empty TCP packets)
-logging.getLogger("websockets.server").setLevel(logging.CRITICAL)
 
 
 class BedrockStreamManager:
@@ -67,53 +279,110 @@ class BedrockStreamManager:
         self.last_credential_refresh = 0
 
         # Audio and output queues
-        self.audio_input_queue = asyncio.Queue()
-        self.output_queue = asyncio.Queue()
+        self.audio_input_queue = AudioInputQueue(
+            maxsize=AUDIO_QUEUE_MAX_CHUNKS,
+            policy=AUDIO_QUEUE_POLICY,
+            high_water=AUDIO_QUEUE_HIGH_WATER,
+            low_water=AUDIO_QUEUE_HIGH_WATER / 3,
+            max_bytes=AUDIO_QUEUE_MAX_BYTES,
+            # No audioInput event carries more than the longest coalescing target
+            max_chunk_bytes=MAX_AUDIO_COALESCE_MS * MODEL_INPUT_SAMPLE_RATE * 2 // 1000,
+            on_high_water=self._on_audio_queue_high_water,
+        )
+        self.output_queue = OutputQueue()
+
+        # Audio coalescing, see configure_audio_coalescing
+        self.audio_input_sample_rate = 16000
+        self.audio_coalesce_target_ms = AUDIO_COALESCE_TARGET_MS
+        self.audio_coalesce_max_delay_ms = AUDIO_COALESCE_MAX_DELAY_MS
+        # Resampler for user audio the client captures at another rate, see configure_audio_input
+        self.audio_resampler = None
+        # Voice activity gate and the audio content it is tracking
+        self.voice_gate = VoiceActivityGate(VAD_CONFIG) if AUDIO_VAD else None
+        self.voice_gate_content = None
 
         self.response_task = None
+        self.audio_task = None
+        self.rollover_task = None
         self.stream_response = None
+        self.stream_started_at = None
         self.is_active = False
-        self.bedrock_client = None
+        # Set once the session's Bedrock stream has ended or the manager is closed
+        self.ended = asyncio.Event()
+        # Cleared while a rollover switches streams, which holds back all sends
+        self.stream_ready = asyncio.Event()
+        self.stream_ready.set()
+        # Response tasks still draining streams replaced by a rollover
+        self.retired_response_tasks = set()
+        self.continuation = SessionContinuation(
+            ConversationHistory(
+                max_messages=CONTINUATION_HISTORY_MESSAGES,
+                max_chars=CONTINUATION_HISTORY_CHARS,
+            )
+        )
 
         # Session information
         self.prompt_name = None  # Will be set from frontend
         self.content_name = None  # Will be set from frontend
         self.audio_content_name = None  # Will be set from frontend
-        self.toolUseContent = ""
-        self.toolUseId = ""
-        self.toolName = ""
-
-    def _initialize_client(self):
-        """Initialize the Bedrock client."""
-        config = Config(
-            endpoint_uri=f"https://bedrock-runtime.{self.region}.amazonaws.com",
-            region=self.region,
-            aws_credentials_identity_resolver=EnvironmentCredentialsResolver(),
-            http_auth_scheme_resolver=HTTPAuthSchemeResolver(),
-            http_auth_schemes={"aws.auth#sigv4": SigV4AuthScheme()},
-        )
-        self.bedrock_client = BedrockRuntimeClient(config=config)
+        # Assistant audio currently being generated, and audio cut off by barge-in
+        self.assistant_audio_content_id = None
+        self.interrupted_content_id = None
+        # Timestamps for the latency metrics
+        self.first_audio_sent_at = None
+        self.awaiting_first_audio = True
+        self.user_turn_ended_at = None
+        # Session trace being recorded, if any
+        self.trace = None
+        # In-flight tool calls keyed by toolUseId, and the tasks running them
+        self.tool_calls = ToolCallTable()
+        self.tool_tasks = set()
+        self.tool_result_lock = asyncio.Lock()
+        # Serializes sends from the audio, tool and WebSocket tasks
+        self.send_lock = asyncio.Lock()
+
+        # Bedrock output events the backend inspects; everything else is passed through
+        self.response_handlers = {}
+        self.register_response_handler("contentStart", self._on_content_start)
+        self.register_response_handler("textOutput", self._on_text_output)
+        self.register_response_handler("toolUse", self._on_tool_use)
+        self.register_response_handler("contentEnd", self._on_content_end)
+
+    async def _open_stream(self):
+        """Open a bidirectional stream on a shared client; returns (stream, client lease)."""
+        lease = client_registry.acquire(self.region)
+        try:
+            stream_response = await lease.client.invoke_model_with_bidirectional_stream(
+                InvokeModelWithBidirectionalStreamOperationInput(model_id=self.model_id)
+            )
+        except Exception:
+            client_registry.release(lease, failed=True)
+            raise
+        client_registry.report_success(lease)
+        return stream_response, lease
 
     async def initialize_stream(self):
         """Initialize the bidirectional stream with Bedrock."""
-        if not self.bedrock_client:
-            self._initialize_client()
-
         try:
-            self.stream_response = (
-                await self.bedrock_client.invoke_model_with_bidirectional_stream(
-                    InvokeModelWithBidirectionalStreamOperationInput(
-                        model_id=self.model_id
-                    )
-                )
-            )
+            self.stream_response, lease = await self._open_stream()
+            self.stream_started_at = time.monotonic()
             self.is_active = True
 
             # Start listening for responses
-            self.response_task = asyncio.create_task(self._process_responses())
+            self.response_task = asyncio.create_task(
+                self._process_responses(self.stream_response, lease), name="bedrock-responses"
+            )
 
             # Start processing audio input
-            asyncio.create_task(self._process_audio_input())
+            self.audio_task = asyncio.create_task(
+                self._process_audio_input(), name="bedrock-audio-input"
+            )
+
+            # Move to a new stream before this one reaches its lifetime limit
+            if STREAM_ROLLOVER_SECONDS > 0:
+                self.rollover_task = asyncio.create_task(
+                    self._rollover_watchdog(), name="stream-rollover"
+                )
 
             # Wait a bit to ensure everything is set up
             await asyncio.sleep(0.1)
@@ -124,7 +393,130 @@ class BedrockStreamManager:
             self.is_active = False
             logger.error(f"Failed to initialize stream: {str(e)}")
             raise
-    
+
+    async def close(self):
+        """Close the Bedrock input stream and stop the background tasks."""
+        was_active = self.is_active
+        self.is_active = False
+        self.ended.set()
+
+        if was_active and self.stream_response:
+            try:
+                await self.stream_response.input_stream.close()
+            except Exception as e:
+                logger.info(f"Error closing input stream: {e}")
+
+        # Cancelling a response task releases its client lease
+        tasks = [t for t in self.pending_tasks() if t is not asyncio.current_task()]
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+    def pending_tasks(self):
+        """Background tasks of the manager that have not finished."""
+        tasks = [t for t in (self.response_task, self.audio_task, self.rollover_task) if t]
+        tasks.extend(self.retired_response_tasks)
+        tasks.extend(self.tool_tasks)
+        return [t for t in tasks if not t.done()]
+
+    def memory_usage(self):
+        """Bytes this session holds in its queues and buffers."""
+        return {
+            "audioQueueBytes": self.audio_input_queue.queued_bytes,
+            "outputQueueBytes": self.output_queue.queued_bytes,
+            "outputQueueEvents": self.output_queue.qsize(),
+            "historyBytes": self.continuation.buffered_bytes(),
+            "voiceGateBytes": self.voice_gate.held_bytes() if self.voice_gate else 0,
+        }
+
+    def clear_queues(self):
+        """Drop queued audio and events once nothing will consume them."""
+        self.audio_input_queue.clear()
+        self.output_queue.clear()
+
+    async def _rollover_watchdog(self):
+        """Roll the session over to a new stream before the current one expires."""
+        while self.is_active:
+            due = self.stream_started_at + STREAM_ROLLOVER_SECONDS
+            await asyncio.sleep(max(due - time.monotonic(), 0))
+
+            # Prefer a moment when the assistant is silent, no tool is running and
+            # no reply to an ended user turn is still on its way
+            deadline = due + STREAM_ROLLOVER_GRACE_SECONDS
+            while self.is_active and time.monotonic() < deadline and (
+                self.assistant_audio_content_id
+                or len(self.tool_calls)
+                or self.user_turn_ended_at is not None
+            ):
+                await asyncio.sleep(0.25)
+            if not self.is_active:
+                break
+
+            if not await self._rollover_stream():
+                # Try again shortly, the current stream may still have some time left
+                await asyncio.sleep(5)
+
+    async def _rollover_stream(self):
+        """
+        Continue the session on a new Bedrock stream.
+
+        The new stream is primed with the session setup, the system prompt and a
+        compacted recent history before audio is switched over. Sends are held
+        back meanwhile, so queued user audio waits instead of being dropped.
+        Returns True if the session moved to the new stream.
+        """
+        if not self.continuation.ready:
+            # The stream keeps its age, so the rollover is retried until it can happen
+            logger.info("Session not set up yet, retrying stream rollover shortly")
+            return False
+
+        logger.info("Rolling session over to a new Bedrock stream")
+        self.stream_ready.clear()
+        try:
+            new_stream, lease = await self._open_stream()
+            try:
+                for event in self.continuation.replay_events(self.prompt_name):
+                    await self._send_event(new_stream, event)
+            except Exception:
+                await new_stream.input_stream.close()
+                client_registry.release(lease)
+                raise
+
+            old_stream = self.stream_response
+            old_task = self.response_task
+            self.stream_response = new_stream
+            self.stream_started_at = time.monotonic()
+            self.response_task = asyncio.create_task(
+                self._process_responses(new_stream, lease), name="bedrock-responses"
+            )
+            self.assistant_audio_content_id = None
+            self.interrupted_content_id = None
+        except Exception as e:
+            logger.error(f"Stream rollover failed: {e}", exc_info=True)
+            return False
+        finally:
+            self.stream_ready.set()
+
+        # Let the old stream finish draining, then end it cleanly
+        self.retired_response_tasks.add(old_task)
+        old_task.add_done_callback(self.retired_response_tasks.discard)
+        await self._end_stream(old_stream)
+        logger.info("Stream rollover complete")
+        return True
+
+    async def _end_stream(self, stream_response):
+        """Close the audio content, prompt and session on a stream that is no longer used."""
+        try:
+            for event in (
+                event_codec.content_end_event(self.prompt_name, self.audio_content_name),
+                encode_event({"event": {"promptEnd": {"promptName": self.prompt_name}}}),
+                encode_event({"event": {"sessionEnd": {}}}),
+            ):
+                await self._send_event(stream_response, event)
+            await stream_response.input_stream.close()
+        except Exception as e:
+            logger.info(f"Error ending replaced stream: {e}")
+
     async def handle_prompt_start_with_tools(self, original_session_data):
         """Handle session start by adding tool configuration"""
         
@@ -145,246 +537,189 @@ class BedrockStreamManager:
         
         logger.info("Starting session")
         
+        # Keep it to prime a new stream on rollover
+        self.continuation.set_prompt_start(enhanced_prompt_start_event)
+
         # Send the enhanced event to Bedrock
         await self.send_raw_event(enhanced_prompt_start_event)
 
-    async def send_raw_event(self, event_data):
-        """Send a raw event to the Bedrock stream."""
-        if not self.stream_response or not self.is_active:
+    async def send_raw_event(self, event_data, event_type=None, stream_response=None):
+        """
+        Send a raw event to the Bedrock stream.
+
+        event_data may be an EncodedEvent, a dict, or an already serialized
+        JSON string/bytes (in which case event_type should be given for logging).
+        Every event is serialized at most once and never parsed again. Unless a
+        specific stream_response is given, the event goes to the current stream,
+        waiting while a rollover is switching streams.
+        """
+        if stream_response is None:
+            await self.stream_ready.wait()
+            stream_response = self.stream_response
+
+        if not stream_response or not self.is_active:
             logger.info("Stream not initialized or closed")
             return
 
-        # Convert to JSON string if it's a dict
-        if isinstance(event_data, dict):
-            event_json = json.dumps(event_data)
+        if isinstance(event_data, EncodedEvent):
+            encoded = event_data
+        elif isinstance(event_data, dict):
+            encoded = encode_event(event_data)
         else:
-            event_json = event_data
+            encoded = encode_raw_event(event_type, event_data)
 
+        try:
+            await self._send_event(stream_response, encoded)
+        except Exception as e:
+            logger.info(f"Error sending event: {str(e)}", exc_info=True)
+
+    async def _send_event(self, stream_response, encoded):
+        """Send an EncodedEvent to the given stream; errors are left to the caller."""
         # Create the event chunk
         event = InvokeModelWithBidirectionalStreamInputChunk(
-            value=BidirectionalInputPayloadPart(bytes_=event_json.encode("utf-8"))
+            value=BidirectionalInputPayloadPart(bytes_=encoded.payload)
         )
 
-        try:
-            await self.stream_response.input_stream.send(event)
+        async with self.send_lock:
+            await stream_response.input_stream.send(event)
 
-            # Define event_type outside the conditional blocks
-            if isinstance(event_data, dict):
-                event_type = list(event_data.get("event", {}).keys())
+        # constant stream of audio inputs so we don't want to log them all
+        if encoded.event_type != "audioInput":
+            if logger.isEnabledFor(logging.DEBUG):
+                logger.debug(
+                    f"Sent event: {encoded.payload.decode('utf-8')}",
+                    extra={"event_type": encoded.event_type},
+                )
             else:
-                event_type = list(json.loads(event_json).get("event", {}).keys())
+                logger.info(
+                    f"Sent event type: {encoded.event_type}",
+                    extra={"event_type": encoded.event_type},
+                )
 
-            if "promptStart" in event_type or 'contentStart' in event_type:
-                logger.info(event_data)
+    def configure_audio_coalescing(self, target_ms=None, max_delay_ms=None):
+        """
+        Tune how much queued audio is merged into each audioInput event.
+
+        target_ms is the chunk duration to aim for (0 disables coalescing) and
+        max_delay_ms caps how long live audio may wait for more to arrive, which
+        keeps barge-in responsive.
+        """
+        if target_ms is not None:
+            self.audio_coalesce_target_ms = min(max(int(target_ms), 0), MAX_AUDIO_COALESCE_MS)
+        if max_delay_ms is not None:
+            self.audio_coalesce_max_delay_ms = min(max(int(max_delay_ms), 0), MAX_AUDIO_COALESCE_MS)
+        logger.info(
+            f"Audio coalescing: target {self.audio_coalesce_target_ms} ms, "
+            f"max delay {self.audio_coalesce_max_delay_ms} ms"
+        )
 
-            if len(event_json) > 200:
-                if (
-                    "audioInput" not in event_type
-                ):  # constant stream of audio inputs so we don't want to log them all
-                    logger.info(f"Sent event type: {event_type}")
-            else:
-                if (
-                    "audioInput" not in event_type
-                ):  # constant stream of audio inputs so we don't want to log them all
-                    logger.info(f"Sent event type: {event_type}")
-        except Exception as e:
-            logger.info(f"Error sending event: {str(e)}", exc_info=True)
+    def configure_audio_input(self, content_start):
+        """
+        Set up resampling for the capture rate and sample size the client declared
+        in its audio contentStart. Returns True if audioInputConfiguration was
+        rewritten to the model's input format, which Bedrock then receives.
+        """
+        audio_config = content_start.get("audioInputConfiguration", {})
+        rate = int(audio_config.get("sampleRateHertz", MODEL_INPUT_SAMPLE_RATE))
+        bits = int(audio_config.get("sampleSizeBits", 16))
+        if rate == MODEL_INPUT_SAMPLE_RATE and bits == 16:
+            self.audio_resampler = None
+            return False
+
+        self.audio_resampler = PolyphaseResampler(rate, MODEL_INPUT_SAMPLE_RATE, bits)
+        audio_config["sampleRateHertz"] = MODEL_INPUT_SAMPLE_RATE
+        audio_config["sampleSizeBits"] = 16
+        content_start["audioInputConfiguration"] = audio_config
+        logger.info(f"Resampling user audio from {rate} Hz {bits}-bit to {MODEL_INPUT_SAMPLE_RATE} Hz")
+        return True
 
     async def _process_audio_input(self):
         """Process audio input from the queue and send to Bedrock."""
         while self.is_active:
             try:
-                # Get audio data from the queue
-                data = await self.audio_input_queue.get()
+                # Get audio data from the queue, merged up to the coalescing target
+                # (16-bit mono PCM, so 2 bytes per sample)
+                target_bytes = (
+                    self.audio_coalesce_target_ms * self.audio_input_sample_rate * 2 // 1000
+                )
+                data = await self.audio_input_queue.get_coalesced(
+                    target_bytes, self.audio_coalesce_max_delay_ms / 1000
+                )
 
                 # Extract data from the queue item
-                prompt_name = data.get("prompt_name")
-                content_name = data.get("content_name")
-                audio_bytes = data.get("audio_bytes")
+                prompt_name = data.prompt_name
+                content_name = data.content_name
+                audio_bytes = data.audio_bytes
 
                 if not audio_bytes or not prompt_name or not content_name:
                     logger.info("Missing required audio data properties")
                     continue
 
-                # Create the audio input event
-                audio_event = {
-                    "event": {
-                        "audioInput": {
-                            "promptName": prompt_name,
-                            "contentName": content_name,
-                            "content": (
-                                audio_bytes.decode("utf-8")
-                                if isinstance(audio_bytes, bytes)
-                                else audio_bytes
-                            ),
-                            "role": "USER",
-                        }
-                    }
-                }
+                # Create the audio input event; queued audio is raw PCM and is
+                # only base64 encoded here, at the Bedrock boundary
+                audio_event = event_codec.audio_input_event(
+                    prompt_name, content_name, base64.b64encode(audio_bytes)
+                )
 
                 # Send the event
                 await self.send_raw_event(audio_event)
+                if self.first_audio_sent_at is None:
+                    self.first_audio_sent_at = time.monotonic()
 
             except asyncio.CancelledError:
                 break
             except Exception as e:
                 logger.info(f"Error processing audio: {e}", exc_info=True)
 
-    def add_audio_chunk(self, prompt_name, content_name, audio_data):
-        """Add an audio chunk to the queue."""
-        # The audio_data is already a base64 string from the frontend
-        self.audio_input_queue.put_nowait(
+    async def add_audio_chunk(self, prompt_name, content_name, audio_data):
+        """Add an audio chunk of raw PCM bytes to the queue."""
+        if self.audio_resampler:
+            audio_data = self.audio_resampler.process(audio_data)
+            if not audio_data:
+                return
+
+        if self.voice_gate is None:
+            await self.audio_input_queue.put_chunk(prompt_name, content_name, audio_data)
+            return
+
+        gate = self.voice_gate
+        if content_name != self.voice_gate_content:
+            gate.reset()
+            self.voice_gate_content = content_name
+        forwarded, suppressed = gate.forwarded_bytes, gate.suppressed_bytes
+        frames = gate.process(audio_data, self.audio_input_sample_rate)
+        VAD_AUDIO_BYTES.inc("forwarded", amount=gate.forwarded_bytes - forwarded)
+        VAD_AUDIO_BYTES.inc("suppressed", amount=gate.suppressed_bytes - suppressed)
+        for frame in frames:
+            await self.audio_input_queue.put_chunk(prompt_name, content_name, frame)
+
+    def _on_audio_queue_high_water(self, above):
+        """Ask the frontend to slow down (or resume) when the audio queue backs up."""
+        stats = self.audio_input_queue.stats()
+        self.output_queue.put_nowait(
             {
-                "prompt_name": prompt_name,
-                "content_name": content_name,
-                "audio_bytes": audio_data,
+                "event": {
+                    "audioFlowControl": {
+                        "action": "SLOW_DOWN" if above else "RESUME",
+                        "queueDepth": stats["depth"],
+                        "droppedChunks": stats["droppedChunks"],
+                        "oldestChunkAgeMs": stats["oldestChunkAgeMs"],
+                    }
+                }
             }
         )
 
-    async def _process_responses(self):
-        """Process incoming responses from Bedrock."""
+    async def _process_responses(self, stream_response, lease):
+        """Process incoming responses from one Bedrock stream."""
         try:
             while self.is_active:
                 try:
-                    output = await self.stream_response.await_output()
+                    output = await stream_response.await_output()
                     result = await output[1].receive()
                     if result.value and result.value.bytes_:
-                        try:
-                            response_data = result.value.bytes_.decode("utf-8")
-                            json_data = json.loads(response_data)
-
-                            # Handle different response types
-                            if "event" in json_data:
-                                event_data = json_data["event"]
-                                if "contentStart" in event_data:
-                                    logging.debug("Content start detected")
-                                    content_start = event_data["contentStart"]
-                                    # Check for speculative content
-                                    if "additionalModelFields" in content_start:
-                                        try:
-                                            additional_fields = json.loads(
-                                                content_start["additionalModelFields"]
-                                            )
-                                            if (
-                                                additional_fields.get("generationStage")
-                                                == "SPECULATIVE"
-                                            ):
-                                                logging.debug(
-                                                    "Speculative content detected"
-                                                )
-                                        except json.JSONDecodeError:
-                                            logging.error(
-                                                "Error parsing additionalModelFields",
-                                                exc_info=True,
-                                            )
-                                elif "textOutput" in event_data:
-                                    text_content = event_data["textOutput"]["content"]
-                                    role = event_data["textOutput"]["role"]
-                                    if role == "ASSISTANT":
-                                        logger.info(f"Assistant Message Redacted")
-                                        # here you could log the message for testing
-                                    elif role == "USER":
-                                        logger.info(f"User Message Redacted")
-                                        # here you could log the message for testing
-                                # Handle tool use detection
-                                elif "toolUse" in event_data:
-                                    self.toolUseContent = event_data["toolUse"]
-                                    self.toolName = event_data["toolUse"]["toolName"]
-                                    self.toolUseId = event_data["toolUse"]["toolUseId"]
-                                    logger.info(
-                                        f"Tool use detected: {self.toolName}, ID: {self.toolUseId}"
-                                    )
-
-                                # Process tool use when content ends
-                                elif (
-                                    "contentEnd" in event_data
-                                    and event_data.get("contentEnd", {}).get("type")
-                                    == "TOOL"
-                                ):
-                                    logger.info(
-                                        "Processing tool use and sending result"
-                                    )
-
-                                    # Process the tool use using the registry
-                                    toolResult = await self.processToolUse(
-                                        self.toolName, self.toolUseContent
-                                    )
-
-                                    # Create a unique content name for this tool result
-                                    toolContent = str(uuid.uuid4())
-
-                                    logger.info(f"Tool Use Id {toolContent}")
-
-                                    # Send tool start event
-                                    tool_start_event = {
-                                        "event": {
-                                            "contentStart": {
-                                                "interactive": True,
-                                                "promptName": self.prompt_name,
-                                                "contentName": toolContent,
-                                                "type": "TOOL",
-                                                "role": "TOOL",
-                                                "toolResultInputConfiguration": {
-                                                    "toolUseId": self.toolUseId,
-                                                    "type": "TEXT",
-                                                    "textInputConfiguration": {
-                                                        "mediaType": "text/plain"
-                                                    },
-                                                },
-                                            }
-                                        }
-                                    }
-                                    await self.send_raw_event(
-                                        json.dumps(tool_start_event)
-                                    )
-
-                                    # Send tool result event
-                                    if isinstance(toolResult, dict):
-                                        content_json_string = json.dumps(toolResult)
-                                    else:
-                                        content_json_string = str(toolResult)
-
-                                    # check if tool use resulted in an error that needs to be reported to Sonic
-                                    if isinstance(toolResult, dict):
-                                        content_json_string = json.dumps(toolResult)
-                                        # Simple error check - only if it's a dict and has a status field
-                                        status = "error" if toolResult.get("status") == "error" else "success"
-                                    else:
-                                        content_json_string = str(toolResult)
-                                        status = "success"
-                                    # logger.info(f"Tool result {toolResult} and value of status is {status}")
-
-                                    tool_result_event = {
-                                        "event": {
-                                            "toolResult": {
-                                                "promptName": self.prompt_name,
-                                                "contentName": toolContent,
-                                                "content": content_json_string,
-                                                "status": status,
-                                            }
-                                        }
-                                    }
-                                    await self.send_raw_event(
-                                        json.dumps(tool_result_event)
-                                    )
-
-                                    # Send tool content end event
-                                    tool_content_end_event = {
-                                        "event": {
-                                            "contentEnd": {
-                                                "promptName": self.prompt_name,
-                                                "contentName": toolContent,
-                                            }
-                                        }
-                                    }
-                                    await self.send_raw_event(
-                                        json.dumps(tool_content_end_event)
-                                    )
-
-                            # Put the response in the output queue for forwarding to the frontend
-                            await self.output_queue.put(json_data)
-                        except json.JSONDecodeError:
-                            await self.output_queue.put({"raw_data": response_data})
+                        if self.trace:
+                            self.trace.record_bedrock_output(result.value.bytes_)
+                        await self._route_response(result.value.bytes_)
                 except StopAsyncIteration:
                     # Stream has ended
                     break
@@ -400,7 +735,244 @@ class BedrockStreamManager:
         except Exception as e:
             logger.error(f"Response processing error: {e}")
         finally:
-            self.is_active = False
+            client_registry.release(lease)
+            # A stream replaced by a rollover ends without ending the session
+            if stream_response is self.stream_response:
+                self.is_active = False
+                self.ended.set()
+                # Results can no longer be delivered once the stream is gone
+                for task in list(self.tool_tasks):
+                    task.cancel()
+
+    def register_response_handler(self, event_type, handler):
+        """
+        Register a handler for a Bedrock output event type.
+
+        Only events with a handler are parsed; the handler receives the event
+        body (e.g. the contentStart dict). All other events, notably
+        audioOutput, are passed through to the frontend without being parsed.
+
+        A handler returns None to forward the original payload bytes unchanged,
+        or a replacement event dict to forward instead.
+        """
+        self.response_handlers[event_type] = handler
+
+    async def _route_response(self, payload):
+        """Dispatch one Bedrock output event and queue it for the frontend."""
+        event_type = event_codec.peek_event_type(payload)
+        handler = self.response_handlers.get(event_type)
+
+        # Put the response in the output queue for forwarding to the frontend,
+        # as the original UTF-8 bytes unless a handler replaced it
+        if event_type and handler is None:
+            # Audio still in flight for content the user interrupted is stale
+            if (
+                event_type == "audioOutput"
+                and self.interrupted_content_id
+                and event_codec.peek_string_field(payload, "contentId")
+                == self.interrupted_content_id
+            ):
+                return
+            if event_type == "audioOutput" and (
+                self.awaiting_first_audio or self.user_turn_ended_at is not None
+            ):
+                self._record_response_latency()
+            await self.output_queue.put(payload)
+            return
+
+        try:
+            json_data = json_codec.loads(payload)
+        except (json_codec.JSONDecodeError, UnicodeDecodeError):
+            await self.output_queue.put(
+                {"raw_data": payload.decode("utf-8", errors="replace")}
+            )
+            return
+
+        event_data = json_data.get("event", {})
+        if event_type is None:
+            # Unusual formatting, route on the parsed keys instead
+            event_type = next(iter(event_data), None)
+            handler = self.response_handlers.get(event_type)
+
+        replacement = handler(event_data[event_type]) if handler else None
+        await self.output_queue.put(payload if replacement is None else replacement)
+
+    def _record_response_latency(self):
+        """Observe the latency metrics when the first audio of a response arrives."""
+        now = time.monotonic()
+        if self.awaiting_first_audio and self.first_audio_sent_at is not None:
+            TIME_TO_FIRST_AUDIO.observe(now - self.first_audio_sent_at)
+            self.awaiting_first_audio = False
+        if self.user_turn_ended_at is not None:
+            RESPONSE_LATENCY.observe(now - self.user_turn_ended_at)
+            self.user_turn_ended_at = None
+
+    def _on_content_start(self, content_start):
+        logging.debug("Content start detected")
+        if content_start.get("type") == "AUDIO" and content_start.get("role") == "ASSISTANT":
+            self.assistant_audio_content_id = content_start.get("contentId")
+        self.continuation.observe_content_start(content_start)
+        # Check for speculative content
+        if "additionalModelFields" in content_start:
+            try:
+                additional_fields = json_codec.loads(content_start["additionalModelFields"])
+                if additional_fields.get("generationStage") == "SPECULATIVE":
+                    logging.debug("Speculative content detected")
+            except json_codec.JSONDecodeError:
+                logging.error("Error parsing additionalModelFields", exc_info=True)
+
+    def _on_text_output(self, text_output):
+        # Bedrock signals barge-in with an assistant textOutput of { "interrupted" : true }
+        content = text_output.get("content", "")
+        if '"interrupted"' in content:
+            try:
+                interrupted = json_codec.loads(content).get("interrupted")
+            except (json_codec.JSONDecodeError, AttributeError):
+                interrupted = False
+            if interrupted:
+                self._flush_assistant_audio(self.assistant_audio_content_id)
+                return
+        if text_output.get("role") == "USER":
+            # The user's transcript arrives once Bedrock detected the end of their turn
+            self.user_turn_ended_at = time.monotonic()
+        self.continuation.observe_text_output(text_output)
+
+    def _flush_assistant_audio(self, content_id):
+        """Drop queued audio of interrupted content and tell the frontend to stop playback."""
+        dropped = self.output_queue.discard_audio(content_id)
+        if content_id and content_id == self.interrupted_content_id:
+            # Already flushed when the interruption was first detected
+            return
+
+        self.interrupted_content_id = content_id
+        logger.info(f"Barge-in detected, dropped {dropped} queued audio events")
+        self.output_queue.put_front(
+            {
+                "event": {
+                    "playbackFlush": {
+                        "contentId": content_id,
+                        "droppedEvents": dropped,
+                        "detectedAt": int(time.time() * 1000),
+                    }
+                }
+            }
+        )
+
+    def _on_tool_use(self, tool_use):
+        # Handle tool use detection
+        call = self.tool_calls.add(tool_use)
+        logger.info(f"Tool use detected: {call.tool_name}, ID: {call.tool_use_id}")
+
+    def _on_content_end(self, content_end):
+        content_id = content_end.get("contentId")
+        self.continuation.observe_content_end(content_end)
+        if content_end.get("stopReason") == "INTERRUPTED":
+            self._flush_assistant_audio(content_id)
+        if content_id and content_id == self.interrupted_content_id:
+            # No more audio will arrive for the interrupted content
+            self.interrupted_content_id = None
+        if content_id and content_id == self.assistant_audio_content_id:
+            self.assistant_audio_content_id = None
+
+        # Process tool use when content ends
+        if content_end.get("type") != "TOOL":
+            return
+
+        logger.info("Processing tool use and sending result")
+
+        # Run the tool off the response loop so Bedrock output keeps flowing while it executes
+        call = self.tool_calls.for_content_end(content_end)
+        if call:
+            self._start_tool_task(call)
+        else:
+            logger.warning("Tool contentEnd without a matching toolUse")
+
+    def _start_tool_task(self, call):
+        """Dispatch a tool call as a supervised task that sends its own result events."""
+        self.tool_calls.start(call)
+        task = asyncio.create_task(self._handle_tool_use(call), name=f"tool-{call.tool_name}")
+        self.tool_tasks.add(task)
+        task.add_done_callback(self._on_tool_task_done)
+        return task
+
+    def _on_tool_task_done(self, task):
+        self.tool_tasks.discard(task)
+        if task.cancelled():
+            logger.info("Tool task cancelled")
+        elif task.exception():
+            logger.error(
+                f"Tool task failed: {task.exception()}", exc_info=task.exception()
+            )
+
+    async def _handle_tool_use(self, call):
+        """Run a tool and send its contentStart, toolResult and contentEnd events."""
+        # The result belongs to the stream that requested the tool
+        stream_response = self.stream_response
+
+        # Process the tool use using the registry; Sonic still needs a result if it fails
+        try:
+            toolResult = await self.processToolUse(call.tool_name, call.content)
+        except asyncio.CancelledError:
+            self.tool_calls.finish(call, STATUS_CANCELLED)
+            TOOL_DURATION.observe(call.duration, call.tool_name, STATUS_CANCELLED)
+            raise
+        except Exception as e:
+            logger.error(f"Error processing tool use: {e}", exc_info=True)
+            toolResult = {"status": "error", "error": f"Tool execution failed: {str(e)}"}
+
+        # Create a unique content name for this tool result
+        toolContent = str(uuid.uuid4())
+
+        logger.info(f"Tool Use Id {toolContent}")
+
+        # check if tool use resulted in an error that needs to be reported to Sonic
+        if isinstance(toolResult, dict):
+            content_json_string = json_codec.dumps(toolResult)
+            # Simple error check - only if it's a dict and has a status field
+            status = "error" if toolResult.get("status") == "error" else "success"
+        else:
+            content_json_string = str(toolResult)
+            status = "success"
+        # logger.info(f"Tool result {toolResult} and value of status is {status}")
+        self.tool_calls.finish(call, STATUS_ERROR if status == "error" else STATUS_SUCCESS)
+        TOOL_DURATION.observe(call.duration, call.tool_name, call.status)
+        if self.trace:
+            self.trace.record_tool_result(
+                call.tool_use_id,
+                call.tool_name,
+                content_json_string,
+                isinstance(toolResult, dict),
+                call.duration,
+            )
+
+        await self.stream_ready.wait()
+        if stream_response is not self.stream_response:
+            logger.warning(f"Dropping result of {call.tool_name}, its stream was replaced")
+            return
+
+        # Parallel tool calls must not interleave their result content blocks
+        async with self.tool_result_lock:
+            # Send tool start event
+            await self.send_raw_event(
+                event_codec.tool_content_start_event(
+                    self.prompt_name, toolContent, call.tool_use_id
+                ),
+                stream_response=stream_response,
+            )
+
+            # Send tool result event
+            await self.send_raw_event(
+                event_codec.tool_result_event(
+                    self.prompt_name, toolContent, content_json_string, status
+                ),
+                stream_response=stream_response,
+            )
+
+            # Send tool content end event
+            await self.send_raw_event(
+                event_codec.content_end_event(self.prompt_name, toolContent),
+                stream_response=stream_response,
+            )
 
     async def processToolUse(self, toolName, toolUseContent):
         """Process tool usage using MCP"""
@@ -414,6 +986,13 @@ class BedrockStreamManager:
         return result
 
 
+async def create_stream_manager(model_id, region):
+    """Create a stream manager with an initialized Bedrock stream."""
+    stream_manager = BedrockStreamManager(model_id=model_id, region=region)
+    await stream_manager.initialize_stream()
+    return stream_manager
+
+
 async def websocket_handler(websocket, url, headers=None):
     """Handle WebSocket connections from the frontend with authentication."""
     # Validate the WebSocket connection using Cognito
@@ -426,7 +1005,7 @@ async def websocket_handler(websocket, url, headers=None):
         # Send an authentication error and close the connection
         try:
             await websocket.send(
-                json.dumps({"error": "Authentication failed", "status": "unauthorized"})
+                json_codec.dumps({"error": "Authentication failed", "status": "unauthorized"})
             )
         except:
             pass
@@ -439,7 +1018,7 @@ async def websocket_handler(websocket, url, headers=None):
     # Send authentication success message
     try:
         await websocket.send(
-            json.dumps(
+            json_codec.dumps(
                 {
                     "event": {
                         "connectionStatus": {
@@ -453,24 +1032,82 @@ async def websocket_handler(websocket, url, headers=None):
     except:
         logger.error("Failed to send authentication success message")
 
-    # Create a new stream manager for this connection
-    stream_manager = BedrockStreamManager(
-        model_id="amazon.nova-sonic-v1:0", region="us-east-1"
-    )
+    # Take a pre-warmed stream if one is ready, otherwise open a new one
+    stream_manager = stream_pool.acquire(MODEL_ID, BEDROCK_REGION) if stream_pool else None
+    if stream_manager is None:
+        stream_manager = await create_stream_manager(MODEL_ID, BEDROCK_REGION)
+    session = live_sessions.open(websocket, stream_manager, SESSION_IDLE_TIMEOUT_SECONDS)
+    active_sessions[websocket] = stream_manager
+    try:
+        if SESSION_TRACE_DIR:
+            stream_manager.trace = TraceWriter(
+                os.path.join(SESSION_TRACE_DIR, f"{uuid.uuid4()}.s2strace")
+            )
+
+        # The session ends when the client disconnects, the Bedrock stream ends or
+        # the client goes idle; the session then closes the stream and the connection
+        reason = await session.run(
+            [
+                (END_CLIENT_DISCONNECTED, receive_messages(websocket, session)),
+                (END_CLIENT_DISCONNECTED, forward_responses(websocket, stream_manager)),
+                (END_STREAM_ENDED, wait_stream_ended(stream_manager)),
+            ]
+        )
+        SESSIONS_ENDED.inc(reason)
+        logger.info(f"Session {session.id} ended: {reason}")
+    finally:
+        # Releases the session on paths that never reached run()
+        await session.close()
+        active_sessions.pop(websocket, None)
+        if stream_manager.trace:
+            stream_manager.trace.close()
+        if stream_manager.voice_gate:
+            logger.info(f"Voice activity gate: {stream_manager.voice_gate.stats()}")
 
-    # Initialize the Bedrock stream
-    await stream_manager.initialize_stream()
 
-    # Start a task to forward responses from Bedrock to the WebSocket
-    forward_task = asyncio.create_task(forward_responses(websocket, stream_manager))
+async def receive_messages(websocket, session):
+    """Pass messages from the WebSocket to the session's stream manager until it closes."""
+    stream_manager = session.stream_manager
+    # Sequence number expected on the next binary audio frame
+    next_audio_sequence = None
 
     try:
         async for message in websocket:
+            session.touch()
+            if stream_manager.trace:
+                stream_manager.trace.record(
+                    TRACE_CLIENT_BINARY if isinstance(message, bytes) else TRACE_CLIENT_TEXT,
+                    message,
+                )
             try:
-                data = json.loads(message)
+                # Binary frames carry raw PCM (see audio_frames.py)
+                if isinstance(message, bytes):
+                    content_name, sequence, pcm = decode_audio_frame(message)
+                    if next_audio_sequence is not None and sequence != next_audio_sequence:
+                        logger.warning(
+                            f"Audio frame sequence gap: expected {next_audio_sequence}, got {sequence}"
+                        )
+                    next_audio_sequence = (sequence + 1) & 0xFFFFFFFF
+
+                    await stream_manager.add_audio_chunk(
+                        stream_manager.prompt_name, content_name, bytes(pcm)
+                    )
+                    continue
+
+                data = json_codec.loads(message)
 
                 if "event" in data:
                     event_type = list(data["event"].keys())[0]
+                    if (
+                        event_type == "contentStart"
+                        and data["event"]["contentStart"].get("type") == "AUDIO"
+                        and stream_manager.configure_audio_input(data["event"]["contentStart"])
+                    ):
+                        # Forward (and replay on rollover) the model's input format
+                        message = json_codec.dumps(data)
+                    stream_manager.continuation.observe_client_event(
+                        event_type, data["event"][event_type], message
+                    )
 
                     # Store prompt name and content names if provided
                     if event_type == "promptStart":
@@ -486,6 +1123,21 @@ async def websocket_handler(websocket, url, headers=None):
                         stream_manager.audio_content_name = data["event"][
                             "contentStart"
                         ]["contentName"]
+                        audio_config = data["event"]["contentStart"].get(
+                            "audioInputConfiguration", {}
+                        )
+                        stream_manager.audio_input_sample_rate = audio_config.get(
+                            "sampleRateHertz", 16000
+                        )
+                    # Backend-only session settings, never forwarded to Bedrock
+                    elif event_type == "sessionConfiguration":
+                        coalescing = data["event"]["sessionConfiguration"].get(
+                            "audioCoalescing", {}
+                        )
+                        stream_manager.configure_audio_coalescing(
+                            coalescing.get("targetMs"), coalescing.get("maxDelayMs")
+                        )
+                        continue
 
                     # Handle audio input separately
                     if event_type == "audioInput":
@@ -495,22 +1147,30 @@ async def websocket_handler(websocket, url, headers=None):
                         audio_base64 = data["event"]["audioInput"]["content"]
 
                         # Add to the audio queue
-                        stream_manager.add_audio_chunk(
-                            prompt_name, content_name, audio_base64
+                        await stream_manager.add_audio_chunk(
+                            prompt_name, content_name, base64.b64decode(audio_base64)
                         )
                     else:
-                        # Send other events directly to Bedrock
-                        await stream_manager.send_raw_event(data)
-            except json.JSONDecodeError:
+                        # Send other events directly to Bedrock, reusing the
+                        # client's JSON instead of serializing the dict again
+                        await stream_manager.send_raw_event(message, event_type)
+            except json_codec.JSONDecodeError:
                 logger.error("Invalid JSON received from WebSocket")
+            except AudioFrameError as e:
+                logger.error(f"Invalid audio frame received from WebSocket: {e}")
             except Exception as e:
                 logger.error(f"Error processing WebSocket message: {e}", exc_info=True)
 
     except websockets.exceptions.ConnectionClosed:
         logger.info("WebSocket connection closed")
-    finally:
-        # Clean up the asyncio task
-        forward_task.cancel()
+
+
+async def wait_stream_ended(stream_manager):
+    """Return once the Bedrock stream has ended and its last events were forwarded (up to 2s)."""
+    await stream_manager.ended.wait()
+    deadline = time.monotonic() + 2
+    while not stream_manager.output_queue.empty() and time.monotonic() < deadline:
+        await asyncio.sleep(0.05)
 
 
 async def forward_responses(websocket, stream_manager):
@@ -520,27 +1180,107 @@ async def forward_responses(websocket, stream_manager):
             # Get next response from the output queue
             response = await stream_manager.output_queue.get()
 
-            # Send to WebSocket
+            # Send to WebSocket; Bedrock events are forwarded as their original
+            # UTF-8 bytes in a text frame, without decoding or re-encoding
             try:
-                await websocket.send(json.dumps(response))
+                sent_at = time.perf_counter()
+                if isinstance(response, bytes):
+                    await websocket.send(response, text=True)
+                else:
+                    await websocket.send(json_codec.dumps_bytes(response), text=True)
+                WEBSOCKET_SEND_LATENCY.observe(time.perf_counter() - sent_at)
+
+                if isinstance(response, dict) and "playbackFlush" in response.get("event", {}):
+                    detected_at = response["event"]["playbackFlush"]["detectedAt"]
+                    logger.info(
+                        f"Playback flush sent {int(time.time() * 1000) - detected_at} ms after barge-in"
+                    )
             except websockets.exceptions.ConnectionClosed:
                 break
-    except asyncio.CancelledError:
-        # Task was cancelled
-        pass
     except Exception as e:
         logger.error(f"Error forwarding responses: {e}")
 
 
+async def drain_server(server, timeout):
+    """
+    Stop accepting connections and let active sessions finish, up to timeout seconds.
+
+    Closing the listener also fails the load balancer's TCP health check. Clients
+    are told when the server will close their connection so they can reconnect
+    to another task; sessions still open at the deadline are closed.
+    """
+    global server_draining
+    server_draining = True
+    server.close(close_connections=False)
+
+    deadline = time.monotonic() + timeout
+    logger.info(f"Draining {len(active_sessions)} active sessions for up to {timeout:.0f}s")
+    for stream_manager in active_sessions.values():
+        stream_manager.output_queue.put_front(
+            {
+                "event": {
+                    "serverDraining": {
+                        "closesAt": int((time.time() + timeout) * 1000),
+                        "reason": "Server restarting",
+                    }
+                }
+            }
+        )
+
+    while active_sessions and time.monotonic() < deadline:
+        await asyncio.sleep(0.5)
+
+    if active_sessions:
+        logger.info(f"Drain deadline reached, closing {len(active_sessions)} sessions")
+        await asyncio.gather(
+            *(
+                websocket.close(CloseCode.SERVICE_RESTART, "Server restarting")
+                for websocket in list(active_sessions)
+            ),
+            return_exceptions=True,
+        )
+    await server.wait_closed()
+    logger.info("Drain complete")
+
+
+def session_load():
+    """Open sessions as a fraction of MAX_SESSIONS, 0 without a limit."""
+    return len(active_sessions) / MAX_SESSIONS if MAX_SESSIONS else 0.0
+
+
+def load_report():
+    return metrics.session_load_values(len(active_sessions), MAX_SESSIONS)
+
+
+def admit_connection(connection, request):
+    """
+    process_request hook: refuse connections with HTTP 503 and Retry-After while
+    draining or at MAX_SESSIONS, before the handshake and any Bedrock stream.
+    """
+    if server_draining:
+        reason = "draining"
+    # Connections that completed the handshake, including sessions still being set up
+    elif MAX_SESSIONS and len(connection.server.connections) >= MAX_SESSIONS:
+        reason = "capacity"
+    else:
+        return None
+
+    SESSIONS_REJECTED.inc(reason)
+    logger.debug(f"Refusing connection: {reason}")
+    response = connection.respond(HTTPStatus.SERVICE_UNAVAILABLE, "Server busy, retry later\n")
+    response.headers["Retry-After"] = str(ADMISSION_RETRY_AFTER_SECONDS)
+    return response
+
+
 async def authenticated_handler(websocket, path=None):
     """Simplified handler that handles both path format and attributes"""
     # Debug info
-    logger.info(f"New WebSocket connection with path: {path}")
+    logger.debug(f"New WebSocket connection with path: {path}")
 
     # Try to get path from various attributes
     if hasattr(websocket, "request") and hasattr(websocket.request, "path"):
         path = websocket.request.path
-        logger.info(f"Using path from websocket.request.path: {path}")
+        logger.debug(f"Using path from websocket.request.path: {path}")
 
     # Get headers
     headers = None
@@ -549,6 +1289,11 @@ async def authenticated_handler(websocket, path=None):
     elif hasattr(websocket, "request") and hasattr(websocket.request, "headers"):
         headers = websocket.request.headers
 
+    if server_draining:
+        # The listener is closed, but connections may still be in their handshake
+        await websocket.close(CloseCode.SERVICE_RESTART, "Server restarting")
+        return
+
     # Validate token directly from path
     # First try to extract and validate the token directly
     token = cognito.extract_token_from_url(path) if not RUNNING_IN_DEV_MODE else True
@@ -562,7 +1307,7 @@ async def authenticated_handler(websocket, path=None):
 
             try:
                 await websocket.send(
-                    json.dumps(
+                    json_codec.dumps(
                         {"error": "Authentication failed", "status": "unauthorized"}
                     )
                 )
@@ -579,7 +1324,7 @@ async def authenticated_handler(websocket, path=None):
 
         try:
             await websocket.send(
-                json.dumps(
+                json_codec.dumps(
                     {
                         "error": "Authentication failed - no token provided",
                         "status": "unauthorized",
@@ -590,52 +1335,152 @@ async def authenticated_handler(websocket, path=None):
             logger.error(f"Error sending auth failure message: {e}")
 
 
-async def main():
-    """Main function to run the WebSocket server and MCP server."""
+async def main(worker=None):
+    """
+    Main function to run the WebSocket server and MCP server.
+    worker is the index of this process when running under the workers.Supervisor.
+    """
     mcp_port = int(os.environ.get("MCP_PORT", 8000)) # communicate with MCP on port 80, localhost
+
+    # Health endpoints answer from the start, reporting not ready until set up;
+    # workers share the port like the WebSocket port
+    health_server = None
+    if HEALTH_PORT > 0:
+        health_server = HealthServer("0.0.0.0", HEALTH_PORT, health_state, reuse_port=worker is not None)
+        health_server.start()
     
-    # Start MCP server and wait for it to be ready
-    logger.info(f"Starting MCP server on localhost:{mcp_port}")
-    mcp_task = asyncio.create_task(start_mcp_server(host="127.0.0.1", port=mcp_port))
-    
-    # Wait for MCP server to be ready
-    await asyncio.sleep(2)
+    # Start MCP server and wait for it to be ready; workers call the tools in
+    # process, so one SSE server per task is enough
+    mcp_task = None
+    if not worker:
+        logger.info(f"Starting MCP server on localhost:{mcp_port}")
+        mcp_task = asyncio.create_task(start_mcp_server(host="127.0.0.1", port=mcp_port))
+        
+        # Wait for MCP server to be ready
+        await asyncio.sleep(2)
     
     # Verify MCP server is working
     try:
         tools = await mcp_server.get_tools()
         tools_list = list(tools.values())  # Convert dict to list for len()
         logger.info(f"MCP server ready with {len(tools_list)} tools: {list(tools.keys())}")
+        health_state.mcp_ready = True
     except Exception as e:
         logger.error(f"MCP server failed to start: {e}")
-        mcp_task.cancel()
+        if mcp_task:
+            mcp_task.cancel()
         raise
     
+    try:
+        client_registry.warm(BEDROCK_REGION)
+        health_state.bedrock_ready = True
+    except Exception as e:
+        logger.error(f"Failed to build the Bedrock client: {e}", exc_info=True)
+
+    # Pre-warm Bedrock streams for new connections
+    global stream_pool
+    if STREAM_POOL_SIZE > 0:
+        stream_pool = BedrockStreamPool(
+            create_stream_manager,
+            keys=[(MODEL_ID, BEDROCK_REGION)],
+            size=STREAM_POOL_SIZE,
+            max_idle_age=STREAM_POOL_MAX_IDLE_SECONDS,
+        )
+        stream_pool.start()
+
     # Now start WebSocket server
     port = int(os.environ.get("PORT", 80))
     host = "0.0.0.0"
+
+    metrics_server = None
+    lag_task = None
+    if METRICS_PORT > 0:
+        metrics_port = METRICS_PORT if worker is None else workers.worker_metrics_port(METRICS_PORT, worker)
+        metrics_server = await metrics.start_metrics_server(
+            host, metrics_port, admin=admin_api.respond
+        )
+        lag_task = asyncio.create_task(metrics.monitor_event_loop_lag(EVENT_LOOP_LAG))
+    load_report_task = None
+    # Under a supervisor, it reports the load of the whole task from the workers' metrics;
+    # without metrics each worker reports its own, which Average in CloudWatch combines
+    if LOAD_REPORT_INTERVAL_SECONDS > 0 and (worker is None or METRICS_PORT <= 0):
+        load_report_task = asyncio.create_task(
+            metrics.report_emf(LOAD_METRICS_NAMESPACE, load_report, LOAD_REPORT_INTERVAL_SECONDS)
+        )
     
     logger.info(f"Starting WebSocket server on {host}:{port}")
     
     try:
-        async with websockets.serve(authenticated_handler, host, port):
+        async with websockets.serve(
+            authenticated_handler,
+            host,
+            port,
+            select_subprotocol=select_subprotocol,
+            process_request=admit_connection,
+            ping_interval=WEBSOCKET_PING_INTERVAL_SECONDS or None,
+            ping_timeout=WEBSOCKET_PING_TIMEOUT_SECONDS or None,
+            # Workers bind the same port and the kernel spreads connections over them
+            reuse_port=worker is not None,
+        ) as server:
             logger.info(f"All services running - WebSocket: {port}, MCP: {mcp_port}")
-            await asyncio.Future()  
+
+            # ECS sends SIGTERM when a task is stopped, e.g. by the task rotation
+            stop_requested = asyncio.Event()
+            asyncio.get_running_loop().add_signal_handler(signal.SIGTERM, stop_requested.set)
+            await stop_requested.wait()
+
+            logger.info("SIGTERM received, draining sessions")
+            await drain_server(server, DRAIN_TIMEOUT_SECONDS)
     except Exception as e:
         logger.error(f"Server startup error: {e}", exc_info=True)
         raise
     finally:
         logger.info("Shutting down...")
-        mcp_task.cancel()
-        try:
-            await mcp_task
-        except asyncio.CancelledError:
-            pass
+        if len(live_sessions):
+            logger.warning(f"Sessions not released at shutdown: {live_sessions.snapshot()}")
+        if stream_pool:
+            await stream_pool.stop()
+        if metrics_server:
+            metrics_server.close()
+            lag_task.cancel()
+        if load_report_task:
+            load_report_task.cancel()
+        if health_server:
+            health_server.stop()
+        if mcp_task:
+            mcp_task.cancel()
+            try:
+                await mcp_task
+            except asyncio.CancelledError:
+                pass
+
+def run_worker(index):
+    """Entry point of a worker process."""
+    try:
+        event_loop.run(main(worker=index), EVENT_LOOP)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        # Worker processes exit without running atexit handlers
+        flush_logging()
 
 if __name__ == "__main__":
     # Run the main function
     try:
-        asyncio.run(main())
+        if WORKERS > 1:
+            logger.info(f"Starting {WORKERS} workers")
+            event_loop.run(
+                workers.Supervisor(
+                    run_worker,
+                    WORKERS,
+                    METRICS_PORT,
+                    DRAIN_TIMEOUT_SECONDS,
+                    load_report=(LOAD_METRICS_NAMESPACE, LOAD_REPORT_INTERVAL_SECONDS),
+                ).run(),
+                EVENT_LOOP,
+            )
+        else:
+            event_loop.run(main(), EVENT_LOOP)
     except KeyboardInterrupt:
         logger.info("Server stopped by user")
     except Exception as e:
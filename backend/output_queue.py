@@ -0,0 +1,87 @@
+#
+# Copyright 2025 Amazon.com, Inc. and its affiliates. All Rights Reserved.
+#
+# Licensed under the Amazon Software License (the "License").
+# You may not use this file except in compliance with the License.
+# A copy of the License is located at
+#
+#   http://aws.amazon.com/asl/
+#
+# or in the "license" file accompanying this file. This file is distributed
+# on an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either
+# express or implied. See the License for the specific language governing
+# permissions and limitations under the License.
+#
+
+# output_queue.py
+import asyncio
+import collections
+
+import event_codec
+
+
+class OutputQueue(asyncio.Queue):
+    """
+    Queue of events waiting to be forwarded to the frontend.
+
+    Items are either the original Bedrock payload bytes or event dicts created
+    by the backend. On top of asyncio.Queue it can drop pending assistant audio
+    and put urgent control events ahead of everything else.
+    """
+
+    def _init(self, maxsize):
+        self._queue = collections.deque()
+        # Size of the queued Bedrock payloads; backend events are small and not counted
+        self.queued_bytes = 0
+
+    def _put(self, item):
+        self._queue.append(item)
+        if isinstance(item, bytes):
+            self.queued_bytes += len(item)
+
+    def _get(self):
+        item = self._queue.popleft()
+        if isinstance(item, bytes):
+            self.queued_bytes -= len(item)
+        return item
+
+    def put_front(self, item):
+        """Queue an item ahead of everything already waiting."""
+        self.put_nowait(item)
+        # put_nowait appended it and woke a getter; move it to the front
+        self._queue.appendleft(self._queue.pop())
+
+    def clear(self):
+        """Drop every pending event, e.g. when the session closes."""
+        self._queue.clear()
+        self.queued_bytes = 0
+        self._unfinished_tasks = 0
+        self._finished.set()
+
+    def discard_audio(self, content_id=None):
+        """
+        Drop pending audioOutput events, only those of content_id if given.
+        Returns the number of events dropped.
+        """
+        kept = collections.deque()
+        dropped = 0
+        for item in self._queue:
+            if (
+                isinstance(item, bytes)
+                and event_codec.peek_event_type(item) == "audioOutput"
+                and (
+                    content_id is None
+                    or event_codec.peek_string_field(item, "contentId") == content_id
+                )
+            ):
+                dropped += 1
+                self.queued_bytes -= len(item)
+            else:
+                kept.append(item)
+
+        if dropped:
+            self._queue = kept
+            # Dropped items will never be processed, keep join() accounting right
+            for _ in range(min(dropped, self._unfinished_tasks)):
+                self.task_done()
+        return dropped
@@ -0,0 +1,106 @@
+#
+# Copyright 2025 Amazon.com, Inc. and its affiliates. All Rights Reserved.
+#
+# Licensed under the Amazon Software License (the "License").
+# You may not use this file except in compliance with the License.
+# A copy of the License is located at
+#
+#   http://aws.amazon.com/asl/
+#
+# or in the "license" file accompanying this file. This file is distributed
+# on an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either
+# express or implied. See the License for the specific language governing
+# permissions and limitations under the License.
+#
+
+# resampler.py
+# Streaming polyphase resampler for user audio captured at the client's native
+# rate. Each frame is converted with one vectorized numpy gather and product
+# over the filter phases; the filter state carries over between frames.
+import math
+from functools import lru_cache
+
+import numpy as np
+
+# Formats a client may declare in audioInputConfiguration, by sampleSizeBits
+FORMAT_INT16 = 16  # 16-bit signed little-endian PCM
+FORMAT_FLOAT32 = 32  # 32-bit little-endian float PCM in [-1, 1]
+FORMATS = (FORMAT_INT16, FORMAT_FLOAT32)
+
+# Zero crossings of the windowed sinc on each side, at the lower of the two rates
+FILTER_HALF_WIDTH = 16
+# Cutoff as a fraction of the lower Nyquist frequency
+FILTER_ROLLOFF = 0.9
+KAISER_BETA = 8.0
+
+
+@lru_cache(maxsize=32)
+def design_filter(up, down, half_width=FILTER_HALF_WIDTH, rolloff=FILTER_ROLLOFF):
+    """
+    Windowed sinc low-pass for resampling by up/down, split into its phases.
+
+    Returns the (up, taps per phase) phase matrix and the prototype filter.
+    Sessions with the same rates share the result.
+    """
+    factor = max(up, down)
+    length = 2 * half_width * factor + 1
+    center = (length - 1) / 2
+    taps = np.sinc((np.arange(length) - center) * rolloff / factor) * np.kaiser(length, KAISER_BETA)
+    # Unity gain for every phase once upsampled by up
+    taps *= up / taps.sum()
+
+    taps_per_phase = math.ceil(length / up)
+    padded = np.zeros(taps_per_phase * up)
+    padded[:length] = taps
+    phases = padded.reshape(taps_per_phase, up).T.astype(np.float32)
+    return phases, taps
+
+
+class PolyphaseResampler:
+    """Resamples a stream of mono PCM frames from input_rate to output_rate (int16 out)"""
+
+    def __init__(self, input_rate, output_rate=16000, input_format=FORMAT_INT16):
+        if input_format not in FORMATS:
+            raise ValueError(f"Unsupported sample size: {input_format} bits")
+        if input_rate <= 0 or output_rate <= 0:
+            raise ValueError(f"Invalid sample rates: {input_rate} -> {output_rate}")
+        self.input_rate = input_rate
+        self.output_rate = output_rate
+        self.input_format = input_format
+
+        divisor = math.gcd(input_rate, output_rate)
+        self.up = output_rate // divisor
+        self.down = input_rate // divisor
+        self.phases, taps = design_filter(self.up, self.down)
+        self.taps_per_phase = self.phases.shape[1]
+        # Delay the filter adds, in seconds
+        self.delay = (len(taps) - 1) / 2 / (input_rate * self.up)
+
+        # Input samples the next frame's outputs still reach back to
+        self.history = np.zeros(self.taps_per_phase - 1, dtype=np.float32)
+        self.input_count = 0
+        self.output_count = 0
+        self._tap_offsets = np.arange(self.taps_per_phase)
+
+    def _decode(self, pcm):
+        if self.input_format == FORMAT_FLOAT32:
+            return np.frombuffer(pcm, dtype="<f4") * np.float32(32768)
+        return np.frombuffer(pcm, dtype="<i2").astype(np.float32)
+
+    def process(self, pcm):
+        """Resample one frame; returns 16-bit PCM bytes, possibly empty."""
+        samples = self._decode(pcm)
+        buffer = np.concatenate((self.history, samples))
+        total = self.input_count + len(samples)
+
+        # Outputs whose newest input sample has arrived
+        end = (total * self.up + self.down - 1) // self.down
+        positions = np.arange(self.output_count, end, dtype=np.int64) * self.down
+        newest = positions // self.up - self.input_count + len(self.history)
+        gathered = buffer[newest[:, None] - self._tap_offsets]
+        output = np.einsum("nk,nk->n", gathered, self.phases[positions % self.up])
+
+        self.history = buffer[len(buffer) - len(self.history) :]
+        self.input_count = total
+        self.output_count = end
+        return np.clip(np.rint(output), -32768, 32767).astype("<i2").tobytes()
@@ -0,0 +1,193 @@
+#
+# Copyright 2025 Amazon.com, Inc. and its affiliates. All Rights Reserved.
+#
+# Licensed under the Amazon Software License (the "License").
+# You may not use this file except in compliance with the License.
+# A copy of the License is located at
+#
+#   http://aws.amazon.com/asl/
+#
+# or in the "license" file accompanying this file. This file is distributed
+# on an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either
+# express or implied. See the License for the specific language governing
+# permissions and limitations under the License.
+#
+
+# session_continuation.py
+import collections
+import logging
+import uuid
+
+import json_codec
+from event_codec import encode_event, encode_raw_event
+
+logger = logging.getLogger(__name__)
+
+
+class ConversationHistory:
+    """Recent final transcript of a conversation, kept compact for replay"""
+
+    def __init__(self, max_messages=20, max_chars=8000, max_message_chars=1000):
+        self.max_messages = max_messages
+        self.max_chars = max_chars
+        self.max_message_chars = max_message_chars
+        self.messages = collections.deque()
+
+    def add(self, role, text):
+        text = text.strip()
+        if not text:
+            return
+        # Consecutive pieces of the same turn become one message
+        if self.messages and self.messages[-1][0] == role:
+            self.messages[-1] = (role, f"{self.messages[-1][1]} {text}")
+        else:
+            self.messages.append((role, text))
+        while len(self.messages) > self.max_messages:
+            self.messages.popleft()
+
+    def compacted(self):
+        """The most recent messages, each truncated, within the overall size budget."""
+        result = []
+        total = 0
+        for role, text in reversed(self.messages):
+            if len(text) > self.max_message_chars:
+                # Keep the end of long turns, it is the most relevant part
+                text = text[-self.max_message_chars:]
+            if total + len(text) > self.max_chars:
+                break
+            result.append((role, text))
+            total += len(text)
+        result.reverse()
+        # History replayed into a new stream starts with a user turn
+        while result and result[0][0] != "USER":
+            result.pop(0)
+        return result
+
+    def size(self):
+        return sum(len(text) for _, text in self.messages)
+
+
+class SessionContinuation:
+    """
+    Records what is needed to continue a conversation on a new Bedrock stream:
+    the setup events sent by the client, the tool-enhanced promptStart, the
+    audio contentStart and the recent conversation history.
+    """
+
+    def __init__(self, history=None):
+        self.history = history or ConversationHistory()
+        self.session_start = None
+        self.prompt_start = None
+        self.system_events = []
+        self.audio_content_start = None
+        self._audio_content_name = None
+        self._system_content_name = None
+        self._content_stages = {}
+
+    @property
+    def ready(self):
+        return bool(self.session_start and self.prompt_start and self.audio_content_start)
+
+    def observe_client_event(self, event_type, body, message):
+        """Record a setup event sent by the frontend (message is its original JSON)."""
+        if event_type == "sessionStart":
+            self.session_start = encode_raw_event(event_type, message)
+        elif event_type == "contentStart":
+            if body.get("type") == "AUDIO":
+                self._audio_content_name = body.get("contentName")
+                self.audio_content_start = encode_raw_event(event_type, message)
+            elif body.get("role") == "SYSTEM":
+                self._system_content_name = body.get("contentName")
+                self.system_events = [encode_raw_event(event_type, message)]
+        elif event_type in ("textInput", "contentEnd"):
+            if event_type == "contentEnd" and body.get("contentName") == self._audio_content_name:
+                # Audio input is over, there is nothing left to continue
+                self.audio_content_start = None
+            elif self._system_content_name and body.get("contentName") == self._system_content_name:
+                self.system_events.append(encode_raw_event(event_type, message))
+                if event_type == "contentEnd":
+                    self._system_content_name = None
+
+    def buffered_bytes(self):
+        """Size of the recorded events and history, for memory accounting."""
+        events = [self.session_start, self.prompt_start, self.audio_content_start, *self.system_events]
+        # History is counted in characters, close enough for mostly ASCII text
+        return sum(len(event) for event in events if event) + self.history.size()
+
+    def set_prompt_start(self, prompt_start_event):
+        self.prompt_start = encode_event(prompt_start_event)
+
+    def observe_content_start(self, content_start):
+        """Remember whether Bedrock text content is speculative or final."""
+        if content_start.get("type") != "TEXT":
+            return
+        stage = None
+        if "additionalModelFields" in content_start:
+            try:
+                stage = json_codec.loads(content_start["additionalModelFields"]).get("generationStage")
+            except (json_codec.JSONDecodeError, AttributeError):
+                pass
+        self._content_stages[content_start.get("contentId")] = stage
+
+    def observe_text_output(self, text_output):
+        """Add final user and assistant text to the history."""
+        stage = self._content_stages.get(text_output.get("contentId"))
+        if stage == "SPECULATIVE":
+            return
+        role = text_output.get("role")
+        if role in ("USER", "ASSISTANT"):
+            self.history.add(role, text_output.get("content", ""))
+
+    def observe_content_end(self, content_end):
+        self._content_stages.pop(content_end.get("contentId"), None)
+
+    def replay_events(self, prompt_name):
+        """Events that re-create the conversation on a fresh stream, in send order."""
+        events = [self.session_start, self.prompt_start, *self.system_events]
+
+        for role, text in self.history.compacted():
+            content_name = str(uuid.uuid4())
+            events.append(
+                encode_event(
+                    {
+                        "event": {
+                            "contentStart": {
+                                "promptName": prompt_name,
+                                "contentName": content_name,
+                                "type": "TEXT",
+                                "interactive": False,
+                                "role": role,
+                                "textInputConfiguration": {"mediaType": "text/plain"},
+                            }
+                        }
+                    }
+                )
+            )
+            events.append(
+                encode_event(
+                    {
+                        "event": {
+                            "textInput": {
+                                "promptName": prompt_name,
+                                "contentName": content_name,
+                                "content": text,
+                            }
+                        }
+                    }
+                )
+            )
+            events.append(
+                encode_event(
+                    {
+                        "event": {
+                            "contentEnd": {
+                                "promptName": prompt_name,
+                                "contentName": content_name,
+                            }
+                        }
+                    }
+                )
+            )
+
+        events.append(self.audio_content_start)
+        return events
@@ -0,0 +1,197 @@
+#
+# Copyright 2025 Amazon.com, Inc. and its affiliates. All Rights Reserved.
+#
+# Licensed under the Amazon Software License (the "License").
+# You may not use this file except in compliance with the License.
+# A copy of the License is located at
+#
+#   http://aws.amazon.com/asl/
+#
+# or in the "license" file accompanying this file. This file is distributed
+# on an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either
+# express or implied. See the License for the specific language governing
+# permissions and limitations under the License.
+#
+
+# session_lifecycle.py
+# Ownership of what a WebSocket session holds. The session's tasks run in one
+# TaskGroup; the first to finish ends the session, the others are cancelled,
+# and on every exit path the Bedrock stream, its tasks and queues are released.
+# The registry lists sessions until they are fully released, so leaks show up.
+import asyncio
+import itertools
+import logging
+import time
+import weakref
+
+logger = logging.getLogger(__name__)
+
+STATE_OPEN = "open"
+STATE_CLOSING = "closing"
+
+# Why a session ended
+END_CLIENT_DISCONNECTED = "client_disconnected"
+END_STREAM_ENDED = "stream_ended"
+END_IDLE_TIMEOUT = "idle_timeout"
+END_ERROR = "error"
+END_CANCELLED = "cancelled"
+
+
+class SessionEnded(Exception):
+    """Raised by a session task to end the session's task group."""
+
+    def __init__(self, reason):
+        super().__init__(reason)
+        self.reason = reason
+
+
+class Session:
+    """
+    One WebSocket session and the Bedrock stream manager serving it.
+
+    run() owns the session's tasks until the session ends; close() releases
+    the stream manager and the connection and may be called more than once.
+    """
+
+    def __init__(self, registry, session_id, websocket, stream_manager, idle_timeout=0):
+        self.registry = registry
+        self.id = session_id
+        self.websocket = websocket
+        self.stream_manager = stream_manager
+        self.idle_timeout = idle_timeout
+        self.started_at = time.monotonic()
+        self.last_activity = self.started_at
+        self.state = STATE_OPEN
+        self.end_reason = None
+        self._closed = None
+
+    def touch(self):
+        """Record activity from the client, which holds off the idle timeout."""
+        self.last_activity = time.monotonic()
+
+    async def run(self, tasks):
+        """
+        Run the session's (end reason, coroutine) tasks until the first finishes.
+
+        Returns the reason the session ended once everything is released.
+        """
+        try:
+            async with asyncio.TaskGroup() as group:
+                for reason, coroutine in tasks:
+                    group.create_task(self._until_done(reason, coroutine))
+                if self.idle_timeout > 0:
+                    group.create_task(self._idle_watchdog())
+        except* SessionEnded as ended:
+            self.end_reason = ended.exceptions[0].reason
+        except* Exception as failed:
+            self.end_reason = END_ERROR
+            for e in failed.exceptions:
+                logger.error(f"Session {self.id} task failed: {e}", exc_info=e)
+        finally:
+            if self.end_reason is None:
+                self.end_reason = END_CANCELLED
+            await self.close()
+        return self.end_reason
+
+    async def _until_done(self, reason, coroutine):
+        await coroutine
+        raise SessionEnded(reason)
+
+    async def _idle_watchdog(self):
+        while True:
+            idle = time.monotonic() - self.last_activity
+            if idle >= self.idle_timeout:
+                logger.info(f"Session {self.id} idle for {idle:.0f}s, closing it")
+                raise SessionEnded(END_IDLE_TIMEOUT)
+            await asyncio.sleep(self.idle_timeout - idle)
+
+    async def close(self):
+        if self._closed is None:
+            # Concurrent callers all wait for the one release
+            self._closed = asyncio.ensure_future(self._release())
+        await asyncio.shield(self._closed)
+
+    async def _release(self):
+        self.state = STATE_CLOSING
+        try:
+            await self.stream_manager.close()
+        except Exception as e:
+            logger.info(f"Error closing session {self.id} stream: {e}")
+        self.stream_manager.clear_queues()
+
+        try:
+            if self.end_reason == END_IDLE_TIMEOUT:
+                await self.websocket.close(reason="Session idle")
+            else:
+                await self.websocket.close()
+        except Exception as e:
+            logger.info(f"Error closing session {self.id} connection: {e}")
+
+        self.registry.release(self)
+
+    def snapshot(self):
+        now = time.monotonic()
+        return {
+            "id": self.id,
+            "state": self.state,
+            "ageSeconds": round(now - self.started_at, 1),
+            "idleSeconds": round(now - self.last_activity, 1),
+            "pendingTasks": len(self.stream_manager.pending_tasks()),
+            "memory": self.stream_manager.memory_usage(),
+        }
+
+
+class SessionRegistry:
+    """
+    Sessions from the moment they are opened until everything they hold is
+    released. Stream manager tasks still running after their session was
+    released are kept (weakly) as leaks.
+    """
+
+    def __init__(self):
+        self.sessions = {}
+        self.leaked_tasks = weakref.WeakSet()
+        self._ids = itertools.count(1)
+
+    def open(self, websocket, stream_manager, idle_timeout=0):
+        session = Session(self, next(self._ids), websocket, stream_manager, idle_timeout)
+        self.sessions[session.id] = session
+        return session
+
+    def release(self, session):
+        self.sessions.pop(session.id, None)
+
+        pending = session.stream_manager.pending_tasks()
+        if pending:
+            self.leaked_tasks.update(pending)
+            logger.warning(
+                f"Session {session.id} released with {len(pending)} tasks still running: "
+                f"{[task.get_name() for task in pending]}"
+            )
+
+    def __len__(self):
+        return len(self.sessions)
+
+    def leaked_task_count(self):
+        """Leaked tasks that are still running."""
+        return sum(1 for task in self.leaked_tasks if not task.done())
+
+    def max_idle_seconds(self):
+        """Longest time any live session has gone without client activity."""
+        now = time.monotonic()
+        return max((now - s.last_activity for s in self.sessions.values()), default=0.0)
+
+    def memory_total(self, name):
+        """Sum of one memory_usage() entry over the live sessions."""
+        return sum(s.stream_manager.memory_usage()[name] for s in self.sessions.values())
+
+    def max_buffered_bytes(self):
+        """Largest total of the byte counts in one live session's memory_usage()."""
+        totals = [
+            sum(value for name, value in s.stream_manager.memory_usage().items() if name.endswith("Bytes"))
+            for s in self.sessions.values()
+        ]
+        return max(totals, default=0)
+
+    def snapshot(self):
+        return [session.snapshot() for session in self.sessions.values()]
@@ -0,0 +1,158 @@
+#
+# Copyright 2025 Amazon.com, Inc. and its affiliates. All Rights Reserved.
+#
+# Licensed under the Amazon Software License (the "License").
+# You may not use this file except in compliance with the License.
+# A copy of the License is located at
+#
+#   http://aws.amazon.com/asl/
+#
+# or in the "license" file accompanying this file. This file is distributed
+# on an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either
+# express or implied. See the License for the specific language governing
+# permissions and limitations under the License.
+#
+
+# session_trace.py
+# Binary trace of one session, recorded at the websocket_handler /
+# BedrockStreamManager boundary and replayed by loadtest/replay.py.
+#
+# A trace is the 8 byte magic, a version byte, then records of:
+#   kind        u8
+#   offset_us   u64, microseconds since the trace started
+#   length      u32
+#   payload     length bytes, stored as received (binary audio frames stay raw PCM)
+# Bedrock audioOutput events are stored with their base64 content decoded, a
+# quarter smaller, and read back byte for byte as received.
+import base64
+import binascii
+import json
+import logging
+import struct
+import time
+
+import event_codec
+
+logger = logging.getLogger(__name__)
+
+TRACE_MAGIC = b"S2STRACE"
+TRACE_VERSION = 1
+
+TRACE_CLIENT_TEXT = 1  # JSON message from the frontend
+TRACE_CLIENT_BINARY = 2  # Binary audio frame from the frontend
+TRACE_BEDROCK_OUTPUT = 3  # Bedrock output event payload
+TRACE_TOOL_RESULT = 4  # JSON: toolUseId, toolName, content, json, durationMs
+TRACE_BEDROCK_AUDIO = 5  # Bedrock audioOutput event with its content as raw bytes
+
+_RECORD_HEADER = struct.Struct("!BQI")
+_LENGTH = struct.Struct("!I")
+_CONTENT_KEY = b'"content":"'
+
+
+class TraceFormatError(ValueError):
+    """Raised for files that are not a supported session trace"""
+
+
+class TraceWriter:
+    """Appends records of one session to a trace file"""
+
+    def __init__(self, path):
+        self.path = path
+        self.file = open(path, "wb", buffering=1024 * 1024)
+        self.file.write(TRACE_MAGIC + bytes((TRACE_VERSION,)))
+        self.started = time.monotonic()
+        self.records = 0
+
+    def record(self, kind, payload):
+        if self.file is None:
+            return
+        if isinstance(payload, str):
+            payload = payload.encode("utf-8")
+        offset_us = int((time.monotonic() - self.started) * 1_000_000)
+        self.file.write(_RECORD_HEADER.pack(kind, offset_us, len(payload)))
+        self.file.write(payload)
+        self.records += 1
+
+    def record_bedrock_output(self, payload):
+        """Record a Bedrock output event, storing audio content without its base64 overhead."""
+        if event_codec.peek_event_type(payload) == "audioOutput":
+            start = payload.find(_CONTENT_KEY)
+            if start >= 0:
+                start += len(_CONTENT_KEY)
+                end = payload.find(b'"', start)
+                try:
+                    audio = base64.b64decode(payload[start:end], validate=True) if end > 0 else None
+                except binascii.Error:
+                    audio = None
+                if audio is not None:
+                    head, tail = payload[:start], payload[end:]
+                    self.record(
+                        TRACE_BEDROCK_AUDIO,
+                        b"".join(
+                            (_LENGTH.pack(len(head)), head, _LENGTH.pack(len(tail)), tail, audio)
+                        ),
+                    )
+                    return
+        self.record(TRACE_BEDROCK_OUTPUT, payload)
+
+    def record_tool_result(self, tool_use_id, tool_name, content, is_json, duration):
+        self.record(
+            TRACE_TOOL_RESULT,
+            json.dumps(
+                {
+                    "toolUseId": tool_use_id,
+                    "toolName": tool_name,
+                    "content": content,
+                    "json": is_json,
+                    "durationMs": round((duration or 0) * 1000, 3),
+                }
+            ),
+        )
+
+    def close(self):
+        if self.file is None:
+            return
+        self.file.close()
+        self.file = None
+        logger.info(f"Wrote session trace {self.path} with {self.records} records")
+
+
+def _restore_audio_output(payload):
+    head_length = _LENGTH.unpack_from(payload)[0]
+    head_end = _LENGTH.size + head_length
+    tail_length = _LENGTH.unpack_from(payload, head_end)[0]
+    tail_end = head_end + _LENGTH.size + tail_length
+    return b"".join(
+        (
+            payload[_LENGTH.size : head_end],
+            base64.b64encode(payload[tail_end:]),
+            payload[head_end + _LENGTH.size : tail_end],
+        )
+    )
+
+
+def read_trace(path):
+    """
+    Yield (kind, offset in seconds, payload bytes) for each record of a trace file.
+    Audio output records are returned as the TRACE_BEDROCK_OUTPUT events they were.
+    """
+    with open(path, "rb") as trace:
+        header = trace.read(len(TRACE_MAGIC) + 1)
+        if header[: len(TRACE_MAGIC)] != TRACE_MAGIC:
+            raise TraceFormatError(f"{path} is not a session trace")
+        if header[-1] != TRACE_VERSION:
+            raise TraceFormatError(f"Unsupported trace version {header[-1]}")
+
+        while True:
+            record_header = trace.read(_RECORD_HEADER.size)
+            if not record_header:
+                return
+            if len(record_header) < _RECORD_HEADER.size:
+                raise TraceFormatError(f"{path} is truncated")
+            kind, offset_us, length = _RECORD_HEADER.unpack(record_header)
+            payload = trace.read(length)
+            if len(payload) < length:
+                raise TraceFormatError(f"{path} is truncated")
+            if kind == TRACE_BEDROCK_AUDIO:
+                kind, payload = TRACE_BEDROCK_OUTPUT, _restore_audio_output(payload)
+            yield kind, offset_us / 1_000_000, payload
@@ -0,0 +1,157 @@
+#
+# Copyright 2025 Amazon.com, Inc. and its affiliates. All Rights Reserved.
+#
+# Licensed under the Amazon Software License (the "License").
+# You may not use this file except in compliance with the License.
+# A copy of the License is located at
+#
+#   http://aws.amazon.com/asl/
+#
+# or in the "license" file accompanying this file. This file is distributed
+# on an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either
+# express or implied. See the License for the specific language governing
+# permissions and limitations under the License.
+#
+
+# stream_pool.py
+import asyncio
+import collections
+import logging
+import time
+
+logger = logging.getLogger(__name__)
+
+
+class PooledStream:
+    """An initialized stream manager waiting in the pool"""
+
+    __slots__ = ("manager", "created_at")
+
+    def __init__(self, manager):
+        self.manager = manager
+        self.created_at = time.monotonic()
+
+
+class BedrockStreamPool:
+    """
+    Keeps a few initialized Bedrock bidirectional streams ready per (model, region)
+    so new connections skip stream setup.
+
+    create_stream is an async callable taking (model_id, region) and returning an
+    initialized stream manager. Streams older than max_idle_age seconds, or whose
+    stream was closed by Bedrock, are discarded and replaced.
+    """
+
+    def __init__(self, create_stream, keys, size=2, max_idle_age=20.0, replenish_interval=1.0):
+        self.create_stream = create_stream
+        self.keys = list(keys)
+        self.size = size
+        self.max_idle_age = max_idle_age
+        self.replenish_interval = replenish_interval
+        self.pools = {key: collections.deque() for key in self.keys}
+        # Unusable streams taken out by acquire(), closed by the replenish loop
+        self._stale = []
+        self.hits = 0
+        self.misses = 0
+        self._replenish_needed = asyncio.Event()
+        self._task = None
+
+    def start(self):
+        if self._task is None:
+            self._task = asyncio.create_task(self._replenish_loop())
+        logger.info(
+            f"Stream pool started: {self.size} streams per key, max idle {self.max_idle_age}s"
+        )
+
+    async def stop(self):
+        if self._task:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+        await self._discard_stale()
+        for pool in self.pools.values():
+            while pool:
+                await self._discard(pool.popleft())
+
+    def acquire(self, model_id, region):
+        """Take a ready stream manager from the pool, or None if none is available."""
+        pool = self.pools.get((model_id, region))
+        manager = None
+        while pool:
+            pooled = pool.popleft()
+            if self._usable(pooled):
+                manager = pooled.manager
+                break
+            self._stale.append(pooled)
+
+        if manager:
+            self.hits += 1
+        else:
+            self.misses += 1
+        self._replenish_needed.set()
+        return manager
+
+    def _usable(self, pooled):
+        return (
+            pooled.manager.is_active
+            and time.monotonic() - pooled.created_at < self.max_idle_age
+        )
+
+    async def _discard(self, pooled):
+        try:
+            await pooled.manager.close()
+        except Exception as e:
+            logger.info(f"Error closing pooled stream: {e}")
+
+    async def _discard_stale(self):
+        while self._stale:
+            await self._discard(self._stale.pop())
+
+    async def _replenish_loop(self):
+        while True:
+            try:
+                await self._replenish()
+            except Exception as e:
+                # Keep refilling on the next pass rather than leaving the pool empty
+                logger.error(f"Stream pool replenish failed: {e}", exc_info=True)
+
+            self._replenish_needed.clear()
+            try:
+                await asyncio.wait_for(
+                    self._replenish_needed.wait(), self.replenish_interval
+                )
+            except asyncio.TimeoutError:
+                pass
+
+    async def _replenish(self):
+        # Take out streams that expired or were closed while idle before awaiting
+        # anything, as acquire() may take from the pools meanwhile
+        for pool in self.pools.values():
+            stale = [p for p in pool if not self._usable(p)]
+            if stale:
+                self._stale.extend(stale)
+                usable = [p for p in pool if p not in stale]
+                pool.clear()
+                pool.extend(usable)
+        await self._discard_stale()
+
+        for key, pool in self.pools.items():
+            missing = self.size - len(pool)
+            if missing <= 0:
+                continue
+            results = await asyncio.gather(
+                *(self.create_stream(*key) for _ in range(missing)),
+                return_exceptions=True,
+            )
+            for result in results:
+                if isinstance(result, BaseException):
+                    logger.error(f"Failed to pre-warm stream for {key}: {result}")
+                else:
+                    pool.append(PooledStream(result))
+
+    def stats(self):
+        return {
+            "ready": {f"{m}/{r}": len(p) for (m, r), p in self.pools.items()},
+            "hits": self.hits,
+            "misses": self.misses,
+        }
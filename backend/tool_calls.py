@@ -0,0 +1,109 @@
+#
+# Copyright 2025 Amazon.com, Inc. and its affiliates. All Rights Reserved.
+#
+# Licensed under the Amazon Software License (the "License").
+# You may not use this file except in compliance with the License.
+# A copy of the License is located at
+#
+#   http://aws.amazon.com/asl/
+#
+# or in the "license" file accompanying this file. This file is distributed
+# on an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either
+# express or implied. See the License for the specific language governing
+# permissions and limitations under the License.
+#
+
+# tool_calls.py
+import logging
+import time
+
+logger = logging.getLogger(__name__)
+
+STATUS_PENDING = "pending"  # toolUse received, waiting for its contentEnd
+STATUS_RUNNING = "running"
+STATUS_SUCCESS = "success"
+STATUS_ERROR = "error"
+STATUS_CANCELLED = "cancelled"
+
+
+class ToolCall:
+    """A single tool use requested by the model"""
+
+    __slots__ = (
+        "tool_use_id",
+        "tool_name",
+        "content",
+        "content_id",
+        "status",
+        "received_at",
+        "started_at",
+        "finished_at",
+    )
+
+    def __init__(self, tool_use):
+        self.tool_use_id = tool_use["toolUseId"]
+        self.tool_name = tool_use["toolName"]
+        self.content = tool_use
+        self.content_id = tool_use.get("contentId")
+        self.status = STATUS_PENDING
+        self.received_at = time.monotonic()
+        self.started_at = None
+        self.finished_at = None
+
+    @property
+    def duration(self):
+        """Execution time in seconds, None until the call has finished."""
+        if self.started_at is None or self.finished_at is None:
+            return None
+        return self.finished_at - self.started_at
+
+
+class ToolCallTable:
+    """In-flight tool calls of one session, keyed by toolUseId"""
+
+    def __init__(self):
+        self.calls = {}
+
+    def add(self, tool_use):
+        """Record a toolUse event and return its ToolCall."""
+        call = ToolCall(tool_use)
+        if call.tool_use_id in self.calls:
+            logger.warning(f"Duplicate toolUse event for ID: {call.tool_use_id}")
+        self.calls[call.tool_use_id] = call
+        return call
+
+    def for_content_end(self, content_end):
+        """
+        Find the pending call a TOOL contentEnd closes.
+
+        Calls are matched by contentId; if the event carries none, the oldest
+        pending call is used.
+        """
+        content_id = content_end.get("contentId")
+        pending = [c for c in self.calls.values() if c.status == STATUS_PENDING]
+        for call in pending:
+            if content_id and call.content_id == content_id:
+                return call
+        return pending[0] if pending else None
+
+    def start(self, call):
+        call.status = STATUS_RUNNING
+        call.started_at = time.monotonic()
+
+    def finish(self, call, status):
+        """Mark a call as done and remove it from the table."""
+        call.status = status
+        call.finished_at = time.monotonic()
+        if call.started_at is None:
+            call.started_at = call.finished_at
+        self.calls.pop(call.tool_use_id, None)
+        logger.info(
+            f"Tool {call.tool_name} ({call.tool_use_id}) finished with status "
+            f"{status} in {call.duration * 1000:.0f} ms"
+        )
+
+    def in_flight(self):
+        return [c for c in self.calls.values() if c.status == STATUS_RUNNING]
+
+    def __len__(self):
+        return len(self.calls)
@@ -0,0 +1,165 @@
+#
+# Copyright 2025 Amazon.com, Inc. and its affiliates. All Rights Reserved.
+#
+# Licensed under the Amazon Software License (the "License").
+# You may not use this file except in compliance with the License.
+# A copy of the License is located at
+#
+#   http://aws.amazon.com/asl/
+#
+# or in the "license" file accompanying this file. This file is distributed
+# on an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either
+# express or implied. See the License for the specific language governing
+# permissions and limitations under the License.
+#
+
+# vad.py
+# Voice activity gate for user audio on its way to Bedrock. Frames are
+# classified by energy and zero-crossing rate; long silences are replaced by
+# sparse keep-alive frames, with pre-roll and hangover audio kept around speech.
+import collections
+
+import numpy as np
+
+# Length of the analysis windows a frame is split into
+WINDOW_MS = 16
+
+
+class VadConfig:
+    """Thresholds and windows of the voice activity gate"""
+
+    def __init__(
+        self,
+        energy_threshold_db=-45.0,
+        zcr_threshold=0.25,
+        weak_energy_margin_db=10.0,
+        pre_roll_ms=300,
+        hangover_ms=1500,
+        keepalive_interval_ms=1000,
+    ):
+        # Windows at least this loud (dBFS) are speech
+        self.energy_threshold_db = energy_threshold_db
+        # Quieter windows, down to the margin below the threshold, are speech
+        # when they cross zero this often per sample, like unvoiced consonants
+        self.zcr_threshold = zcr_threshold
+        self.weak_energy_margin_db = weak_energy_margin_db
+        # Silence sent before the first speech frame, so onsets are not clipped
+        self.pre_roll_ms = pre_roll_ms
+        # Silence still sent after speech; must cover the model's end-of-turn
+        # detection, which only sees the silence it is sent
+        self.hangover_ms = hangover_ms
+        # One frame per interval is still sent during long silences
+        self.keepalive_interval_ms = keepalive_interval_ms
+
+
+def frame_is_speech(pcm, sample_rate, config):
+    """True if any analysis window of 16-bit mono PCM looks like speech."""
+    samples = np.frombuffer(pcm, dtype="<i2")
+    window = max(sample_rate * WINDOW_MS // 1000, 1)
+    count = len(samples) // window
+    if count == 0:
+        windows = samples.reshape(1, -1)
+    else:
+        # Trailing samples that do not fill a window are left out
+        windows = samples[: count * window].reshape(count, window)
+    if windows.shape[1] == 0:
+        return False
+
+    floats = windows.astype(np.float32)
+    rms = np.sqrt(np.mean(floats * floats, axis=1))
+    energy_db = 20 * np.log10(np.maximum(rms, 1.0) / 32768.0)
+    signs = np.signbit(windows)
+    zcr = np.count_nonzero(signs[:, 1:] != signs[:, :-1], axis=1) / windows.shape[1]
+
+    loud = energy_db >= config.energy_threshold_db
+    fricative = (energy_db >= config.energy_threshold_db - config.weak_energy_margin_db) & (
+        zcr >= config.zcr_threshold
+    )
+    return bool(np.any(loud | fricative))
+
+
+class VoiceActivityGate:
+    """
+    Decides which frames of one session's user audio are sent to Bedrock.
+
+    process() takes each PCM frame as it arrives and returns the frames to send
+    now: nothing while silent, the held pre-roll plus the frame at a speech
+    onset, every frame during speech and the hangover after it, and one frame
+    per keep-alive interval in long silences.
+    """
+
+    def __init__(self, config):
+        self.config = config
+        self.speaking = False
+        self.hangover_left_ms = 0.0
+        self.since_keepalive_ms = 0.0
+        self.pre_roll = collections.deque()
+        self.pre_roll_ms = 0.0
+
+        # Counters
+        self.forwarded_bytes = 0
+        self.suppressed_bytes = 0
+        self.keepalive_frames = 0
+
+    def reset(self):
+        """Start over, e.g. for a new audio content; held pre-roll is dropped."""
+        self.suppressed_bytes += sum(len(frame) for frame, _ in self.pre_roll)
+        self.pre_roll.clear()
+        self.pre_roll_ms = 0.0
+        self.speaking = False
+        self.hangover_left_ms = 0.0
+        self.since_keepalive_ms = 0.0
+
+    def process(self, pcm, sample_rate):
+        frame_ms = len(pcm) * 1000 / (sample_rate * 2)
+
+        if frame_is_speech(pcm, sample_rate, self.config):
+            frames = [frame for frame, _ in self.pre_roll] if not self.speaking else []
+            frames.append(pcm)
+            self.pre_roll.clear()
+            self.pre_roll_ms = 0.0
+            self.speaking = True
+            self.hangover_left_ms = self.config.hangover_ms
+            self.since_keepalive_ms = 0.0
+            self.forwarded_bytes += sum(len(frame) for frame in frames)
+            return frames
+
+        if self.speaking:
+            self.hangover_left_ms -= frame_ms
+            if self.hangover_left_ms <= 0:
+                self.speaking = False
+            self.forwarded_bytes += len(pcm)
+            return [pcm]
+
+        self.since_keepalive_ms += frame_ms
+        if self.since_keepalive_ms >= self.config.keepalive_interval_ms:
+            # The frame itself, so the keep-alive carries the real background noise;
+            # held pre-roll is older than it and can no longer be sent in order
+            self.suppressed_bytes += sum(len(frame) for frame, _ in self.pre_roll)
+            self.pre_roll.clear()
+            self.pre_roll_ms = 0.0
+            self.since_keepalive_ms = 0.0
+            self.keepalive_frames += 1
+            self.forwarded_bytes += len(pcm)
+            return [pcm]
+
+        self.pre_roll.append((pcm, frame_ms))
+        self.pre_roll_ms += frame_ms
+        while self.pre_roll and self.pre_roll_ms - self.pre_roll[0][1] >= self.config.pre_roll_ms:
+            frame, held_ms = self.pre_roll.popleft()
+            self.pre_roll_ms -= held_ms
+            self.suppressed_bytes += len(frame)
+        return []
+
+    def held_bytes(self):
+        """Pre-roll audio held back until speech starts."""
+        return sum(len(frame) for frame, _ in self.pre_roll)
+
+    def stats(self):
+        total = self.forwarded_bytes + self.suppressed_bytes
+        return {
+            "forwardedBytes": self.forwarded_bytes,
+            "suppressedBytes": self.suppressed_bytes,
+            "keepaliveFrames": self.keepalive_frames,
+            "suppressedRatio": round(self.suppressed_bytes / total, 3) if total else 0.0,
+        }
@@ -0,0 +1,312 @@
+#
+# Copyright 2025 Amazon.com, Inc. and its affiliates. All Rights Reserved.
+#
+# Licensed under the Amazon Software License (the "License").
+# You may not use this file except in compliance with the License.
+# A copy of the License is located at
+#
+#   http://aws.amazon.com/asl/
+#
+# or in the "license" file accompanying this file. This file is distributed
+# on an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either
+# express or implied. See the License for the specific language governing
+# permissions and limitations under the License.
+#
+
+# workers.py
+# Supervisor for running the backend as several worker processes that share
+# the WebSocket port through SO_REUSEPORT, each with its own event loop and
+# Bedrock clients.
+import asyncio
+import logging
+import multiprocessing
+import signal
+import time
+
+import metrics
+
+logger = logging.getLogger(__name__)
+
+# How often workers are checked, and how many failed checks in a row get one restarted
+HEALTH_CHECK_INTERVAL_SECONDS = 5
+HEALTH_CHECK_MAX_FAILURES = 3
+# Workers that exit sooner than this after starting are restarted with a delay
+MIN_WORKER_UPTIME_SECONDS = 10
+
+
+def worker_metrics_port(metrics_port, index):
+    """Each worker serves its metrics on its own port; the supervisor takes metrics_port."""
+    return metrics_port + 1 + index
+
+
+async def _http_get(port, path, timeout):
+    reader, writer = await asyncio.wait_for(asyncio.open_connection("127.0.0.1", port), timeout)
+    try:
+        writer.write(f"GET {path} HTTP/1.1\r\nHost: localhost\r\nConnection: close\r\n\r\n".encode("latin-1"))
+        await writer.drain()
+        response = await asyncio.wait_for(reader.read(), timeout)
+    finally:
+        writer.close()
+    head, _, body = response.partition(b"\r\n\r\n")
+    status = int(head.split(b" ", 2)[1]) if head.startswith(b"HTTP/") else 0
+    return status, body.decode("utf-8")
+
+
+# Gauges recomputed from the summed sessions and limits of the workers
+SESSION_LOAD_METRIC = "nova_s2s_session_load"
+_HISTOGRAM_SUFFIXES = ("_bucket", "_sum", "_count")
+
+
+def _parse_metrics(text):
+    """Returns ({name: type}, {name: HELP line}, [(series, value)]) of a Prometheus text output."""
+    types = {}
+    helps = {}
+    samples = []
+    for line in text.splitlines():
+        if line.startswith("# "):
+            parts = line.split(" ", 3)
+            if len(parts) >= 4 and parts[1] == "TYPE":
+                types[parts[2]] = parts[3]
+            elif len(parts) >= 3 and parts[1] == "HELP":
+                helps[parts[2]] = line
+        elif line:
+            series, _, value = line.rpartition(" ")
+            samples.append((series, float(value)))
+    return types, helps, samples
+
+
+def _metric_name(series, types):
+    """The metric a series belongs to; histogram samples belong to their base name."""
+    name = series.split("{", 1)[0]
+    if name not in types:
+        for suffix in _HISTOGRAM_SUFFIXES:
+            if name.endswith(suffix) and name[: -len(suffix)] in types:
+                return name[: -len(suffix)]
+    return name
+
+
+def _with_label(series, name, value):
+    if series.endswith("}"):
+        return f'{series[:-1]},{name}="{value}"}}'
+    return f'{series}{{{name}="{value}"}}'
+
+
+def _format_sample(series, value):
+    return f"{series} {int(value) if value.is_integer() else repr(value)}"
+
+
+def session_totals(texts):
+    """Open sessions and session limits summed over the workers' metrics; a limit of 0 means none."""
+    active = 0.0
+    limit = 0.0
+    unlimited = False
+    for text in texts:
+        _, _, samples = _parse_metrics(text)
+        values = dict(samples)
+        if "nova_s2s_max_sessions" not in values:
+            # Worker not answering, e.g. restarting
+            continue
+        active += values.get("nova_s2s_active_sessions", 0.0)
+        worker_limit = values["nova_s2s_max_sessions"]
+        unlimited |= worker_limit == 0
+        limit += worker_limit
+    return active, 0.0 if unlimited else limit
+
+
+def merge_metrics(texts):
+    """
+    Combine the Prometheus text outputs of the workers, given in worker order,
+    by metric type: counters and histograms are summed (histogram buckets
+    remain valid), gauges named max_ take the largest worker's value, the
+    session load is recomputed from the summed sessions and limits, and other
+    gauges are kept per worker with a worker label.
+    """
+    types = {}
+    helps = {}
+    # metric name -> {series: value}, in order of first appearance
+    merged = {}
+    for index, text in enumerate(texts):
+        worker_types, worker_helps, samples = _parse_metrics(text)
+        types.update(worker_types)
+        helps.update(worker_helps)
+        for series, value in samples:
+            name = _metric_name(series, types)
+            kind = types.get(name, "untyped")
+            values = merged.setdefault(name, {})
+            if kind in ("counter", "histogram"):
+                values[series] = values.get(series, 0.0) + value
+            elif "max_" in name:
+                values[series] = max(values.get(series, value), value)
+            elif name != SESSION_LOAD_METRIC:
+                values[_with_label(series, "worker", index)] = value
+
+    if SESSION_LOAD_METRIC in types:
+        active, limit = session_totals(texts)
+        merged[SESSION_LOAD_METRIC] = {SESSION_LOAD_METRIC: active / limit if limit else 0.0}
+
+    lines = []
+    for name, values in merged.items():
+        if name in helps:
+            lines.append(helps[name])
+        lines.append(f"# TYPE {name} {types.get(name, 'untyped')}")
+        lines.extend(_format_sample(series, value) for series, value in values.items())
+    return "\n".join(lines) + "\n"
+
+
+class Worker:
+    """One worker process and its health"""
+
+    def __init__(self, index):
+        self.index = index
+        self.process = None
+        self.started_at = None
+        self.failed_checks = 0
+        self.restarts = 0
+        # When a worker that exited may be started again, None while it runs
+        self.restart_not_before = None
+
+
+class Supervisor:
+    """
+    Starts count worker processes running target(index), restarts them when
+    they die or stop answering health checks, serves the metrics of all
+    workers merged on metrics_port and forwards SIGTERM so every worker drains.
+    load_report, a (namespace, interval) pair, reports the session load of all
+    workers as one EMF record per interval; it needs the workers' metrics.
+    """
+
+    def __init__(self, target, count, metrics_port=0, drain_timeout=90, load_report=None):
+        self.target = target
+        self.load_report = load_report
+        self.workers = [Worker(index) for index in range(count)]
+        self.metrics_port = metrics_port
+        self.drain_timeout = drain_timeout
+        # Spawned workers start from a fresh interpreter rather than a copy of
+        # this process, its logging thread and any event loop state
+        self.context = multiprocessing.get_context("spawn")
+        self.stopping = False
+
+    def _start(self, worker):
+        worker.process = self.context.Process(
+            target=self.target, args=(worker.index,), name=f"worker-{worker.index}", daemon=False
+        )
+        worker.process.start()
+        worker.started_at = time.monotonic()
+        worker.failed_checks = 0
+        worker.restart_not_before = None
+        logger.info(f"Started worker {worker.index} (pid {worker.process.pid})")
+
+    async def _check(self, worker):
+        if not worker.process.is_alive():
+            now = time.monotonic()
+            if worker.restart_not_before is None:
+                logger.error(f"Worker {worker.index} exited with code {worker.process.exitcode}")
+                worker.restart_not_before = now
+                if now - worker.started_at < MIN_WORKER_UPTIME_SECONDS:
+                    # Crashing at startup, don't restart in a tight loop; the other
+                    # workers are still checked meanwhile
+                    worker.restart_not_before += MIN_WORKER_UPTIME_SECONDS
+            if now >= worker.restart_not_before:
+                worker.restarts += 1
+                self._start(worker)
+            return
+
+        # A worker whose event loop is stuck stops answering its metrics endpoint
+        if not self.metrics_port or time.monotonic() - worker.started_at < MIN_WORKER_UPTIME_SECONDS:
+            return
+        try:
+            status, _ = await _http_get(
+                worker_metrics_port(self.metrics_port, worker.index), "/metrics", timeout=2
+            )
+            healthy = status == 200
+        except (OSError, asyncio.TimeoutError):
+            healthy = False
+
+        worker.failed_checks = 0 if healthy else worker.failed_checks + 1
+        if worker.failed_checks >= HEALTH_CHECK_MAX_FAILURES:
+            logger.error(f"Worker {worker.index} failed {worker.failed_checks} health checks, restarting it")
+            worker.process.kill()
+            await asyncio.to_thread(worker.process.join)
+            worker.restarts += 1
+            self._start(worker)
+
+    async def _scrape_workers(self):
+        """Metrics text of every worker, in worker order; empty for workers not answering."""
+        async def scrape(worker):
+            try:
+                _, body = await _http_get(
+                    worker_metrics_port(self.metrics_port, worker.index), "/metrics", timeout=2
+                )
+                return body
+            except (OSError, asyncio.TimeoutError):
+                return ""
+
+        return await asyncio.gather(*(scrape(worker) for worker in self.workers))
+
+    async def _load_values(self):
+        active, limit = session_totals(await self._scrape_workers())
+        return metrics.session_load_values(active, limit)
+
+    async def _render_metrics(self):
+        texts = await self._scrape_workers()
+        alive = sum(1 for worker in self.workers if worker.process and worker.process.is_alive())
+        restarts = sum(worker.restarts for worker in self.workers)
+        return merge_metrics(texts) + (
+            "# HELP nova_s2s_workers_alive Worker processes running\n"
+            "# TYPE nova_s2s_workers_alive gauge\n"
+            f"nova_s2s_workers_alive {alive}\n"
+            "# HELP nova_s2s_worker_restarts_total Workers restarted after exiting or failing health checks\n"
+            "# TYPE nova_s2s_worker_restarts_total counter\n"
+            f"nova_s2s_worker_restarts_total {restarts}\n"
+        )
+
+    async def _stop(self):
+        logger.info("Stopping workers")
+        for worker in self.workers:
+            if worker.process.is_alive():
+                worker.process.terminate()  # SIGTERM, the worker drains its sessions
+
+        deadline = time.monotonic() + self.drain_timeout + 10
+        for worker in self.workers:
+            await asyncio.to_thread(worker.process.join, max(deadline - time.monotonic(), 0))
+            if worker.process.is_alive():
+                logger.warning(f"Worker {worker.index} did not stop in time, killing it")
+                worker.process.kill()
+                await asyncio.to_thread(worker.process.join)
+
+    async def run(self):
+        stop_requested = asyncio.Event()
+        loop = asyncio.get_running_loop()
+        for signum in (signal.SIGTERM, signal.SIGINT):
+            loop.add_signal_handler(signum, stop_requested.set)
+
+        for worker in self.workers:
+            self._start(worker)
+
+        metrics_server = None
+        load_report_task = None
+        if self.metrics_port:
+            metrics_server = await metrics.start_metrics_server(
+                "0.0.0.0", self.metrics_port, render=self._render_metrics
+            )
+            if self.load_report and self.load_report[1] > 0:
+                namespace, interval = self.load_report
+                load_report_task = asyncio.create_task(
+                    metrics.report_emf(namespace, self._load_values, interval)
+                )
+
+        try:
+            while not stop_requested.is_set():
+                try:
+                    await asyncio.wait_for(stop_requested.wait(), HEALTH_CHECK_INTERVAL_SECONDS)
+                except asyncio.TimeoutError:
+                    pass
+                if not stop_requested.is_set():
+                    for worker in self.workers:
+                        await self._check(worker)
+        finally:
+            if metrics_server:
+                metrics_server.close()
+            if load_report_task:
+                load_report_task.cancel()
+            await self._stop()
@@ -92,6 +92,11 @@ export class NetworkStack extends cdk.Stack {
       ec2.Port.tcp(80),
       "Allow HTTP traffic from anywhere"
     );
+    ecsSg.addIngressRule(
+      nlbSg,
+      ec2.Port.tcp(8081),
+      "Allow health checks from the load balancer"
+    );
 
     return { vpc, nlbSg, ecsSg };
   }
@@ -14,6 +14,7 @@
  */
 
 import * as cdk from "aws-cdk-lib";
+import * as cloudwatch from "aws-cdk-lib/aws-cloudwatch";
 import * as cognito from "aws-cdk-lib/aws-cognito";
 import * as cr from "aws-cdk-lib/custom-resources";
 import * as ecr from "aws-cdk-lib/aws-ecr-assets";
@@ -167,15 +168,28 @@ export class S2SAppStack extends cdk.Stack {
         NODE_ENV: "production",
         PORT: "80",
         MCP_PORT: "8000",
+        DRAIN_TIMEOUT_SECONDS: "90",
+        // Sessions per task; measure the capacity of the task size with the load generator
+        MAX_SESSIONS: "40",
+        LOAD_REPORT_INTERVAL_SECONDS: "60",
+        LOAD_METRICS_NAMESPACE: `NovaS2S/${this.stackName}`,
+        HEALTH_PORT: "8081",
         USER_POOL_ID: this.userPool.userPoolId,
         CLIENT_ID: this.userPoolClient.userPoolClientId,
       },
+      // Time between SIGTERM and SIGKILL, for active sessions to drain (Fargate maximum)
+      stopTimeout: Duration.seconds(120),
       portMappings: [
         {
           containerPort: 80,
           hostPort: 80,
           protocol: ecs.Protocol.TCP,
         },
+        {
+          containerPort: 8081,
+          hostPort: 8081,
+          protocol: ecs.Protocol.TCP,
+        },
       ],
     });
 
@@ -186,28 +200,63 @@ export class S2SAppStack extends cdk.Stack {
       securityGroups: [this.networkStack.ecsSg],
       assignPublicIp: false,
       enableExecuteCommand: false, // This removes GuardDuty VPCe, making automatic destruction almost impossible
+      // Deployments, including the task rotation, start the new tasks before stopping old ones
+      minHealthyPercent: 100,
+      maxHealthyPercent: 200,
     });
     return wsService;
   }
 
   registerLoadBalancerTarget(wsService: ecs.FargateService) {
-    this.networkStack.mainListener.addTargets("WebsocketTargets", {
+    const targetGroup = this.networkStack.mainListener.addTargets("WebsocketTargets", {
       port: 80,
       targets: [wsService],
+      // Keep draining sessions connected until the task closes them
+      deregistrationDelay: Duration.seconds(120),
+      // Readiness on the health port: a task at MAX_SESSIONS or draining gets no new connections
       healthCheck: {
         enabled: true,
-        port: "80",
-        protocol: elbv2.Protocol.TCP, // TCP for NLB
-        interval: Duration.seconds(60),
-        timeout: Duration.seconds(10),
+        port: "8081",
+        protocol: elbv2.Protocol.HTTP,
+        path: "/readyz",
+        interval: Duration.seconds(10),
+        timeout: Duration.seconds(5),
         healthyThresholdCount: 2,
         unhealthyThresholdCount: 2,
       },
     });
+    // Not ready is not broken: keep the sessions of an unhealthy target connected
+    targetGroup.setAttribute(
+      "target_health_state.unhealthy.connection_termination.enabled",
+      "false"
+    );
+  }
+
+  // Scale on the share of MAX_SESSIONS in use, reported by the tasks as EMF logs.
+  // With WORKERS > 1, MAX_SESSIONS is per worker and each task's supervisor reports
+  // one record from its workers' summed sessions, so Average is the mean task load.
+  addSessionLoadScaling(wsService: ecs.FargateService) {
+    const scaling = wsService.autoScaleTaskCount({
+      minCapacity: 2,
+      maxCapacity: 10,
+    });
+    scaling.scaleToTrackCustomMetric("SessionLoadScaling", {
+      metric: new cloudwatch.Metric({
+        namespace: `NovaS2S/${this.stackName}`,
+        metricName: "SessionLoad",
+        statistic: "Average",
+        period: Duration.minutes(1),
+      }),
+      targetValue: 60,
+      scaleOutCooldown: Duration.minutes(1),
+      // Scaling in stops tasks, whose sessions then have to drain
+      scaleInCooldown: Duration.minutes(10),
+    });
   }
 
-  // Temporary workaround to force credential refresh every 5 hours by stopping tasks
-  // (until official Python SDK supports automatic credential fetching from ECS task role)
+  // Temporary workaround to force credential refresh every 5 hours by replacing the tasks
+  // through a new deployment (until official Python SDK supports automatic credential
+  // fetching from ECS task role)
   temp_addTasksRotateLambda(
     ecsService: ecs.FargateService,
     ecsCluster: ecs.Cluster
@@ -216,7 +265,8 @@ export class S2SAppStack extends cdk.Stack {
       runtime: lambda.Runtime.NODEJS_LATEST,
       entry: path.join(__dirname, "../lambda/ecsTaskRotater/index.ts"),
       handler: "handler",
-      timeout: Duration.minutes(10),
+      // Only starts the deployment; ECS replaces and drains the tasks
+      timeout: Duration.minutes(1),
       environment: {
         ECS_CLUSTER_NAME: ecsCluster.clusterName,
         ECS_SERVICE_NAME: ecsService.serviceName,
@@ -224,13 +274,8 @@ export class S2SAppStack extends cdk.Stack {
     });
     taskRotater.addToRolePolicy(
       new iam.PolicyStatement({
-        actions: ["ecs:ListTasks", "ecs:StopTask"],
-        resources: ["*"],
-        conditions: {
-          ArnEquals: {
-            "ecs:cluster": ecsCluster.clusterArn,
-          },
-        },
+        actions: ["ecs:UpdateService"],
+        resources: [ecsService.serviceArn],
       })
     );
     // Create EventBridge rule to trigger the Lambda every 5 hours: before credentials expire (6 hours)
@@ -358,6 +403,7 @@ export class S2SAppStack extends cdk.Stack {
     );
     const wsService = this.createContainerDefinition(ecsCluster, wsTaskDef);
     this.registerLoadBalancerTarget(wsService);
+    this.addSessionLoadScaling(wsService);
     // This is a temporary workaround to the lack of credential refresh in the experimental Python SDK
     this.temp_addTasksRotateLambda(wsService, ecsCluster);
 
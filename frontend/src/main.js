@@ -268,8 +268,17 @@ async function startStreaming() {
   
   console.log("DEBUG: About to create WebSocketEventManager");
 
+  // Create AudioContext for processing (let browser choose optimal sample rate);
+  // audio is sent at this rate and the backend resamples it for the model
+  const audioContext = new AudioContext({
+    latencyHint: "interactive",
+  });
+
+  console.log(`DEBUG: AudioContext created with sample rate: ${audioContext.sampleRate}Hz`);
+
   // Create WebSocket manager without fallback
   wsManager = new WebSocketEventManager();
+  wsManager.setInputSampleRate(audioContext.sampleRate);
 
   // Add custom handlers
   wsManager.onUpdateTranscript = updateTranscript;
@@ -294,13 +303,6 @@ async function startStreaming() {
     
     console.log("DEBUG: Microphone access granted, starting timer");
 
-    // Create AudioContext for processing (let browser choose optimal sample rate)
-    const audioContext = new AudioContext({
-      latencyHint: "interactive",
-    });
-
-    console.log(`DEBUG: AudioContext created with sample rate: ${audioContext.sampleRate}Hz`);
-
     // Create MediaStreamSource
     const source = audioContext.createMediaStreamSource(stream);
 
@@ -322,36 +324,18 @@ async function startStreaming() {
     // Counter to confirm speech
     let speechSampleCount = 0;
 
+    // Frames waiting to be sent while the backend asks us to slow down
+    let pendingPcm = [];
+    const THROTTLED_FRAMES_PER_MESSAGE = 4;
+
     processor.onaudioprocess = (e) => {
+      // Audio stays in the AudioContext's float32 samples at its sample rate,
+      // which the audio contentStart declares; the backend converts it to
+      // 16-bit 16kHz, so there is no per-sample work here
       const inputData = e.inputBuffer.getChannelData(0);
 
-      // The input sample rate is the AudioContext's sample rate
-      const inputSampleRate = audioContext.sampleRate;
-      const outputSampleRate = 16000; // Backend expects 16kHz
-      
-      let processedData = inputData;
-      
-      // If sample rates don't match, we need to resample
-      if (inputSampleRate !== outputSampleRate) {
-        // Simple decimation for downsampling (basic resampling)
-        const ratio = inputSampleRate / outputSampleRate;
-        const outputLength = Math.floor(inputData.length / ratio);
-        const resampledData = new Float32Array(outputLength);
-        
-        for (let i = 0; i < outputLength; i++) {
-          const sourceIndex = Math.floor(i * ratio);
-          resampledData[i] = inputData[sourceIndex];
-        }
-        processedData = resampledData;
-      }
-
-      // Convert Float32Array to Int16Array
-      const pcmData = new Int16Array(processedData.length);
-      for (let i = 0; i < processedData.length; i++) {
-        // Convert float to 16-bit integer
-        const s = Math.max(-1, Math.min(1, processedData[i]));
-        pcmData[i] = s < 0 ? s * 0x8000 : s * 0x7fff;
-      }
+      // The processor reuses the input buffer, so keep a copy
+      const pcmData = inputData.slice();
 
       // Calculate audio level for this chunk (use original data for speech detection)
       const audioLevel = Math.max(...Array.from(inputData).map(Math.abs));
@@ -396,14 +380,21 @@ async function startStreaming() {
         speechSampleCount = 0;
       }
 
-      // Convert to base64
-      const base64data = btoa(
-        String.fromCharCode.apply(null, new Uint8Array(pcmData.buffer))
-      );
+      // While the backend is throttling us, batch several frames per message
+      pendingPcm.push(pcmData);
+      if (
+        wsManager &&
+        wsManager.audioThrottled &&
+        pendingPcm.length < THROTTLED_FRAMES_PER_MESSAGE
+      ) {
+        return;
+      }
+      const batch = mergePcmFrames(pendingPcm);
+      pendingPcm = [];
 
       // Send to WebSocket
       if (wsManager) {
-        wsManager.sendAudioChunk(base64data);
+        wsManager.sendAudioPcm(batch);
       }
     };
 
@@ -432,6 +423,21 @@ async function startStreaming() {
   }
 }
 
+// Concatenate PCM frames into a single typed array
+function mergePcmFrames(frames) {
+  if (frames.length === 1) {
+    return frames[0];
+  }
+  const total = frames.reduce((sum, frame) => sum + frame.length, 0);
+  const merged = new Float32Array(total);
+  let offset = 0;
+  for (const frame of frames) {
+    merged.set(frame, offset);
+    offset += frame.length;
+  }
+  return merged;
+}
+
 // Stop streaming audio
 function stopStreaming() {
   const startButton = document.getElementById("start");
@@ -19,6 +19,14 @@ import { getCognitoAuth } from "./cognito.js";
 
 const audioPlayer = new AudioPlayer();
 
+// WebSocket sub-protocol for raw PCM audio in binary frames (see backend/audio_frames.py)
+const AUDIO_SUBPROTOCOL = "nova-s2s.audio.v1";
+const AUDIO_FRAME_VERSION = 1;
+const AUDIO_FRAME_HEADER_SIZE = 6;
+// Retries of connections refused before opening, e.g. by a backend at its session limit
+const MAX_CONNECT_RETRIES = 5;
+const CONNECT_RETRY_BASE_MS = 1000;
+
 export class WebSocketEventManager {
   constructor(fallbackWsUrl) {
     this.cognitoAuth = getCognitoAuth();
@@ -33,6 +41,19 @@ export class WebSocketEventManager {
     this.isProcessing = false;
     this.seenChunks = new Set();
     this.customSystemPrompt = null;
+    // Set when the backend asks us to slow down the audio stream
+    this.audioThrottled = false;
+    // Set when the backend announced it is restarting, to reconnect once it closes the connection
+    this.serverDraining = false;
+    // Connections in a row refused before opening
+    this.connectRetries = 0;
+    // Sequence number of the next binary audio frame
+    this.audioSequence = 0;
+    // Sample rate the microphone audio is captured and sent at
+    this.inputSampleRate = 16000;
+    // When local speech detection last saw the user start talking, to measure barge-in latency
+    this.userSpeechStartedAt = null;
+    this.textEncoder = new TextEncoder();
 
     // Message handling properties
     this.messageBuffer = {};
@@ -63,6 +84,11 @@ export class WebSocketEventManager {
     }
   }
 
+  // Declare the capture rate in the audio contentStart; the backend resamples to 16kHz
+  setInputSampleRate(sampleRate) {
+    this.inputSampleRate = sampleRate;
+  }
+
   // Callback handlers that can be set from main.js
   onUpdateTranscript = null;
   onUpdateStatus = null;
@@ -72,13 +98,17 @@ export class WebSocketEventManager {
     if (this.socket) {
       this.socket.close();
     }
-    this.socket = new WebSocket(this.wsUrl);
+    this.socket = new WebSocket(this.wsUrl, [AUDIO_SUBPROTOCOL]);
+    this.socketOpened = false;
+    this.audioSequence = 0;
     this.setupSocketListeners();
   }
 
   setupSocketListeners() {
     this.socket.onopen = () => {
       console.log("WebSocket Connected");
+      this.socketOpened = true;
+      this.connectRetries = 0;
       this.updateStatus("Connected", "connected");
       this.isProcessing = true;
       this.startSession();
@@ -105,7 +135,20 @@ export class WebSocketEventManager {
       this.updateStatus("Disconnected", "disconnected");
       this.isProcessing = false;
       audioPlayer.stop();
-      if (this.isProcessing) {
+      const retries = this.connectRetries;
+      if (!this.socketOpened && retries < MAX_CONNECT_RETRIES) {
+        // Refused before opening: a busy backend answers 503, which browsers
+        // do not expose; back off with jitter, the next try may reach another task
+        this.connectRetries = retries + 1;
+        const delay = CONNECT_RETRY_BASE_MS * 2 ** retries * (0.5 + Math.random());
+        console.log(`Connection refused, retrying in ${Math.round(delay)} ms...`);
+        setTimeout(() => this.connect(), delay);
+      } else if (this.serverDraining) {
+        // The load balancer sends the new connection to another backend task
+        this.serverDraining = false;
+        console.log("Backend restarted, reconnecting...");
+        setTimeout(() => this.connect(), 1000);
+      } else if (this.isProcessing) {
         console.log("Attempting to reconnect...");
         setTimeout(() => this.connect(), 1000);
       }
@@ -230,6 +273,43 @@ export class WebSocketEventManager {
       else if (event.toolUse) {
         console.log("Tool use event received:", event.toolUse.toolName);
       }
+      // Handle barge-in: the backend dropped queued assistant audio
+      else if (event.playbackFlush) {
+        audioPlayer.bargeIn();
+        const receivedAt = Date.now();
+        console.log(
+          "Playback flush received:",
+          event.playbackFlush.droppedEvents,
+          "queued audio events dropped,",
+          receivedAt - event.playbackFlush.detectedAt,
+          "ms after the backend detected the interruption",
+          this.userSpeechStartedAt
+            ? `, ${receivedAt - this.userSpeechStartedAt} ms after the user started talking`
+            : ""
+        );
+      }
+      // Handle audio flow control from the backend
+      else if (event.audioFlowControl) {
+        console.log(
+          "Audio flow control received:",
+          event.audioFlowControl.action,
+          "queue depth:",
+          event.audioFlowControl.queueDepth
+        );
+        this.audioThrottled = event.audioFlowControl.action === "SLOW_DOWN";
+      }
+      // Handle the backend draining connections before it restarts
+      else if (event.serverDraining) {
+        console.log(
+          "Server draining, connection closes at",
+          new Date(event.serverDraining.closesAt).toISOString()
+        );
+        this.serverDraining = true;
+        this.updateStatus(
+          "Server restarting, the conversation will reconnect shortly",
+          "disconnected"
+        );
+      }
       // Handle prompt end
       else if (event.promptEnd) {
         console.log("Prompt end received");
@@ -419,8 +499,9 @@ Core Rules
           interactive: true,
           audioInputConfiguration: {
             mediaType: "audio/lpcm",
-            sampleRateHertz: 16000,
-            sampleSizeBits: 16,
+            sampleRateHertz: this.inputSampleRate,
+            // Float32 samples as captured, see sendAudioPcm
+            sampleSizeBits: 32,
             channelCount: 1,
             audioType: "SPEECH",
             encoding: "base64",
@@ -431,6 +512,54 @@ Core Rules
     this.sendEvent(contentStartEvent);
   }
 
+  // Send float32 PCM audio, as a binary frame when the backend negotiated it
+  sendAudioPcm(pcmData) {
+    if (!this.promptName || !this.audioContentName) {
+      console.error(
+        "Cannot send audio chunk - missing promptName or audioContentName"
+      );
+      return;
+    }
+
+    if (this.socket && this.socket.protocol === AUDIO_SUBPROTOCOL) {
+      this.sendAudioFrame(pcmData);
+    } else {
+      const base64data = btoa(
+        String.fromCharCode.apply(null, new Uint8Array(pcmData.buffer))
+      );
+      this.sendAudioChunk(base64data);
+    }
+  }
+
+  sendAudioFrame(pcmData) {
+    if (!this.socket || this.socket.readyState !== WebSocket.OPEN) {
+      return;
+    }
+
+    const name = this.textEncoder.encode(this.audioContentName);
+    const pcmBytes = new Uint8Array(
+      pcmData.buffer,
+      pcmData.byteOffset,
+      pcmData.byteLength
+    );
+    const frame = new Uint8Array(
+      AUDIO_FRAME_HEADER_SIZE + name.length + pcmBytes.length
+    );
+    const header = new DataView(frame.buffer);
+    header.setUint8(0, AUDIO_FRAME_VERSION);
+    header.setUint8(1, name.length);
+    header.setUint32(2, this.audioSequence, false);
+    frame.set(name, AUDIO_FRAME_HEADER_SIZE);
+    frame.set(pcmBytes, AUDIO_FRAME_HEADER_SIZE + name.length);
+    this.audioSequence = (this.audioSequence + 1) >>> 0;
+
+    try {
+      this.socket.send(frame);
+    } catch (error) {
+      console.error("Error sending audio frame:", error);
+    }
+  }
+
   sendAudioChunk(base64AudioData) {
     if (!this.promptName || !this.audioContentName) {
       console.error(
@@ -504,6 +633,7 @@ Core Rules
   // Keep just the basic methods for speech detection
   startUserTalking() {
     console.log("User started talking");
+    this.userSpeechStartedAt = Date.now();
   }
 
   stopUserTalking() {
@@ -13,6 +13,7 @@
 # permissions and limitations under the License.
 #
 
+import asyncio
 from typing import Annotated, Union
 from pydantic import Field
 from mcp_server import mcp_server
@@ -36,7 +37,7 @@ async def lookup_tool(
     """Look up information in the knowledge base"""
     try:
         logger.info(f"Knowledge base lookup query: {query}")
-        results = knowledge_base_lookup.main(query)
+        results = await asyncio.to_thread(knowledge_base_lookup.main, query)
         return results  
     except Exception as e:
         logger.error(f"Error in knowledge base lookup: {str(e)}", exc_info=True)
@@ -54,7 +55,7 @@ async def user_profile_by_booking_reference_tool(
     """Search for user flight booking information by booking reference"""
     try:
         logger.info(f"User profile search by booking reference: {booking_reference}")
-        results = user_profile_by_booking_reference.main(booking_reference)
+        results = await asyncio.to_thread(user_profile_by_booking_reference.main, booking_reference)
         return results  
     except Exception as e:
         logger.error(f"Error in user profile search by booking reference: {str(e)}", exc_info=True)
@@ -71,7 +72,7 @@ async def user_profile_by_frequent_flyer_number_tool(
     """Search for user flight booking information by frequent flyer number"""
     try:
         logger.info(f"User profile search by frequent flyer number: {frequentFlyerNumber}")
-        results = user_profile_by_ffn.main(frequentFlyerNumber)
+        results = await asyncio.to_thread(user_profile_by_ffn.main, frequentFlyerNumber)
         return results  
     except Exception as e:
         logger.error(f"Error in user profile search by frequent flyer number: {str(e)}", exc_info=True)
@@ -89,7 +90,7 @@ async def create_support_ticket_tool(
     """create a support ticket for for a specific flight with provided booking ref"""
     try:
         logger.info(f"User profile search by booking ref: {booking_reference}")
-        results = create_support_ticket.main(issue_summary, booking_reference)
+        results = await asyncio.to_thread(create_support_ticket.main, issue_summary, booking_reference)
         return results  
     except Exception as e:
         logger.error(f"Error locating records with provided booking reference: {str(e)}", exc_info=True)
@@ -108,7 +109,7 @@ async def request_for_special_meal_tool(
     """Use this tool when a user wants to request a special meal for their flight or request for a change in the meal already ordered."""
     try:
         logger.info(f"Creating special meal request for booking reference number : {booking_reference}")
-        results = request_for_special_meal.main(booking_reference, meal_type)
+        results = await asyncio.to_thread(request_for_special_meal.main, booking_reference, meal_type)
         return results  
     except Exception as e:
         logger.error(f"Error locating records with provided booking reference: {str(e)}", exc_info=True)
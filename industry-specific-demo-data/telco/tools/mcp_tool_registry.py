@@ -14,6 +14,7 @@
 #
 
 # mcp_tool_registry.py
+import asyncio
 from typing import Annotated, Union
 from pydantic import Field
 from mcp_server import mcp_server
@@ -34,7 +35,7 @@ async def lookup_tool(
     """Look up information in the knowledge base"""
     try:
         logger.info(f"Knowledge base lookup query: {query}")
-        results = knowledge_base_lookup.main(query)
+        results = await asyncio.to_thread(knowledge_base_lookup.main, query)
         return results  
     except Exception as e:
         logger.error(f"Error in knowledge base lookup: {str(e)}", exc_info=True)
@@ -52,7 +53,7 @@ async def user_profile_search_tool(
     try:
         phone_str = str(phone_number)
         # logger.info(f"User profile search for: {phone_str}")
-        results = retrieve_user_profile.main(phone_str)
+        results = await asyncio.to_thread(retrieve_user_profile.main, phone_str)
         return results  
     except Exception as e:
         logger.error(f"Error in user profile search: {str(e)}", exc_info=True)